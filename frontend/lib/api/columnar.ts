@@ -0,0 +1,166 @@
+/**
+ * Columnar Wire Format
+ * Encoder/decoder for the ML Engine's binary batch format (ml_engine/serving/columnar.py):
+ * "SSC1", a uint32 header length, a JSON header, then 8-byte aligned little-endian column buffers
+ */
+
+export const COLUMNAR_MEDIA_TYPE = "application/vnd.siliconsage.columns";
+
+const MAGIC = "SSC1";
+const ALIGNMENT = 8;
+
+type NumericArray =
+  | Float64Array
+  | Float32Array
+  | BigInt64Array
+  | Int32Array
+  | Int16Array
+  | Int8Array
+  | Uint32Array
+  | Uint16Array
+  | Uint8Array;
+
+// A numeric column, a string column (null where missing) or a column of string lists
+export type Column = NumericArray | (string | null)[] | string[][];
+
+const DTYPES: Record<string, new (buffer: ArrayBuffer, byteOffset: number, length: number) => NumericArray> = {
+  "<f8": Float64Array,
+  "<f4": Float32Array,
+  "<i8": BigInt64Array,
+  "<i4": Int32Array,
+  "<i2": Int16Array,
+  "|i1": Int8Array,
+  "<u4": Uint32Array,
+  "<u2": Uint16Array,
+  "|u1": Uint8Array,
+  "|b1": Uint8Array,
+};
+
+interface BufferSpec {
+  offset: number;
+  nbytes: number;
+}
+
+interface ColumnSpec extends BufferSpec {
+  name: string;
+  dtype: string;
+  categories?: string[];
+  lists?: BufferSpec;
+}
+
+function dtypeOf(array: NumericArray): string {
+  const dtype = Object.keys(DTYPES).find((key) => array instanceof DTYPES[key]);
+  if (!dtype) throw new Error("Unsupported column type");
+  return dtype;
+}
+
+function dictionaryEncode(values: (string | null)[]): { codes: Int32Array; categories: string[] } {
+  const index = new Map<string, number>();
+  const codes = new Int32Array(values.length);
+  values.forEach((value, i) => {
+    if (value === null) {
+      codes[i] = -1;
+      return;
+    }
+    let code = index.get(value);
+    if (code === undefined) {
+      code = index.size;
+      index.set(value, code);
+    }
+    codes[i] = code;
+  });
+  return { codes, categories: [...index.keys()] };
+}
+
+/**
+ * Encode equal-length columns; string columns are dictionary-encoded.
+ * Typed arrays are written in platform byte order, which is little-endian on every supported platform.
+ */
+export function encodeColumns(
+  columns: Record<string, Column | undefined>,
+  metadata: Record<string, unknown> = {}
+): ArrayBuffer {
+  const specs: ColumnSpec[] = [];
+  const buffers: Uint8Array[] = [];
+  let position = 0;
+  let rows = 0;
+
+  const addBuffer = (array: NumericArray): BufferSpec => {
+    const bytes = new Uint8Array(array.buffer, array.byteOffset, array.byteLength);
+    const spec = { offset: position, nbytes: bytes.length };
+    buffers.push(bytes);
+    position += Math.ceil(bytes.length / ALIGNMENT) * ALIGNMENT;
+    return spec;
+  };
+
+  for (const [name, column] of Object.entries(columns)) {
+    if (column === undefined) continue;
+    rows = column.length;
+    if (ArrayBuffer.isView(column)) {
+      specs.push({ name, dtype: dtypeOf(column), ...addBuffer(column) });
+    } else if (column.length && Array.isArray(column[0])) {
+      const lists = column as string[][];
+      const offsets = new Int32Array(lists.length + 1);
+      lists.forEach((items, i) => (offsets[i + 1] = offsets[i] + items.length));
+      const listsSpec = addBuffer(offsets);
+      const { codes, categories } = dictionaryEncode(lists.flat());
+      specs.push({ name, dtype: "<i4", categories, lists: listsSpec, ...addBuffer(codes) });
+    } else {
+      const { codes, categories } = dictionaryEncode(column as (string | null)[]);
+      specs.push({ name, dtype: "<i4", categories, ...addBuffer(codes) });
+    }
+  }
+
+  const header = new TextEncoder().encode(JSON.stringify({ rows, columns: specs, metadata }));
+  const headerLength = Math.ceil((8 + header.length) / ALIGNMENT) * ALIGNMENT - 8;
+  const out = new Uint8Array(8 + headerLength + position);
+  const view = new DataView(out.buffer);
+  out.set(new TextEncoder().encode(MAGIC), 0);
+  view.setUint32(4, headerLength, true);
+  out.fill(0x20, 8, 8 + headerLength);
+  out.set(header, 8);
+  let offset = 8 + headerLength;
+  for (const bytes of buffers) {
+    out.set(bytes, offset);
+    offset += Math.ceil(bytes.length / ALIGNMENT) * ALIGNMENT;
+  }
+  return out.buffer;
+}
+
+/**
+ * Decode a columnar table. Numeric columns are views of the buffer, not copies.
+ */
+export function decodeColumns(buffer: ArrayBuffer): { columns: Record<string, Column>; metadata: Record<string, unknown> } {
+  const view = new DataView(buffer);
+  if (new TextDecoder().decode(new Uint8Array(buffer, 0, 4)) !== MAGIC) {
+    throw new Error("Not a columnar table");
+  }
+  const start = 8 + view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, start - 8)));
+
+  const numeric = (spec: BufferSpec, dtype: string): NumericArray => {
+    const ArrayType = DTYPES[dtype];
+    if (!ArrayType) throw new Error(`Unsupported dtype ${dtype}`);
+    return new ArrayType(buffer, start + spec.offset, spec.nbytes / (ArrayType as unknown as { BYTES_PER_ELEMENT: number }).BYTES_PER_ELEMENT);
+  };
+
+  const columns: Record<string, Column> = {};
+  for (const spec of header.columns as ColumnSpec[]) {
+    const array = numeric(spec, spec.dtype);
+    if (!spec.categories) {
+      columns[spec.name] = array;
+      continue;
+    }
+    const categories = spec.categories;
+    const strings = Array.from(array as Int32Array, (code) => (code < 0 ? null : categories[code]));
+    if (spec.lists) {
+      const offsets = numeric(spec.lists, "<i4") as Int32Array;
+      columns[spec.name] = Array.from({ length: header.rows }, (_, i) =>
+        strings.slice(offsets[i], offsets[i + 1]) as string[]
+      );
+    } else {
+      columns[spec.name] = strings;
+    }
+  }
+  return { columns, metadata: header.metadata ?? {} };
+}
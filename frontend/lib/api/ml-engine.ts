@@ -4,6 +4,7 @@
  */
 
 import type { FPSPrediction, ValueTierResult, EcosystemComparison } from "../types/database";
+import { COLUMNAR_MEDIA_TYPE, decodeColumns, encodeColumns } from "./columnar";
 
 const ML_ENGINE_URL = process.env.NEXT_PUBLIC_ML_ENGINE_URL || "http://localhost:8000";
 
@@ -14,6 +15,134 @@ interface BuildSpecs {
   ram_speed: number;
   storage_type: "hdd" | "ssd" | "nvme";
   target_resolution: "1080p" | "1440p" | "4k";
+  // Catalog parts (id or exact name) checked for compatibility by the integrity score
+  cpu_part?: string;
+  motherboard_part?: string;
+  ram_part?: string;
+  case_part?: string;
+}
+
+// predictFPSColumns input: every build field as one array, entry i belonging to build i
+type BuildColumns = {
+  cpu_benchmark: Float64Array;
+  gpu_benchmark: Float64Array;
+  ram_gb: Int32Array;
+  ram_speed: Int32Array;
+  storage_type: string[];
+  target_resolution: string[];
+  cpu_tdp: Float64Array;
+  gpu_tdp: Float64Array;
+  psu_wattage: Float64Array;
+  psu_efficiency: string[];
+  mobo_chipset: string[];
+  cpu_clock: Float64Array;
+  cpu_part?: (string | null)[];
+  motherboard_part?: (string | null)[];
+  ram_part?: (string | null)[];
+  case_part?: (string | null)[];
+};
+
+// predictFPSColumns output: FPSPrediction fields as arrays, fps_headroom and game_fps split per key
+// (game_fps.<game> columns only come from a model trained with game profiles)
+type FPSPredictionColumns = {
+  predicted_fps: Float64Array;
+  bottleneck_component: string[];
+  bottleneck_severity: string[];
+  recommendation: string[];
+  integrity_score: Int32Array;
+  integrity_status: string[];
+  integrity_warnings: string[][];
+  integrity_notes: string[][];
+  "fps_headroom.CPU": Float64Array;
+  "fps_headroom.GPU": Float64Array;
+  "fps_headroom.RAM": Float64Array;
+  attributed_bottleneck: string[];
+  model_version: string | null;
+  [gameFps: `game_fps.${string}`]: Float64Array;
+};
+
+interface ModelStatus {
+  state: "pending" | "loading" | "ready" | "failed";
+  load_seconds: number | null;
+  version: string | null;
+  error: string | null;
+}
+
+interface CatalogPart {
+  id: string;
+  name: string;
+  price: number;
+  benchmark: number;
+  value: number;
+  tier: string;
+}
+
+interface SimilarPartsResult {
+  category: string;
+  similar: CatalogPart[];
+  cheaper_alternative: CatalogPart | null;
+  faster_alternative: CatalogPart | null;
+}
+
+interface CompatiblePartsResult {
+  category: string;
+  total: number;
+  parts: CatalogPart[];
+}
+
+interface OptimizeBuildRequest {
+  budget: number;
+  target_resolution: "1080p" | "1440p" | "4k";
+  pinned?: Record<string, string>;
+  top_k?: number;
+  gpu_tdp?: number;
+  psu_wattage?: number;
+  psu_efficiency?: string;
+  mobo_chipset?: string;
+}
+
+interface OptimizedBuild {
+  parts: Record<string, CatalogPart>;
+  total_price: number;
+  prediction: FPSPrediction;
+}
+
+interface UpgradeOption {
+  category: string;
+  part: CatalogPart;
+  predicted_fps: number;
+  fps_gain: number;
+  fps_per_dollar: number;
+  bottleneck_component: string;
+  bottleneck_severity: string;
+}
+
+interface UpgradeResult {
+  current_fps: number;
+  bottleneck_component: string;
+  bottleneck_severity: string;
+  goal: "target_fps" | "remove_bottleneck";
+  candidates_scored: number;
+  upgrade: UpgradeOption | null;
+  best_value: UpgradeOption | null;
+}
+
+interface SweepAxis {
+  field: "cpu_benchmark" | "gpu_benchmark" | "ram_gb" | "ram_speed" | "storage_type" | "target_resolution";
+  values?: (number | string)[];
+  start?: number;
+  stop?: number;
+  steps?: number;
+}
+
+interface SweepResult {
+  axes: { field: string; values: (number | string)[] }[];
+  // A curve for one axis, a heatmap (rows follow the first axis) for two
+  predicted_fps: number[] | number[][];
+  bottleneck_component: string[] | string[][];
+  bottleneck_severity: string[] | string[][];
+  // Per-game FPS grids shaped like predicted_fps, when the model predicts them
+  game_fps?: Record<string, number[] | number[][]>;
 }
 
 interface PartSpec {
@@ -23,6 +152,12 @@ interface PartSpec {
   category: string;
 }
 
+// One NDJSON line of a value tier stream: a tiered part (id and price for catalog parts),
+// or an error for an invalid input line (line set) or for the stream itself
+type StreamedValueTier =
+  | { name: string; category: string; tier: string; value_score: number; id?: string; price?: number }
+  | { line?: number; error: string };
+
 class MLEngineClient {
   private baseUrl: string;
 
@@ -33,7 +168,7 @@ class MLEngineClient {
   /**
    * Check if the ML Engine is healthy and models are loaded
    */
-  async healthCheck(): Promise<{ status: string; ml_models_loaded: boolean; version: string }> {
+  async healthCheck(): Promise<{ status: string; version: string; models: Record<string, ModelStatus> }> {
     const response = await fetch(`${this.baseUrl}/`);
     if (!response.ok) {
       throw new Error(`ML Engine health check failed: ${response.statusText}`);
@@ -42,12 +177,16 @@ class MLEngineClient {
   }
 
   /**
-   * Predict FPS and detect bottlenecks for a build
+   * Predict FPS and detect bottlenecks for a build.
+   * With deadlineMs the server drops the request (504) if it cannot start it in time.
    */
-  async predictFPS(specs: BuildSpecs): Promise<FPSPrediction> {
+  async predictFPS(specs: BuildSpecs, deadlineMs?: number): Promise<FPSPrediction> {
     const response = await fetch(`${this.baseUrl}/predict/fps`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        ...(deadlineMs ? { "X-Request-Deadline-Ms": String(deadlineMs) } : {}),
+      },
       body: JSON.stringify(specs),
     });
 
@@ -59,6 +198,108 @@ class MLEngineClient {
     return response.json();
   }
 
+  /**
+   * Predict FPS for many builds in a single request (one model call server-side)
+   */
+  async predictFPSBatch(builds: BuildSpecs[]): Promise<FPSPrediction[]> {
+    const response = await fetch(`${this.baseUrl}/predict/fps/batch`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ builds }),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to predict FPS batch");
+    }
+
+    const data: { predictions: FPSPrediction[] } = await response.json();
+    return data.predictions;
+  }
+
+  /**
+   * predictFPSBatch over the binary columnar format: arrays in, arrays out, and no
+   * per-build JSON on either side. Use it for large batches.
+   */
+  async predictFPSColumns(builds: BuildColumns): Promise<FPSPredictionColumns> {
+    const response = await fetch(`${this.baseUrl}/predict/fps/batch`, {
+      method: "POST",
+      headers: { "Content-Type": COLUMNAR_MEDIA_TYPE, Accept: COLUMNAR_MEDIA_TYPE },
+      body: encodeColumns(builds),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to predict FPS columns");
+    }
+
+    const { columns, metadata } = decodeColumns(await response.arrayBuffer());
+    return { ...columns, model_version: metadata.model_version ?? null } as FPSPredictionColumns;
+  }
+
+  /**
+   * FPS over a grid of one or two varied inputs around a base build, in one request
+   */
+  async sweepFPS(build: BuildSpecs, axes: SweepAxis[]): Promise<SweepResult> {
+    const response = await fetch(`${this.baseUrl}/predict/fps/sweep`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ build, axes }),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to sweep FPS");
+    }
+
+    return response.json();
+  }
+
+  /**
+   * Best catalog builds for a budget and target resolution
+   */
+  async optimizeBuild(request: OptimizeBuildRequest): Promise<OptimizedBuild[]> {
+    const response = await fetch(`${this.baseUrl}/optimize/build`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(request),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to optimize build");
+    }
+
+    const data: { builds: OptimizedBuild[] } = await response.json();
+    return data.builds;
+  }
+
+  /**
+   * Cheapest part swap that removes the bottleneck (or reaches targetFps)
+   */
+  async suggestUpgrade(
+    build: BuildSpecs,
+    options: { targetFps?: number; category?: string; maxPrice?: number } = {}
+  ): Promise<UpgradeResult> {
+    const response = await fetch(`${this.baseUrl}/optimize/upgrade`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        build,
+        target_fps: options.targetFps,
+        category: options.category,
+        max_price: options.maxPrice,
+      }),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to suggest upgrade");
+    }
+
+    return response.json();
+  }
+
   /**
    * Analyze a part's value tier
    */
@@ -77,6 +318,92 @@ class MLEngineClient {
     return response.json();
   }
 
+  /**
+   * Tier many parts in one streamed request, yielding results as the server produces them.
+   * Without parts, re-tiers the server's catalog (one category, or all of them).
+   */
+  async *streamValueTiers(parts?: PartSpec[], category?: string): AsyncGenerator<StreamedValueTier> {
+    const params = category ? `?${new URLSearchParams({ category })}` : "";
+    const response = parts
+      ? await fetch(`${this.baseUrl}/analyze/value-tier/stream`, {
+          method: "POST",
+          headers: { "Content-Type": "application/x-ndjson" },
+          body: parts.map((part) => JSON.stringify(part)).join("\n"),
+        })
+      : await fetch(`${this.baseUrl}/analyze/value-tier/stream${params}`);
+
+    if (!response.ok || !response.body) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to stream value tiers");
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      const lines = (buffer + value).split("\n");
+      buffer = lines.pop() ?? "";
+      for (const line of lines) {
+        if (line) yield JSON.parse(line);
+      }
+    }
+    if (buffer) yield JSON.parse(buffer);
+  }
+
+  /**
+   * Find the catalog parts nearest to a price/benchmark point, optionally within a price band
+   */
+  async findSimilarParts(
+    category: string,
+    price: number,
+    benchmark: number,
+    options: { k?: number; minPrice?: number; maxPrice?: number } = {}
+  ): Promise<SimilarPartsResult> {
+    const params = new URLSearchParams({
+      category,
+      price: price.toString(),
+      benchmark: benchmark.toString(),
+    });
+    if (options.k !== undefined) params.set("k", options.k.toString());
+    if (options.minPrice !== undefined) params.set("min_price", options.minPrice.toString());
+    if (options.maxPrice !== undefined) params.set("max_price", options.maxPrice.toString());
+
+    const response = await fetch(`${this.baseUrl}/parts/similar?${params}`);
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to find similar parts");
+    }
+
+    return response.json();
+  }
+
+  /**
+   * Catalog parts compatible (socket, DDR generation, form factor) with the given parts, cheapest first
+   */
+  async findCompatibleParts(
+    category: "cpu" | "motherboard" | "ram" | "case",
+    parts: { cpu?: string; motherboard?: string; ram?: string; case?: string },
+    options: { maxPrice?: number; limit?: number } = {}
+  ): Promise<CompatiblePartsResult> {
+    const params = new URLSearchParams({ category });
+    for (const [key, value] of Object.entries(parts)) {
+      if (value !== undefined) params.set(key, value);
+    }
+    if (options.maxPrice !== undefined) params.set("max_price", options.maxPrice.toString());
+    if (options.limit !== undefined) params.set("limit", options.limit.toString());
+
+    const response = await fetch(`${this.baseUrl}/parts/compatible?${params}`);
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || "Failed to find compatible parts");
+    }
+
+    return response.json();
+  }
+
   /**
    * Compare build against consoles and gaming laptops
    */
@@ -102,4 +429,4 @@ export const mlEngine = new MLEngineClient();
 
 // Export class for custom instances
 export { MLEngineClient };
-export type { BuildSpecs, PartSpec };
+export type { BuildSpecs, BuildColumns, FPSPredictionColumns, PartSpec, StreamedValueTier, ModelStatus, CatalogPart, SimilarPartsResult, CompatiblePartsResult, OptimizeBuildRequest, OptimizedBuild, UpgradeOption, UpgradeResult, SweepAxis, SweepResult };
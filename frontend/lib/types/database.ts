@@ -160,12 +160,22 @@ export interface FPSPrediction {
   bottleneck_component: string;
   bottleneck_severity: "none" | "minor" | "moderate" | "severe";
   recommendation: string;
+  fps_headroom?: Record<"CPU" | "GPU" | "RAM", number>;
+  attributed_bottleneck?: "CPU" | "GPU" | "RAM" | "none" | null;
+  // Per-game FPS, when the server's model was trained with game profiles
+  game_fps?: Record<string, number>;
+  model_version?: string | null;
+  // Approximate answer the server gave under overload
+  degraded?: boolean;
 }
 
 export interface ValueTierResult {
   tier: "budget" | "midrange" | "highend" | "enthusiast";
   value_score: number;
   similar_parts: string[];
+  cheaper_alternative?: string | null;
+  faster_alternative?: string | null;
+  model_version?: string | null;
 }
 
 export interface EcosystemComparison {
@@ -0,0 +1,659 @@
+"""
+SiliconSage Benchmark Suite
+Measures cold start, model load time and memory, per-call model latency,
+forest latency per inference thread count, and endpoint throughput, and
+compares runs against a stored baseline.
+
+Every run uses fixed seeds and writes one JSON document:
+
+    python benchmark.py --output baseline.json                 # app in-process
+    python benchmark.py --url http://127.0.0.1:8000            # a running server
+    python benchmark.py --compare baseline.json                # run, then flag regressions
+    python benchmark.py --current new.json --compare baseline.json --threshold 0.15
+
+With --compare the exit status is 1 when any metric regressed by more than the
+threshold (a fraction of the baseline value).
+
+The threading section times single-row, 256-row and 2048-row forest calls for
+each --threads value (BLAS/OpenMP limit and sklearn n_jobs) and reports the
+fastest setting per workload; use it to pick SILICONSAGE_INFERENCE_THREADS.
+It covers sklearn, the compiled flat walk on every call, and the compiled
+engine handing calls above SILICONSAGE_COMPILED_MAX_ROWS to sklearn, so the
+batch size where the flat walk stops paying off can be read off directly.
+
+The multi_output section trains the synthetic forest with and without the
+--games outputs into temporary directories and reports artifact size and
+compiled-engine latency of each, so per-game FPS can be weighed against the
+single-output model.
+
+The catalog_delta section times a full catalog rebuild from the dataset files
+against applying a price delta touching --delta-fraction of every table's rows.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+SEED = 1234
+
+# Concurrent clients each endpoint is driven with
+CONCURRENCY_LEVELS = (1, 8, 32)
+
+# Rows per call in the batched threading workloads: a typical request batch, and one
+# past the size where sklearn's C tree walk overtakes the compiled engine
+THREADING_BATCH = 256
+THREADING_LARGE_BATCH = 2048
+
+# Times the catalog delta is applied; the median is reported
+DELTA_REPEATS = 20
+
+# Flattened metric suffixes and whether lower values are better
+METRIC_DIRECTIONS = {"_ms": True, "_seconds": True, "_bytes": True, "rps": False}
+
+
+def _percentiles(samples_ms) -> dict:
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "n": int(len(samples)),
+        "mean_ms": round(float(samples.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+    }
+
+
+def _builds(n: int, rng: np.random.Generator) -> list[dict]:
+    """Realistic /predict/fps request bodies"""
+    return [
+        {
+            "cpu_benchmark": float(rng.uniform(5000, 60000)),
+            "gpu_benchmark": float(rng.uniform(5000, 40000)),
+            "ram_gb": int(rng.choice([8, 16, 32, 64])),
+            "ram_speed": int(rng.choice([2400, 3200, 3600, 4800, 6000])),
+            "storage_type": str(rng.choice(["hdd", "ssd", "nvme"])),
+            "target_resolution": str(rng.choice(["1080p", "1440p", "4k"])),
+            "cpu_tdp": float(rng.choice([65, 105, 125, 170])),
+            "gpu_tdp": float(rng.uniform(75, 450)),
+            "psu_wattage": float(rng.choice([450, 550, 650, 750, 850, 1000])),
+            "psu_efficiency": str(rng.choice(["80+ Bronze", "80+ Gold", "80+ Platinum"])),
+            "mobo_chipset": str(rng.choice(["A620", "B650", "X670", "H610", "Z790"])),
+            "cpu_clock": float(rng.uniform(3.0, 5.8)),
+        }
+        for _ in range(n)
+    ]
+
+
+def _parts(n: int, rng: np.random.Generator) -> list[dict]:
+    """Realistic /analyze/value-tier request bodies"""
+    categories = ["cpu", "gpu"]
+    return [
+        {
+            "name": f"Benchmark Part {i}",
+            "price": float(rng.uniform(50, 1500)),
+            "benchmark_score": float(rng.uniform(5000, 60000)),
+            "category": categories[i % len(categories)],
+        }
+        for i in range(n)
+    ]
+
+
+def _cold_start_probe():
+    """Runs in a child process: import the app, load each model, report timings and RSS as JSON"""
+    start = time.perf_counter()
+    import main
+    from serving.memory import memory_report
+
+    import_seconds = time.perf_counter() - start
+    models = {}
+    rss = memory_report(main.config.MODEL_DIR).get("rss_bytes", 0)
+    for name, model in main.lazy_models.items():
+        begin = time.perf_counter()
+        model.ensure_loaded()
+        elapsed = time.perf_counter() - begin
+        report = memory_report(main.config.MODEL_DIR)
+        models[name] = {
+            "load_seconds": round(elapsed, 4),
+            "rss_delta_bytes": report.get("rss_bytes", 0) - rss,
+            "version": model.model_version,
+        }
+        rss = report.get("rss_bytes", 0)
+
+    report = memory_report(main.config.MODEL_DIR, main.model_registry.root)
+    print(json.dumps({
+        "import_seconds": round(import_seconds, 4),
+        "ready_seconds": round(time.perf_counter() - start, 4),
+        "rss_bytes": report.get("rss_bytes", 0),
+        "artifact_rss_bytes": {name: a["rss_bytes"] for name, a in report.get("artifacts", {}).items()},
+        "models": models,
+    }))
+    main.scheduler.shutdown()
+
+
+def measure_cold_start(repeats: int) -> dict:
+    """Best of several fresh-process starts (least disturbed by other load on the machine)"""
+    runs = []
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--probe-cold-start"],
+            check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        run["process_seconds"] = round(time.perf_counter() - begin, 4)
+        runs.append(run)
+    return min(runs, key=lambda run: run["ready_seconds"])
+
+
+def _time_calls(fn, inputs: list, iterations: int, warmup: int) -> dict:
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        args = inputs[i % len(inputs)]
+        begin = time.perf_counter_ns()
+        fn(args)
+        samples[i] = time.perf_counter_ns() - begin
+    return _percentiles(samples / 1e6)
+
+
+def measure_model_latency(iterations: int, warmup: int) -> dict:
+    import main
+
+    rng = np.random.default_rng(SEED)
+    builds, parts = _builds(256, rng), _parts(256, rng)
+    for model in main.lazy_models.values():
+        model.ensure_loaded()
+
+    calculator, clusterer, integrity = main.bottleneck_calculator, main.value_clusterer, main.integrity_analyzer
+    return {
+        "bottleneck.predict": _time_calls(
+            lambda b: calculator.predict(
+                b["cpu_benchmark"], b["gpu_benchmark"], b["ram_gb"], b["ram_speed"], b["storage_type"], b["target_resolution"]
+            ),
+            builds, iterations, warmup
+        ),
+        "value_tier.analyze": _time_calls(
+            lambda p: clusterer.analyze(p["name"], p["price"], p["benchmark_score"], p["category"]),
+            parts, iterations, warmup
+        ),
+        "integrity.analyze": _time_calls(
+            lambda b: integrity.analyze(
+                b["cpu_tdp"], b["gpu_tdp"], b["psu_wattage"], b["psu_efficiency"], b["mobo_chipset"], b["cpu_clock"]
+            ),
+            builds, iterations, warmup
+        ),
+    }
+
+
+def _fewest_threads(results: dict, thread_counts: list[int], workload: str, tolerance: float = 0.10) -> int:
+    """Fewest threads whose median is within tolerance of the fastest, so noise does not pick extra threads"""
+    p50 = {t: results[f"threads_{t}"][workload]["p50_ms"] for t in thread_counts}
+    fastest = min(p50.values())
+    return min(t for t in thread_counts if p50[t] <= fastest * (1 + tolerance))
+
+
+def measure_threading(thread_counts: list[int], iterations: int, warmup: int) -> dict:
+    """
+    Forest latency for single rows and batches at each thread count, for the
+    sklearn engine (whose predict fans out over n_jobs), the compiled one on
+    every call, and the compiled one routing large calls to sklearn.
+    """
+    from threadpoolctl import threadpool_limits
+
+    import config
+    from models.bottleneck import BottleneckCalculator
+
+    rng = np.random.default_rng(SEED)
+    builds = _builds(THREADING_LARGE_BATCH, rng)
+    columns = {
+        "cpu_scores": [b["cpu_benchmark"] for b in builds],
+        "gpu_scores": [b["gpu_benchmark"] for b in builds],
+        "ram_gb": [b["ram_gb"] for b in builds],
+        "ram_speed": [b["ram_speed"] for b in builds],
+        "storage_types": [b["storage_type"] for b in builds],
+        "resolutions": [b["target_resolution"] for b in builds],
+    }
+    batch_iterations = max(1, iterations // 20)
+
+    workloads = ("single", f"batch_{THREADING_BATCH}", f"batch_{THREADING_LARGE_BATCH}")
+    variants = {
+        "sklearn": ("sklearn", 0),
+        "compiled": ("compiled", 0),
+        "compiled_routed": ("compiled", config.COMPILED_MAX_ROWS),
+    }
+
+    results = {}
+    for name, (engine, max_rows) in variants.items():
+        calculator = BottleneckCalculator(engine=engine, model_dir=config.MODEL_DIR, compiled_max_rows=max_rows)
+        calculator.ensure_loaded()
+        features = calculator.encode_features(**columns)
+        rows = [features[i:i + 1] for i in range(THREADING_BATCH)]
+        engine_results = {}
+        for threads in thread_counts:
+            # The routed variant loads its sklearn model on the first large call
+            calculator.n_jobs = threads
+            if calculator.model is not None:
+                calculator.model.n_jobs = threads
+            with threadpool_limits(limits=threads):
+                engine_results[f"threads_{threads}"] = {
+                    "single": _time_calls(calculator.predict_fps, rows, iterations, warmup),
+                    f"batch_{THREADING_BATCH}": _time_calls(
+                        calculator.predict_fps, [features[:THREADING_BATCH]], batch_iterations, max(1, warmup // 20)
+                    ),
+                    f"batch_{THREADING_LARGE_BATCH}": _time_calls(
+                        calculator.predict_fps, [features], batch_iterations, max(1, warmup // 20)
+                    ),
+                }
+        engine_results["best_threads"] = {
+            workload: _fewest_threads(engine_results, thread_counts, workload) for workload in workloads
+        }
+        results[name] = engine_results
+    return results
+
+
+def measure_multi_output(games: tuple[str, ...], iterations: int, warmup: int) -> dict:
+    """Artifact size and latency of the single-output forest and one with per-game outputs"""
+    from models import bottleneck
+    from models.loading import dump_artifact
+
+    rng = np.random.default_rng(SEED)
+    builds = _builds(THREADING_BATCH, rng)
+    columns = [
+        [b["cpu_benchmark"] for b in builds],
+        [b["gpu_benchmark"] for b in builds],
+        [b["ram_gb"] for b in builds],
+        [b["ram_speed"] for b in builds],
+        [b["storage_type"] for b in builds],
+        [b["target_resolution"] for b in builds],
+    ]
+    rows = list(zip(*columns))
+    batch_iterations = max(1, iterations // 20)
+
+    results = {}
+    for name, model_games in (("single_output", ()), ("multi_output", games)):
+        with tempfile.TemporaryDirectory() as model_dir:
+            model = bottleneck.train_synthetic_model(model_games)
+            dump_artifact(model, os.path.join(model_dir, bottleneck.MODEL_FILE))
+            summary = bottleneck.export_artifacts(model, model_dir)
+            calculator = bottleneck.BottleneckCalculator(engine="compiled", model_dir=model_dir)
+            calculator.ensure_loaded()
+            results[name] = {
+                "outputs": 1 + len(model_games),
+                "n_nodes": summary["n_nodes"],
+                "model_bytes": summary["model_bytes"],
+                "flat_forest_bytes": summary["flat_forest_bytes"],
+                "predict": _time_calls(lambda b: calculator.predict(*b), rows, iterations, warmup),
+                f"batch_{THREADING_BATCH}": _time_calls(
+                    lambda c: calculator.predict_batch(*c), [columns], batch_iterations, max(1, warmup // 20)
+                ),
+            }
+    single, multi = results["single_output"], results["multi_output"]
+    results["multi_vs_single"] = {
+        "games": list(games),
+        "flat_forest_ratio": round(multi["flat_forest_bytes"] / single["flat_forest_bytes"], 3),
+        "predict_p50_ratio": round(multi["predict"]["p50_ms"] / single["predict"]["p50_ms"], 3),
+        f"batch_{THREADING_BATCH}_p50_ratio": round(
+            multi[f"batch_{THREADING_BATCH}"]["p50_ms"] / single[f"batch_{THREADING_BATCH}"]["p50_ms"], 3
+        ),
+    }
+    return results
+
+
+def measure_catalog_delta(fraction: float) -> dict:
+    """Full catalog rebuild from the source files vs applying a price delta to the loaded catalog"""
+    import config
+    from catalog.delta import TABLES, parse_delta
+    from catalog.store import PartsCatalog
+    from models.value_tier import ValueTierClusterer
+
+    tier_model = ValueTierClusterer(model_dir=config.MODEL_DIR)
+    tier_model.ensure_loaded()
+    rng = np.random.default_rng(SEED)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        catalog = PartsCatalog(config.CATALOG_DATA_DIR, os.path.join(snapshot_dir, "catalog.npz"), tier_model)
+        start = time.perf_counter()
+        catalog.ensure_loaded()
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        delta = {}
+        for table_name, spec in TABLES.items():
+            table = catalog.table(spec.name)
+            if table is None or not len(table):
+                continue
+            rows = rng.choice(len(table), max(1, round(fraction * len(table))), replace=False)
+            delta[table_name] = [
+                {"id": str(table.ids[row]), "price": round(float(table.price[row]) * rng.uniform(0.8, 1.2), 2)}
+                for row in rows
+            ]
+        delta = parse_delta(delta)
+
+        samples = []
+        for _ in range(DELTA_REPEATS):
+            start = time.perf_counter()
+            updated = catalog.with_delta(delta)
+            samples.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        updated.publish()
+        publish_ms = (time.perf_counter() - start) * 1000
+
+    apply_ms = float(np.median(samples))
+    return {
+        "parts": sum(len(table) for table in catalog.snapshot.tables.values()),
+        "delta_rows": sum(len(rows) for rows in delta.values()),
+        "full_rebuild_ms": round(rebuild_ms, 3),
+        "delta_apply_ms": round(apply_ms, 3),
+        "delta_publish_ms": round(publish_ms, 3),
+        "delta_vs_rebuild": round(apply_ms / rebuild_ms, 4),
+    }
+
+
+def _scenarios(rng: np.random.Generator, n_unique: int) -> dict[str, list[tuple[str, str, bytes]]]:
+    """
+    Name -> pool of (method, path with query, body) requests cycled through by the clients.
+    Single-item pools hold n_unique distinct requests, so runs do not replay cached answers.
+    """
+    builds, parts = _builds(n_unique, rng), _parts(n_unique, rng)
+    return {
+        "POST /predict/fps": [("POST", "/predict/fps", json.dumps(b).encode()) for b in builds],
+        "POST /predict/fps/batch": [
+            ("POST", "/predict/fps/batch", json.dumps({"builds": builds[i:i + 64]}).encode())
+            for i in range(0, min(len(builds), 1024), 64)
+        ],
+        "POST /analyze/value-tier": [("POST", "/analyze/value-tier", json.dumps(p).encode()) for p in parts],
+        "GET /parts/similar": [
+            ("GET", f"/parts/similar?category={p['category']}&price={p['price']:.2f}&benchmark={p['benchmark_score']:.0f}", b"")
+            for p in parts
+        ],
+    }
+
+
+class ASGIClient:
+    """Calls the app object directly, so no server or socket is involved"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, target: str, body: bytes) -> int:
+        path, _, query = target.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"benchmark"), (b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+        }
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+        done = asyncio.Event()
+        status = 0
+
+        async def receive():
+            if pending:
+                return pending.pop()
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                done.set()
+
+        await self.app(scope, receive, send)
+        return status
+
+    async def close(self):
+        pass
+
+
+class HTTPClient:
+    """Minimal keep-alive HTTP/1.1 client over one connection (responses need a Content-Length)"""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.reader = self.writer = None
+
+    async def request(self, method: str, target: str, body: bytes) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (
+            f"{method} {target} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode() + body)
+        header = await self.reader.readuntil(b"\r\n\r\n")
+        lines = header.decode("latin-1").split("\r\n")
+        length = next(int(l.split(":", 1)[1]) for l in lines if l.lower().startswith("content-length:"))
+        await self.reader.readexactly(length)
+        return int(lines[0].split()[1])
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+async def _drive(make_client, pool: list, concurrency: int, n_requests: int, offset: int = 0) -> dict:
+    """
+    n_requests spread over concurrency clients, each sending its next request once
+    the last one returns. Requests are taken from the pool starting at offset.
+    """
+    clients = [make_client() for _ in range(concurrency)]
+    latencies, errors = [], 0
+    next_request = 0
+
+    async def worker(client):
+        nonlocal next_request, errors
+        while next_request < n_requests:
+            method, target, body = pool[(offset + next_request) % len(pool)]
+            next_request += 1
+            begin = time.perf_counter_ns()
+            status = await client.request(method, target, body)
+            latencies.append((time.perf_counter_ns() - begin) / 1e6)
+            errors += status >= 400
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    elapsed = time.perf_counter() - begin
+    for client in clients:
+        await client.close()
+    return {"rps": round(n_requests / elapsed, 1), "errors": errors, **_percentiles(latencies)}
+
+
+def measure_throughput(url: str | None, n_requests: int, levels=CONCURRENCY_LEVELS) -> dict:
+    rng = np.random.default_rng(SEED)
+    warmup = 16
+    scenarios = _scenarios(rng, warmup + n_requests * len(levels))
+
+    if url is None:
+        import main
+
+        for model in main.lazy_models.values():
+            model.ensure_loaded()
+        make_client = lambda: ASGIClient(main.app)
+    else:
+        make_client = lambda: HTTPClient(url)
+
+    async def run_all() -> dict:
+        results = {}
+        for name, pool in scenarios.items():
+            # One untimed pass so first-call costs (imports, lazy loads) are excluded
+            await _drive(make_client, pool, 1, warmup)
+            results[name] = {
+                str(c): await _drive(make_client, pool, c, n_requests, warmup + k * n_requests)
+                for k, c in enumerate(levels)
+            }
+        return results
+
+    return asyncio.run(run_all())
+
+
+def environment() -> dict:
+    import fastapi
+    import sklearn
+
+    import config
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scikit_learn": sklearn.__version__,
+        "fastapi": fastapi.__version__,
+        "inference_engine": config.INFERENCE_ENGINE,
+        "inference_workers": config.INFERENCE_WORKERS,
+        "inference_threads": config.INFERENCE_THREADS,
+        "cpu_affinity": config.CPU_AFFINITY,
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """Numeric leaves of a result document keyed by their dotted path"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def _lower_is_better(metric: str) -> bool | None:
+    for suffix, lower in METRIC_DIRECTIONS.items():
+        if metric.endswith(suffix):
+            return lower
+    return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> dict:
+    """
+    Relative change of every comparable metric. A metric regresses when it got
+    worse (slower, larger, fewer requests per second) by more than threshold.
+    """
+    now, before = flatten(current), flatten(baseline)
+    changes, regressions = {}, []
+    for metric in sorted(now.keys() & before.keys()):
+        lower = _lower_is_better(metric.rsplit(".", 1)[-1])
+        if lower is None or metric.startswith("environment.") or before[metric] == 0:
+            continue
+        change = (now[metric] - before[metric]) / before[metric]
+        changes[metric] = {"baseline": before[metric], "current": now[metric], "change": round(change, 4)}
+        if (change if lower else -change) > threshold:
+            regressions.append(metric)
+    return {"threshold": threshold, "regressions": regressions, "changes": changes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SiliconSage ML Engine")
+    parser.add_argument("--url", help="Benchmark a running server instead of the app in-process")
+    parser.add_argument("--engine", choices=("sklearn", "compiled", "lattice"), help="Inference engine (in-process only)")
+    parser.add_argument("--iterations", type=int, default=2000, help="Timed calls per model")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(CONCURRENCY_LEVELS))
+    parser.add_argument("--cold-starts", type=int, default=3, help="Fresh processes started; the best is kept")
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}),
+        help="Inference thread counts the threading section compares"
+    )
+    parser.add_argument(
+        "--games", default="all", help="Game profiles (comma-separated, or all) of the multi_output section's model"
+    )
+    parser.add_argument(
+        "--delta-fraction", type=float, default=0.01, help="Share of each catalog table's rows the catalog_delta section reprices"
+    )
+    parser.add_argument(
+        "--skip", nargs="+", choices=("cold_start", "latency", "threading", "multi_output", "catalog_delta", "throughput"),
+        default=[]
+    )
+    parser.add_argument("--output", help="Write the results JSON here (default: stdout)")
+    parser.add_argument("--current", help="Compare this stored result instead of running the benchmark")
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against this stored result")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown before flagging")
+    parser.add_argument("--probe-cold-start", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine:
+        os.environ["SILICONSAGE_INFERENCE_ENGINE"] = args.engine
+    # Models are loaded explicitly below, never by a background thread racing the measurements
+    os.environ.setdefault("SILICONSAGE_MODEL_LOADING", "lazy")
+    if args.probe_cold_start:
+        _cold_start_probe()
+        return
+
+    if args.current:
+        with open(args.current) as f:
+            results = json.load(f)
+    else:
+        results = {"environment": environment()}
+        if args.url is None and "cold_start" not in args.skip:
+            results["cold_start"] = measure_cold_start(args.cold_starts)
+        if args.url is None and "latency" not in args.skip:
+            results["latency"] = measure_model_latency(args.iterations, args.warmup)
+        if args.url is None and "threading" not in args.skip:
+            results["threading"] = measure_threading(args.threads, args.iterations, args.warmup)
+        if args.url is None and "multi_output" not in args.skip:
+            from models.bottleneck import resolve_games
+
+            results["multi_output"] = measure_multi_output(resolve_games(args.games), args.iterations, args.warmup)
+        if args.url is None and "catalog_delta" not in args.skip:
+            results["catalog_delta"] = measure_catalog_delta(args.delta_fraction)
+        if "throughput" not in args.skip:
+            results["throughput"] = measure_throughput(args.url, args.requests, args.concurrency)
+        if args.url is not None:
+            results["environment"]["target"] = args.url
+
+        if args.url is None and "main" in sys.modules:
+            sys.modules["main"].scheduler.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.compare:
+        if not args.output:
+            print(json.dumps(results, indent=2))
+        return
+
+    with open(args.compare) as f:
+        report = compare(results, json.load(f), args.threshold)
+    for metric in report["regressions"]:
+        change = report["changes"][metric]
+        print(f"REGRESSION {metric}: {change['baseline']:g} -> {change['current']:g} ({change['change']:+.1%})")
+    print(f"{len(report['changes'])} metrics compared, {len(report['regressions'])} regressions "
+          f"beyond {args.threshold:.0%}")
+    if report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+SiliconSage Artifact Builder
+Trains and exports the model artifacts the ML engine loads at startup.
+
+The server never trains on boot; run this once per deploy (or bake it into the image):
+
+    python build_artifacts.py              # build whatever is missing
+    python build_artifacts.py --retrain    # rebuild everything
+    python build_artifacts.py --lattice    # also build the FPS lattice (lattice engine)
+    python build_artifacts.py --games all  # also predict per-game FPS (multi-output forest)
+
+Every build is also published to the model registry as a version named after the
+model's content hash. The first published version of a model becomes active;
+later ones are deployed with --activate, or without a restart through
+POST /admin/models/{name}/deploy.
+"""
+
+import argparse
+import os
+import time
+
+import config
+from catalog.store import PartsCatalog
+from models import bottleneck, value_tier
+from models.loading import dump_artifact, load_artifact
+from models.registry import ModelRegistry, data_hash
+
+
+def build_bottleneck(model_dir: str, retrain: bool, lattice_size: int, games: tuple[str, ...]) -> dict:
+    model_path = os.path.join(model_dir, bottleneck.MODEL_FILE)
+    model = None if retrain or not os.path.exists(model_path) else load_artifact(model_path)
+    # A forest trained for other games has the wrong outputs
+    if model is None or tuple(getattr(model, "games_", ())) != games:
+        start = time.perf_counter()
+        model = bottleneck.train_synthetic_model(games)
+        dump_artifact(model, model_path)
+        print(f"Trained bottleneck forest ({1 + len(games)} outputs) in {time.perf_counter() - start:.2f}s")
+    return bottleneck.export_artifacts(model, model_dir, lattice_size)
+
+
+def build_value_tier(model_dir: str, retrain: bool) -> dict:
+    model_path = os.path.join(model_dir, value_tier.MODEL_FILE)
+    if retrain or not os.path.exists(model_path):
+        start = time.perf_counter()
+        data = value_tier.train_synthetic_model()
+        dump_artifact(data, model_path)
+        print(f"Trained value tier clusterer in {time.perf_counter() - start:.2f}s")
+    else:
+        data = load_artifact(model_path)
+    return {
+        "model_bytes": os.path.getsize(model_path),
+        **value_tier.export_arrays(data, model_dir),
+    }
+
+
+def publish_bottleneck(registry: ModelRegistry, model_dir: str, summary: dict, training: dict) -> dict:
+    """Publish the artifacts in model_dir; training describes the data and parameters they came from"""
+    version = summary["model_version"]
+    files = [bottleneck.MODEL_FILE, bottleneck.FLAT_FOREST_FILE]
+    # A lattice left over from an earlier model is not part of this version
+    lattice_path = os.path.join(model_dir, bottleneck.LATTICE_FILE)
+    lattice_error = None
+    if os.path.exists(lattice_path):
+        lattice = load_artifact(lattice_path)
+        if lattice["model_version"] == version:
+            files.append(bottleneck.LATTICE_FILE)
+            lattice_error = lattice["error"]
+
+    calculator = bottleneck.BottleneckCalculator(engine="compiled", model_dir=model_dir)
+    calculator.ensure_loaded()
+    metadata = registry.publish("bottleneck", version, model_dir, files, {
+        "feature_schema": bottleneck.FEATURE_SCHEMA,
+        "games": list(calculator.games),
+        **training,
+        "benchmark": {
+            "n_nodes": summary["n_nodes"],
+            "flat_forest_bytes": summary["flat_forest_bytes"],
+            "max_depth": summary["max_depth"],
+            "load_seconds": round(calculator.load_seconds, 4),
+            "batch_256_seconds": round(calculator.warm_up(), 4),
+            "lattice_error": lattice_error,
+        },
+    })
+    # The same model built again with --lattice (or another --lattice-size) only changes the lattice
+    if bottleneck.LATTICE_FILE in files:
+        metadata = registry.add_files(
+            "bottleneck", version, model_dir, [bottleneck.LATTICE_FILE], {"lattice_error": lattice_error}
+        )
+    return metadata
+
+
+def publish_value_tier(registry: ModelRegistry, model_dir: str, training: dict) -> dict:
+    clusterer = value_tier.ValueTierClusterer(model_dir=model_dir)
+    clusterer.ensure_loaded()
+    return registry.publish("value_tier", clusterer.model_version, model_dir, [value_tier.MODEL_FILE, value_tier.ARRAYS_FILE], {
+        "feature_schema": value_tier.FEATURE_SCHEMA,
+        **training,
+        "benchmark": {
+            "load_seconds": round(clusterer.load_seconds, 4),
+            "batch_256_seconds": round(clusterer.warm_up(), 4),
+        },
+    })
+
+
+def publish(registry: ModelRegistry, published: dict[str, dict], activate: bool):
+    """Activate published versions when asked to, or when the model has no active version yet"""
+    for name, metadata in published.items():
+        if activate or registry.active(name)["version"] is None:
+            registry.activate(name, metadata["version"])
+        print(f"registry {name}: {metadata['version']} (active: {registry.active(name)['version']})")
+
+
+def build_catalog(model_dir: str, data_dir: str) -> dict:
+    clusterer = value_tier.ValueTierClusterer(model_dir=model_dir)
+    catalog = PartsCatalog(data_dir, os.path.join(model_dir, os.path.basename(config.CATALOG_SNAPSHOT)), clusterer)
+    catalog.ensure_loaded()
+    return {
+        "parts": {name: len(table) for name, table in catalog.snapshot.tables.items()},
+        "load_seconds": round(catalog.load_seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build SiliconSage ML Engine artifacts")
+    parser.add_argument("--model-dir", default=config.MODEL_DIR, help="Where artifacts are written")
+    parser.add_argument("--data-dir", default=config.CATALOG_DATA_DIR, help="pc-part-dataset JSON directory")
+    parser.add_argument("--retrain", action="store_true", help="Retrain even if artifacts exist")
+    parser.add_argument(
+        "--lattice", action="store_true", default=config.INFERENCE_ENGINE == "lattice",
+        help="Also tabulate the FPS lattice for the lattice inference engine"
+    )
+    parser.add_argument("--lattice-size", type=int, default=config.LATTICE_GRID_SIZE, help="Lattice points per axis")
+    parser.add_argument(
+        "--games", default=config.FPS_GAMES,
+        help=f"Game profiles to predict FPS for besides the generic FPS: comma-separated {list(bottleneck.GAME_PROFILES)} or all"
+    )
+    parser.add_argument("--registry-dir", default=config.MODEL_REGISTRY_DIR, help="Model registry to publish into")
+    parser.add_argument(
+        "--activate", action="store_true",
+        help="Make the built versions active (servers pick them up on restart or through the registry poll)"
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.model_dir, exist_ok=True)
+    lattice_size = args.lattice_size if args.lattice else 0
+    games = bottleneck.resolve_games(args.games)
+    bottleneck_summary = build_bottleneck(args.model_dir, args.retrain, lattice_size, games)
+    print("bottleneck:", bottleneck_summary)
+    print("value_tier:", build_value_tier(args.model_dir, args.retrain))
+    print("catalog:", build_catalog(args.model_dir, args.data_dir))
+
+    registry = ModelRegistry(args.registry_dir)
+    publish(registry, {
+        "bottleneck": publish_bottleneck(registry, args.model_dir, bottleneck_summary, {
+            "training_data_hash": data_hash(*bottleneck.synthetic_training_data(games))
+        }),
+        "value_tier": publish_value_tier(registry, args.model_dir, {
+            "training_data_hash": data_hash(value_tier.synthetic_training_data())
+        }),
+    }, args.activate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# SiliconSage Parts Catalog
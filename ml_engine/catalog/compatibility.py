@@ -0,0 +1,314 @@
+"""
+Compatibility Index
+Socket, DDR generation and form-factor compatibility between catalog parts,
+precomputed as packed bitsets over price-sorted rows
+"""
+
+import copy
+import re
+
+import numpy as np
+
+# CPU microarchitecture -> socket; the dataset has no CPU socket column
+ARCH_SOCKETS = {
+    "Arrow Lake": "LGA1851",
+    "Raptor Lake Refresh": "LGA1700",
+    "Raptor Lake": "LGA1700",
+    "Alder Lake": "LGA1700",
+    "Rocket Lake": "LGA1200",
+    "Comet Lake": "LGA1200",
+    "Coffee Lake Refresh": "LGA1151",
+    "Coffee Lake": "LGA1151",
+    "Kaby Lake": "LGA1151",
+    "Skylake": "LGA1151",
+    "Cascade Lake": "LGA2066",
+    "Broadwell": "LGA1150",
+    "Haswell Refresh": "LGA1150",
+    "Haswell": "LGA1150",
+    "Ivy Bridge": "LGA1155",
+    "Sandy Bridge": "LGA1155",
+    "Westmere": "LGA1156",
+    "Nehalem": "LGA1156",
+    "Yorkfield": "LGA775",
+    "Wolfdale": "LGA775",
+    "Core": "LGA775",
+    "Zen 5": "AM5",
+    "Zen 4": "AM5",
+    "Zen 3": "AM4",
+    "Zen 2": "AM4",
+    "Zen+": "AM4",
+    "Zen": "AM4",
+    "Excavator": "FM2+",
+    "Steamroller": "FM2+",
+    "Piledriver": "AM3+",
+    "Bulldozer": "AM3+",
+    "K10": "AM3",
+    "Lynx": "FM1",
+    "Puma+": "AM1",
+    "Jaguar": "AM1",
+}
+
+# (name pattern, microarchitectures or None for any, socket): HEDT and APU parts whose
+# socket differs from the rest of their microarchitecture; first match wins
+NAME_SOCKETS = [
+    (r"threadripper", ("Zen", "Zen+"), "sTR4"),
+    (r"threadripper", ("Zen 2",), "sTRX4"),
+    (r"threadripper", ("Zen 3",), "sWRX8"),
+    (r"threadripper", ("Zen 4", "Zen 5"), "sTR5"),
+    (r"i[79]-(58|59|68|69)\d\d", None, "LGA2011-3"),
+    (r"i[579]-(7[89]|9[89]|109)\d\d|i[57]-7[46]40x", None, "LGA2066"),
+    (r"i7-(38|39|48|49)\d\d", None, "LGA2011"),
+    (r"i7-9[0-9]0", ("Nehalem", "Westmere"), "LGA1366"),
+    (r"\ba\d+-(5|6)\d\d\d|athlon x4 (7|8)\d\d", ("Piledriver",), "FM2"),
+    (r"\ba\d+-3\d\d\d|athlon ii x4 6\d\d", ("K10",), "FM1"),
+    (r"\ba\d+-9\d\d\d|athlon x4 9\d\d", ("Excavator",), "AM4"),
+]
+
+# Boards of the later socket also take CPUs of the earlier one
+SOCKET_FITS = {"AM3": ("AM3", "AM3+"), "AM2": ("AM2", "AM2+")}
+
+# DDR generations each socket's platform supports
+SOCKET_DDR = {
+    "LGA1851": (5,), "LGA1700": (4, 5), "LGA1200": (4,), "LGA1151": (4,), "LGA2066": (4,),
+    "LGA2011-3": (4,), "LGA2011": (3,), "LGA1150": (3,), "LGA1155": (3,), "LGA1156": (3,),
+    "LGA1366": (3,), "LGA775": (2, 3), "AM5": (5,), "AM4": (4,), "sTR5": (5,), "sWRX8": (4,),
+    "sTRX4": (4,), "sTR4": (4,), "FM2+": (3,), "FM2": (3,), "FM1": (3,), "AM3+": (3,),
+    "AM3": (2, 3), "AM2+": (2,), "AM2": (2,), "AM1": (3,), "G34": (3,),
+}
+
+# Motherboard form factors each case type accepts, by the case type's first words
+_SMALL_FORMS = ("Mini ITX", "Thin Mini ITX")
+_MATX_FORMS = ("Micro ATX", "Flex ATX", "Mini DTX") + _SMALL_FORMS
+_ATX_FORMS = ("ATX",) + _MATX_FORMS
+CASE_FORMS = [
+    ("ATX Full Tower", _ATX_FORMS + ("EATX", "XL ATX", "SSI EEB", "SSI CEB", "HPTX")),
+    ("ATX", _ATX_FORMS),
+    ("MicroATX", _MATX_FORMS),
+    ("HTPC", ("Micro ATX", "Flex ATX") + _SMALL_FORMS),
+    ("Mini ITX", _SMALL_FORMS),
+]
+
+# Columns each table's compatibility keys are derived from; other changes only reorder rows
+KEY_COLUMNS = {
+    "cpu": ("name", "microarchitecture"),
+    "motherboard": ("name", "socket", "form_factor"),
+    "ram": ("speed_ddr",),
+    "case": ("type",),
+}
+
+_DDR_IN_NAME = re.compile(r"\bddr([2-5])\b|\bd([45])\b", re.IGNORECASE)
+
+
+def cpu_socket(name: str, microarchitecture: str) -> str:
+    """Socket of a CPU, or "" when it cannot be told"""
+    lowered = name.lower()
+    for pattern, archs, socket in NAME_SOCKETS:
+        if (archs is None or microarchitecture in archs) and re.search(pattern, lowered):
+            return socket
+    return ARCH_SOCKETS.get(microarchitecture, "")
+
+
+def board_sockets(socket: str) -> list[str]:
+    """Sockets named by a motherboard's socket field ("AM3+/AM3", "2 x LGA2011-3 Narrow", ...)"""
+    if not socket or socket.startswith("Integrated"):
+        return []
+    socket = re.sub(r"^\d+ x ", "", socket).replace(" Narrow", "")
+    return socket.split("/")
+
+
+def board_ddr(sockets: list[str], name: str) -> set[int]:
+    """DDR generations a motherboard takes: its platform's, narrowed by a DDRn/Dn hint in the name"""
+    generations = {g for s in sockets for g in SOCKET_DDR.get(s, ())}
+    hinted = {int(a or b) for a, b in _DDR_IN_NAME.findall(name)}
+    return generations & hinted or generations
+
+
+def case_forms(case_type: str) -> tuple[str, ...]:
+    for prefix, forms in CASE_FORMS:
+        if case_type.startswith(prefix):
+            return forms
+    return ()
+
+
+class BitsetColumn:
+    """Packed row bitsets of one table, keyed by a compatibility attribute, over price-sorted rows"""
+
+    def __init__(self, table, members: dict, n_keys: int):
+        self.order = np.argsort(table.price, kind="stable")
+        self.sorted_price = table.price[self.order]
+        self.n_rows = len(table)
+        position = np.empty(self.n_rows, dtype=np.intp)
+        position[self.order] = np.arange(self.n_rows)
+
+        bits = np.zeros((n_keys, self.n_rows), dtype=bool)
+        for row, keys in members.items():
+            bits[list(keys), position[row]] = True
+        self.bitsets = np.packbits(bits, axis=1)
+
+    def repriced(self, table, order: np.ndarray | None = None) -> "BitsetColumn":
+        """The same keys over table's rows sorted by their new prices (order, when already known)"""
+        bits = np.unpackbits(self.bitsets, axis=1, count=self.n_rows)
+        column = copy.copy(self)
+        column.order = np.argsort(table.price, kind="stable") if order is None else order
+        column.sorted_price = table.price[column.order]
+        position = np.empty(self.n_rows, dtype=np.intp)
+        position[self.order] = np.arange(self.n_rows)
+        column.bitsets = np.packbits(bits[:, position[column.order]], axis=1)
+        return column
+
+    def any_of(self, keys) -> np.ndarray:
+        """Bitset of rows having at least one of the keys"""
+        keys = list(keys)
+        if not keys:
+            return np.zeros(self.bitsets.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitsets[keys], axis=0)
+
+    def rows(self, bitset: np.ndarray, max_price: float | None = None) -> np.ndarray:
+        """Table rows set in the bitset, cheapest first, optionally only up to max_price"""
+        n = self.n_rows if max_price is None else int(np.searchsorted(self.sorted_price, max_price, side="right"))
+        positions = np.flatnonzero(np.unpackbits(bitset[:(n + 7) // 8], count=n))
+        return self.order[positions]
+
+
+class CompatibilityIndex:
+    """
+    Which CPUs, motherboards, RAM kits and cases work together.
+
+    Parts are reduced to small integer keys (socket, DDR generation, board form
+    factor); every table keeps one packed bitset per key, so a question like
+    "boards for this CPU under $200" is an OR/AND of a few bitsets plus a
+    price-sorted prefix. Parts whose attributes cannot be told match nothing.
+    """
+
+    def __init__(self, tables: dict):
+        cpus, boards = tables.get("cpu"), tables.get("motherboard")
+        ram, cases = tables.get("ram"), tables.get("case")
+
+        self.sockets: list[str] = sorted(set(SOCKET_DDR) | set(ARCH_SOCKETS.values()))
+        self.forms: list[str] = sorted({f for _, forms in CASE_FORMS for f in forms})
+        socket_key = {s: k for k, s in enumerate(self.sockets)}
+        form_key = {f: k for k, f in enumerate(self.forms)}
+
+        # Per-row keys of each table
+        self.cpu_sockets, self.cpu_ddr = [], []
+        if cpus is not None:
+            for name, arch in zip(cpus.names, cpus.columns["microarchitecture"]):
+                socket = cpu_socket(str(name), str(arch))
+                self.cpu_sockets.append({socket_key[s] for s in SOCKET_FITS.get(socket, (socket,)) if s in socket_key})
+                self.cpu_ddr.append(set(SOCKET_DDR.get(socket, ())))
+
+        self.board_sockets, self.board_ddr, self.board_form = [], [], []
+        if boards is not None:
+            for name, socket, form in zip(boards.names, boards.columns["socket"], boards.columns["form_factor"]):
+                sockets = board_sockets(str(socket))
+                self.board_sockets.append({socket_key[s] for s in sockets if s in socket_key})
+                self.board_ddr.append(board_ddr(sockets, str(name)))
+                self.board_form.append({form_key[str(form)]} if str(form) in form_key else set())
+
+        self.ram_ddr = [] if ram is None else [{int(g)} if g > 0 else set() for g in np.nan_to_num(ram.columns["speed_ddr"])]
+        self.case_forms = [] if cases is None else [
+            {form_key[f] for f in case_forms(str(t))} for t in cases.columns["type"]
+        ]
+
+        self.columns: dict[str, dict[str, BitsetColumn]] = {}
+        if boards is not None:
+            self.columns["motherboard"] = {
+                "socket": BitsetColumn(boards, dict(enumerate(self.board_sockets)), len(self.sockets)),
+                "ddr": BitsetColumn(boards, dict(enumerate(self.board_ddr)), 6),
+                "form": BitsetColumn(boards, dict(enumerate(self.board_form)), len(self.forms)),
+            }
+        if cpus is not None:
+            self.columns["cpu"] = {
+                "socket": BitsetColumn(cpus, dict(enumerate(self.cpu_sockets)), len(self.sockets)),
+                "ddr": BitsetColumn(cpus, dict(enumerate(self.cpu_ddr)), 6),
+            }
+        if ram is not None:
+            self.columns["ram"] = {"ddr": BitsetColumn(ram, dict(enumerate(self.ram_ddr)), 6)}
+        if cases is not None:
+            self.columns["case"] = {"form": BitsetColumn(cases, dict(enumerate(self.case_forms)), len(self.forms))}
+
+        # Dense DDR masks for vectorized pair checks inside combinatorial searches
+        self.cpu_ddr_mask = np.array([sum(1 << g for g in gens) for gens in self.cpu_ddr], dtype=np.int64)
+        self.ram_ddr_mask = np.array([sum(1 << g for g in gens) for gens in self.ram_ddr], dtype=np.int64)
+
+    def repriced(self, tables: dict, categories) -> "CompatibilityIndex":
+        """
+        The index of tables whose given categories changed only outside
+        KEY_COLUMNS: the per-row keys are shared and the bitsets re-sorted.
+        """
+        index = copy.copy(self)
+        index.columns = dict(self.columns)
+        for category in categories:
+            if category in self.columns:
+                order = np.argsort(tables[category].price, kind="stable")
+                index.columns[category] = {
+                    key: column.repriced(tables[category], order) for key, column in self.columns[category].items()
+                }
+        return index
+
+    def _constraints(self, category: str, cpu, motherboard, ram, case) -> list[np.ndarray]:
+        """Bitsets over the category's rows implied by each given part"""
+        columns = self.columns[category]
+        constraints = []
+        if category == "motherboard":
+            if cpu is not None:
+                constraints.append(columns["socket"].any_of(self.cpu_sockets[cpu]))
+            if ram is not None:
+                constraints.append(columns["ddr"].any_of(self.ram_ddr[ram]))
+            if case is not None:
+                constraints.append(columns["form"].any_of(self.case_forms[case]))
+        elif category == "cpu":
+            if motherboard is not None:
+                constraints.append(columns["socket"].any_of(self.board_sockets[motherboard]))
+            if ram is not None:
+                constraints.append(columns["ddr"].any_of(self.ram_ddr[ram]))
+        elif category == "ram":
+            if motherboard is not None:
+                constraints.append(columns["ddr"].any_of(self.board_ddr[motherboard]))
+            if cpu is not None:
+                constraints.append(columns["ddr"].any_of(self.cpu_ddr[cpu]))
+        elif category == "case":
+            if motherboard is not None:
+                constraints.append(columns["form"].any_of(self.board_form[motherboard]))
+        return constraints
+
+    def compatible_rows(
+        self,
+        category: str,
+        cpu: int | None = None,
+        motherboard: int | None = None,
+        ram: int | None = None,
+        case: int | None = None,
+        max_price: float | None = None
+    ) -> np.ndarray:
+        """Rows of category compatible with every given part row, cheapest first"""
+        if category not in self.columns:
+            raise KeyError(f"No compatibility data for '{category}'. Expected one of {tuple(self.columns)}")
+        constraints = self._constraints(category, cpu, motherboard, ram, case)
+        column = next(iter(self.columns[category].values()))
+        if not constraints:
+            return column.rows(np.full(column.bitsets.shape[1], 0xFF, dtype=np.uint8), max_price)
+        return column.rows(np.bitwise_and.reduce(constraints, axis=0), max_price)
+
+    def cpu_ram_compatible(self, cpu_rows: np.ndarray, ram_rows: np.ndarray) -> np.ndarray:
+        """Elementwise: does each CPU's platform take the paired RAM kit's DDR generation"""
+        return (self.cpu_ddr_mask[cpu_rows] & self.ram_ddr_mask[ram_rows]) != 0
+
+    def check(
+        self,
+        cpu: int | None = None,
+        motherboard: int | None = None,
+        ram: int | None = None,
+        case: int | None = None
+    ) -> dict[str, bool]:
+        """Pairwise checks of one build's parts; checks missing a part pass"""
+        socket_ok = memory_ok = form_factor_ok = True
+        if cpu is not None and motherboard is not None:
+            socket_ok = bool(self.cpu_sockets[cpu] & self.board_sockets[motherboard])
+        if ram is not None and motherboard is not None:
+            memory_ok = bool(self.ram_ddr[ram] & self.board_ddr[motherboard])
+        elif ram is not None and cpu is not None:
+            memory_ok = bool(self.ram_ddr[ram] & self.cpu_ddr[cpu])
+        if motherboard is not None and case is not None:
+            form_factor_ok = bool(self.board_form[motherboard] & self.case_forms[case])
+        return {"socket_ok": socket_ok, "memory_ok": memory_ok, "form_factor_ok": form_factor_ok}
@@ -0,0 +1,205 @@
+"""
+Catalog Deltas
+Small sets of changed catalog rows, keyed by part id and shaped like the
+supabase/schema.sql tables, applied to a snapshot by recomputing only those rows
+"""
+
+import json
+from typing import NamedTuple
+
+import numpy as np
+
+from .schema import CATEGORIES, CategorySpec
+from .store import CatalogSnapshot, CategoryTable, TierFn
+
+# Delta tables are named as in supabase/schema.sql
+TABLES: dict[str, CategorySpec] = {spec.table: spec for spec in CATEGORIES.values()}
+
+
+class DeltaError(ValueError):
+    pass
+
+
+class TableChange(NamedTuple):
+    """What a delta did to one table; rows is None when rows were inserted or deleted"""
+    rows: np.ndarray | None
+    columns: frozenset[str]
+    updated: int
+    inserted: int
+    deleted: int
+
+
+def _derived_columns(spec: CategorySpec) -> set[str]:
+    empty = {column: np.zeros(0) for column in ("price", *spec.numeric)}
+    empty.update({column: np.zeros(0, dtype=str) for column in ("id", "name", *spec.text)})
+    return set(spec.derived(empty))
+
+
+DERIVED = {spec.table: _derived_columns(spec) for spec in CATEGORIES.values()}
+
+# Columns a delta row may set; generated columns and ones the catalog does not keep are ignored
+EDITABLE = {
+    spec.table: {"name", "price", *spec.numeric, *spec.text} - DERIVED[spec.table]
+    for spec in CATEGORIES.values()
+}
+
+
+def _number(table: str, column: str, value):
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise DeltaError(f"{table}.{column} must be a number or null, got {value!r}")
+    return value
+
+
+def _text(table: str, column: str, value):
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+        raise DeltaError(f"{table}.{column} must be a string or null, got {value!r}")
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def _parse_row(table: str, spec: CategorySpec, row) -> tuple[str, dict]:
+    if not isinstance(row, dict) or row.get("id") in (None, ""):
+        raise DeltaError(f"Every {table} row must be an object with an id")
+    part_id = str(row["id"])
+    price = _number(table, "price", row.get("price"))
+    # Like the source files, a part without a positive price is not in the catalog
+    if row.get("deleted") is True or ("price" in row and (price is None or price <= 0)):
+        return part_id, {"deleted": True}
+
+    fields = {}
+    for column in EDITABLE[table] & row.keys():
+        if column == "name":
+            if not isinstance(row["name"], str) or not row["name"]:
+                raise DeltaError(f"{table}.name must be a non-empty string")
+            fields["name"] = row["name"]
+        elif column == "price" or column in spec.numeric:
+            fields[column] = _number(table, column, row[column])
+        else:
+            fields[column] = _text(table, column, row[column])
+    return part_id, fields
+
+
+def parse_delta(document) -> dict[str, list[dict]]:
+    """
+    Validate a delta: {"cpus": [{"id": ..., "price": 189.99}, ...], "memory": [...]}.
+
+    A row updates the given columns of the part with its id, or inserts the part
+    when the catalog has no such id (then name and price are required). A null or
+    non-positive price, or "deleted": true, removes the part. Several rows for one
+    id merge in order. Returns the delta normalized to one row per id, sorted by id.
+    """
+    if not isinstance(document, dict):
+        raise DeltaError("A catalog delta must be an object keyed by table name")
+
+    delta = {}
+    for table, rows in sorted(document.items()):
+        if table not in TABLES:
+            raise DeltaError(f"Unknown catalog table '{table}'. Expected one of {tuple(TABLES)}")
+        if not isinstance(rows, list):
+            raise DeltaError(f"'{table}' must be a list of rows")
+        merged: dict[str, dict] = {}
+        for row in rows:
+            part_id, fields = _parse_row(table, TABLES[table], row)
+            if fields.get("deleted") or merged.get(part_id, {}).get("deleted"):
+                merged[part_id] = fields
+            else:
+                merged.setdefault(part_id, {}).update(fields)
+        if merged:
+            delta[table] = [{"id": part_id, **merged[part_id]} for part_id in sorted(merged)]
+    return delta
+
+
+def load_delta(path: str) -> dict[str, list[dict]]:
+    with open(path, encoding="utf-8") as f:
+        try:
+            document = json.load(f)
+        except json.JSONDecodeError as e:
+            raise DeltaError(f"{path} is not valid JSON: {e}")
+    return parse_delta(document)
+
+
+def _row_columns(spec: CategorySpec, base: dict[str, np.ndarray], rows: list[dict], tier_fn: TierFn) -> dict[str, np.ndarray]:
+    """Every column of the given rows: base values overlaid with the delta's, then recomputed ones"""
+    columns = {}
+    for column, values in base.items():
+        given = [(i, row[column]) for i, row in enumerate(rows) if column in row]
+        if not given:
+            columns[column] = values
+            continue
+        if values.dtype.kind == "U":
+            new = np.array(["" if value is None else value for _, value in given], dtype=str)
+        else:
+            new = np.array([np.nan if value is None else value for _, value in given], dtype=values.dtype)
+        values = values.astype(np.result_type(values, new))
+        values[[i for i, _ in given]] = new
+        columns[column] = values
+
+    columns.update(spec.derived(columns))
+    columns["benchmark"] = spec.benchmark(columns).astype(np.float64)
+    columns["value"] = columns["benchmark"] / columns["price"]
+    columns["tier"] = tier_fn(columns["price"], columns["benchmark"]).astype(np.int8)
+    return columns
+
+
+def _apply_table(spec: CategorySpec, table: CategoryTable, rows: list[dict], tier_fn: TierFn):
+    found = table.rows_of([row["id"] for row in rows])
+    deleted = np.array([bool(row.get("deleted")) for row in rows], dtype=bool)
+    removed = found[(found >= 0) & deleted]
+    updates = [row for row, at, gone in zip(rows, found, deleted) if at >= 0 and not gone]
+    inserts = [row for row, at, gone in zip(rows, found, deleted) if at < 0 and not gone]
+    updated = found[(found >= 0) & ~deleted]
+
+    base_columns = ("id", "name", "price", *spec.numeric, *spec.text)
+    new_rows = _row_columns(spec, {c: table.columns[c][updated] for c in base_columns}, updates, tier_fn)
+    changed = set()
+    if updates:
+        written = {column for row in updates for column in row} - {"id"}
+        changed = written | DERIVED[spec.table] | {"benchmark", "value", "tier"}
+
+    if not len(removed) and not inserts:
+        if not updates:
+            return table, TableChange(updated, frozenset(), 0, 0, 0)
+        new_table = table.with_updates(updated, {column: new_rows[column] for column in changed})
+        return new_table, TableChange(updated, frozenset(changed), len(updates), 0, 0)
+
+    for row in inserts:
+        if "name" not in row or row.get("price") is None:
+            raise DeltaError(f"New {spec.table} row '{row['id']}' needs a name and a price")
+    defaults = {
+        column: np.array([row["id"] for row in inserts], dtype=str) if column == "id"
+        else np.full(len(inserts), "", dtype=str) if table.columns[column].dtype.kind == "U"
+        else np.full(len(inserts), np.nan)
+        for column in base_columns
+    }
+    inserted = _row_columns(spec, defaults, inserts, tier_fn)
+
+    keep = np.ones(len(table), dtype=bool)
+    keep[removed] = False
+    columns = {}
+    for column, values in table.columns.items():
+        if len(updated):
+            values = values.astype(np.result_type(values, new_rows[column]))
+            values[updated] = new_rows[column]
+        columns[column] = np.concatenate([values[keep], inserted[column]])
+    new_table = CategoryTable(spec.name, columns, table.n_tiers)
+    return new_table, TableChange(None, frozenset(columns), len(updates), len(inserts), len(removed))
+
+
+def apply_delta(snapshot: CatalogSnapshot, delta: dict[str, list[dict]], tier_fn: TierFn) -> tuple[CatalogSnapshot, dict[str, TableChange]]:
+    """
+    A new snapshot with a parsed delta applied, plus what changed per category.
+
+    Derived columns, benchmark, value and tier are recomputed for the delta's
+    rows only, and tables the delta does not touch are shared. The delta is
+    recorded in the new snapshot's metadata under its parent version, so a
+    worker serving the parent can replay it and arrive at the same version.
+    """
+    tables = dict(snapshot.tables)
+    changes = {}
+    for table_name, rows in delta.items():
+        spec = TABLES[table_name]
+        if spec.name not in tables:
+            raise DeltaError(f"The catalog has no {table_name} table")
+        tables[spec.name], changes[spec.name] = _apply_table(spec, tables[spec.name], rows, tier_fn)
+
+    meta = {**snapshot.meta, "delta": {"parent": snapshot.version, "changes": delta}}
+    return CatalogSnapshot(tables, meta), changes
@@ -0,0 +1,151 @@
+"""
+Part Neighbor Index
+KD-tree over each category's scaled price/benchmark/value columns,
+for similar-part, cheaper-alternative and faster-alternative lookups
+"""
+
+import copy
+
+import numpy as np
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .store import CategoryTable
+
+# Candidates fetched by the first tree query; filtered queries widen 4x until satisfied
+INITIAL_CANDIDATES = 16
+
+# Share of rows with_updates() may patch before the index is rebuilt instead
+MAX_PATCHED_FRACTION = 0.1
+
+RowFilter = Callable[[np.ndarray], np.ndarray]
+
+
+class PartIndex:
+    """
+    Nearest parts of one category table.
+
+    Features are standardized per category so a dollar and a benchmark point
+    weigh the same relative to that category's spread.
+    """
+
+    def __init__(self, table: "CategoryTable"):
+        from sklearn.neighbors import KDTree
+
+        self.table = table
+        features = np.column_stack([table.price, table.benchmark, table.value])
+        self.mean = features.mean(axis=0) if len(table) else np.zeros(3)
+        scale = features.std(axis=0) if len(table) else np.ones(3)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.tree = KDTree(self._scale(features)) if len(table) else None
+        # Rows changed since the tree was built: masked out of tree results, searched by brute force
+        self.patched = np.zeros(0, dtype=np.intp)
+        self.patched_points = np.zeros((0, 3))
+        self.stale: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        return (features - self.mean) / self.scale
+
+    def _point(self, price: float, benchmark: float) -> np.ndarray:
+        value = benchmark / price if price > 0 else 0.0
+        return self._scale(np.array([[price, benchmark, value]]))
+
+    def with_updates(self, table: "CategoryTable", rows: np.ndarray) -> "PartIndex":
+        """
+        The index of table, a copy of this one's with the given rows changed.
+
+        The tree and the feature scaling are shared; changed rows are answered
+        by brute force until they pass MAX_PATCHED_FRACTION of the table, and
+        then a fresh index (with fresh scaling) is built.
+        """
+        patched = np.union1d(self.patched, rows).astype(np.intp)
+        if len(table) != len(self.table) or len(patched) > MAX_PATCHED_FRACTION * len(table):
+            return PartIndex(table)
+        index = copy.copy(self)
+        index.table = table
+        index.patched = patched
+        index.patched_points = self._scale(
+            np.column_stack([table.price[patched], table.benchmark[patched], table.value[patched]])
+        )
+        index.stale = np.zeros(len(table), dtype=bool)
+        index.stale[patched] = True
+        return index
+
+    def query(self, price: float, benchmark: float, k: int, row_filter: RowFilter | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Row indices and distances of the k nearest parts passing row_filter.
+
+        The tree is queried for a few more rows than needed and widened until
+        enough of them pass the filter, so selective filters stay cheap when
+        matches are nearby and degrade to a full scan at worst.
+        """
+        n = len(self)
+        if n == 0 or k <= 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+
+        point = self._point(price, benchmark)
+        fetch = min(n, max(INITIAL_CANDIDATES, k))
+        while True:
+            distances, rows = self.tree.query(point, k=fetch)
+            distances, rows = distances[0], rows[0]
+            if self.stale is not None:
+                fresh = ~self.stale[rows]
+                distances, rows = distances[fresh], rows[fresh]
+            if row_filter is not None:
+                keep = row_filter(rows)
+                distances, rows = distances[keep], rows[keep]
+            if len(rows) >= k or fetch == n:
+                break
+            fetch = min(n, fetch * 4)
+
+        if len(self.patched):
+            # Unfetched tree rows are no nearer than the fetched ones, so merging stays exact
+            patched = self.patched
+            patched_distances = np.linalg.norm(self.patched_points - point, axis=1)
+            if row_filter is not None:
+                keep = row_filter(patched)
+                patched, patched_distances = patched[keep], patched_distances[keep]
+            rows = np.concatenate([rows, patched])
+            distances = np.concatenate([distances, patched_distances])
+            nearest = np.argsort(distances, kind="stable")
+            rows, distances = rows[nearest], distances[nearest]
+        return rows[:k], distances[:k]
+
+    def similar(
+        self,
+        price: float,
+        benchmark: float,
+        k: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        exclude_name: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """k nearest parts, optionally within a price band and excluding one part by name"""
+        table = self.table
+        exclude = exclude_name.lower() if exclude_name else None
+
+        def row_filter(rows: np.ndarray) -> np.ndarray:
+            keep = np.ones(len(rows), dtype=bool)
+            if min_price is not None:
+                keep &= table.price[rows] >= min_price
+            if max_price is not None:
+                keep &= table.price[rows] <= max_price
+            if exclude is not None:
+                keep &= np.char.lower(table.names[rows]) != exclude
+            return keep
+
+        unfiltered = min_price is None and max_price is None and exclude is None
+        return self.query(price, benchmark, k, None if unfiltered else row_filter)
+
+    def cheaper(self, price: float, benchmark: float) -> int | None:
+        """Row of the nearest part that costs less, or None"""
+        rows, _ = self.query(price, benchmark, 1, lambda r: self.table.price[r] < price)
+        return int(rows[0]) if len(rows) else None
+
+    def faster(self, price: float, benchmark: float) -> int | None:
+        """Row of the nearest part with a higher benchmark, or None"""
+        rows, _ = self.query(price, benchmark, 1, lambda r: self.table.benchmark[r] > benchmark)
+        return int(rows[0]) if len(rows) else None
@@ -0,0 +1,307 @@
+"""
+Build Optimizer
+Searches catalog CPU x GPU x RAM x storage combinations for the best FPS
+under a budget, scoring every surviving combination in one forest call
+"""
+
+import numpy as np
+
+from models.bottleneck import RESOLUTION_CODES
+from models.integrity import COMPATIBILITY_CHECKS
+from .pareto import MERIT_FEATURES, fps_merits, pareto_frontier
+
+# Categories the search varies, in feature order
+SEARCH_CATEGORIES = ("cpu", "gpu", "ram", "storage")
+
+# A bottleneck counts as removed once it is gone or only this severe
+RESOLVED_SEVERITIES = ("none", "minor")
+
+# Categories the compatibility index relates
+COMPATIBILITY_CATEGORIES = ("cpu", "motherboard", "ram", "case")
+
+# Frontier parts kept per category after budget pruning; the grid is their product
+MAX_CANDIDATES = {"cpu": 12, "gpu": 16, "ram": 6, "storage": 3}
+
+
+def _current(model):
+    """The instance a ModelSlot serves (or the model itself), used for one whole call so a swap cannot split it"""
+    return getattr(model, "current", model)
+
+
+def spread(rows: np.ndarray, limit: int) -> np.ndarray:
+    """At most limit rows evenly spaced over a price-sorted frontier, always keeping both ends"""
+    if len(rows) <= limit:
+        return rows
+    return rows[np.unique(np.linspace(0, len(rows) - 1, limit).round().astype(np.intp))]
+
+
+class BuildOptimizer:
+    """
+    Best builds under a budget.
+
+    Each searched category is reduced to its price/performance Pareto frontier,
+    cut to what the budget can still afford once the cheapest options of the
+    other categories are paid for, and thinned to MAX_CANDIDATES. The remaining
+    grid is encoded as one feature matrix and scored in a single forest call.
+    """
+
+    def __init__(self, catalog, calculator, integrity):
+        self.catalog = catalog
+        self.calculator = calculator
+        self.integrity = integrity
+
+    def _compatible(self, catalog, category: str, pinned_rows: dict[str, int]) -> np.ndarray | None:
+        """Rows of a searched category that fit the pinned parts, or None when nothing constrains it"""
+        others = {c: pinned_rows.get(c) for c in COMPATIBILITY_CATEGORIES if c != category}
+        if category not in COMPATIBILITY_CATEGORIES or all(row is None for row in others.values()):
+            return None
+        return catalog.compat.compatible_rows(category, **others)
+
+    def _candidates(self, catalog, pinned_rows: dict[str, int], budget: float) -> dict[str, np.ndarray]:
+        candidates, restricted = {}, set()
+        for category in SEARCH_CATEGORIES:
+            if category in pinned_rows:
+                candidates[category] = np.array([pinned_rows[category]], dtype=np.intp)
+                continue
+            frontier = catalog.frontier(category)
+            if frontier is None or not len(frontier):
+                raise KeyError(f"The catalog has no {category} parts")
+            candidates[category] = frontier.rows
+            compatible = self._compatible(catalog, category, pinned_rows)
+            if compatible is not None:
+                # The frontier of the parts that fit, which the global frontier may miss entirely
+                table = catalog.table(category)
+                merits = fps_merits(category, table)[compatible]
+                candidates[category] = compatible[pareto_frontier(table.price[compatible], merits)]
+                restricted.add(category)
+        if any(len(rows) == 0 for rows in candidates.values()):
+            return candidates
+
+        # Frontiers are sorted by price, so the first row is each category's cheapest option
+        cheapest = {c: float(catalog.table(c).price[rows[0]]) for c, rows in candidates.items()}
+        for category, rows in candidates.items():
+            limit = budget - (sum(cheapest.values()) - cheapest[category])
+            if category in pinned_rows or category in restricted:
+                affordable = rows[catalog.table(category).price[rows] <= limit]
+            else:
+                affordable = rows[:catalog.frontier(category).affordable(limit)]
+            candidates[category] = spread(affordable, MAX_CANDIDATES[category])
+        return candidates
+
+    def optimize(
+        self,
+        budget: float,
+        resolution: str,
+        pinned: dict[str, str] | None = None,
+        top_k: int = 5,
+        gpu_tdp: float = 200,
+        psu_wattage: float = 650,
+        psu_efficiency: str = "80+ Gold",
+        mobo_chipset: str = "B650"
+    ) -> dict:
+        """
+        Top builds by predicted FPS (cheaper first on ties).
+
+        pinned maps a category to a part id or name; pinned parts outside the
+        searched categories (psu, motherboard, case) still count against the budget,
+        and a pinned PSU replaces psu_wattage/psu_efficiency in the integrity check.
+        Only CPUs and RAM compatible with the pinned parts and with each other
+        are searched.
+
+        Returns:
+            dict with builds (each with parts as category -> row, total_price,
+            perf and integrity), the catalog the rows belong to and the
+            model_version that predicted them
+        """
+        catalog, calculator = _current(self.catalog), _current(self.calculator)
+        catalog.ensure_loaded()
+        calculator.ensure_loaded()
+        resolution = resolution.lower()
+        if resolution not in RESOLUTION_CODES:
+            raise ValueError(f"Unknown resolution '{resolution}'. Expected one of {tuple(RESOLUTION_CODES)}")
+
+        pinned_rows = {category.lower(): catalog.find(category.lower(), key) for category, key in (pinned or {}).items()}
+        fixed_price = sum(
+            float(catalog.table(category).price[row])
+            for category, row in pinned_rows.items() if category not in SEARCH_CATEGORIES
+        )
+        if "psu" in pinned_rows:
+            psu = catalog.table("psu")
+            psu_wattage = float(psu.columns["wattage"][pinned_rows["psu"]])
+            psu_efficiency = str(psu.columns["efficiency"][pinned_rows["psu"]])
+
+        result = {"builds": [], "catalog": catalog, "model_version": calculator.model_version}
+        candidates = self._candidates(catalog, pinned_rows, budget - fixed_price)
+        if any(len(rows) == 0 for rows in candidates.values()):
+            return result
+
+        # Every combination of candidate rows, flattened to one row per build
+        grids = np.meshgrid(*(candidates[c] for c in SEARCH_CATEGORIES), indexing="ij")
+        rows = {c: grid.ravel() for c, grid in zip(SEARCH_CATEGORIES, grids)}
+        tables = {c: catalog.table(c) for c in SEARCH_CATEGORIES}
+        total_price = fixed_price + sum(tables[c].price[rows[c]] for c in SEARCH_CATEGORIES)
+
+        # Pinned parts already narrowed the candidates; CPU/RAM pairs are checked per build
+        within = (total_price <= budget) & catalog.compat.cpu_ram_compatible(rows["cpu"], rows["ram"])
+        if not within.any():
+            return result
+        rows = {c: r[within] for c, r in rows.items()}
+        total_price = total_price[within]
+
+        n_builds = len(total_price)
+        ram_gb = tables["ram"].columns["capacity"][rows["ram"]]
+        features = calculator.encode_features(
+            tables["cpu"].benchmark[rows["cpu"]],
+            tables["gpu"].benchmark[rows["gpu"]],
+            ram_gb,
+            tables["ram"].columns["speed_mhz"][rows["ram"]],
+            tables["storage"].columns["kind"][rows["storage"]],
+            [resolution] * n_builds
+        )
+        predicted_fps = calculator.predict_fps(features)
+
+        # Highest FPS first, cheaper build first among equal FPS
+        best = np.lexsort((total_price, -predicted_fps))[:top_k]
+        perf = calculator.describe(
+            features[best], predicted_fps[best], [resolution] * len(best), ram_gb[best].astype(int).tolist()
+        )
+
+        cpu = tables["cpu"]
+        cpu_rows = rows["cpu"][best]
+        boost = cpu.columns["boost_clock"][cpu_rows]
+        integrity = self.integrity.analyze_batch(
+            cpu_tdp=np.nan_to_num(cpu.columns["tdp"][cpu_rows]),
+            gpu_tdp=[gpu_tdp] * len(best),
+            psu_wattage=[psu_wattage] * len(best),
+            psu_efficiency=[psu_efficiency] * len(best),
+            mobo_chipset=[mobo_chipset] * len(best),
+            cpu_clock=np.where(np.isnan(boost), np.nan_to_num(cpu.columns["core_clock"][cpu_rows]), boost),
+            compatibility=self._compatibility_columns(catalog, pinned_rows, {c: rows[c][best] for c in SEARCH_CATEGORIES})
+        )
+
+        result["builds"] = [
+            {
+                "parts": {
+                    **{c: int(row) for c, row in pinned_rows.items() if c not in SEARCH_CATEGORIES},
+                    **{c: int(rows[c][i]) for c in SEARCH_CATEGORIES},
+                },
+                "total_price": round(float(total_price[i]), 2),
+                "perf": perf[rank],
+                "integrity": integrity[rank],
+            }
+            for rank, i in enumerate(best)
+        ]
+        return result
+
+    def _compatibility_columns(self, catalog, pinned_rows: dict[str, int], rows: dict[str, np.ndarray]) -> dict:
+        """Integrity compatibility checks for each build, from its searched rows and the pinned parts"""
+        n_builds = len(rows["cpu"])
+        checks = [
+            catalog.compat.check(**{
+                c: int(rows[c][i]) if c in rows else pinned_rows.get(c) for c in COMPATIBILITY_CATEGORIES
+            })
+            for i in range(n_builds)
+        ]
+        return {key: np.array([check[key] for check in checks], dtype=bool) for key in COMPATIBILITY_CHECKS}
+
+    def cheapest_upgrade(
+        self,
+        cpu_score: float,
+        gpu_score: float,
+        ram_gb: int,
+        ram_speed: int,
+        storage_type: str,
+        resolution: str,
+        target_fps: float | None = None,
+        category: str | None = None,
+        max_price: float | None = None
+    ) -> dict:
+        """
+        Cheapest single-part swap that reaches target_fps, or that removes the
+        detected bottleneck when no target is given.
+
+        Candidates are the frontier parts better than the current one (found by
+        binary search), optionally capped at max_price; every swap across the
+        considered categories is scored in one forest call together with the
+        current build.
+
+        Returns:
+            dict with current (perf of the build as is), goal, category, upgrade
+            (cheapest swap meeting the goal), best_value (most FPS per dollar) and
+            the catalog the swapped rows belong to, each swap as a dict with
+            category, row, price, perf, fps_gain, fps_per_dollar
+        """
+        catalog, calculator = _current(self.catalog), _current(self.calculator)
+        catalog.ensure_loaded()
+        resolution = resolution.lower()
+        if resolution not in RESOLUTION_CODES:
+            raise ValueError(f"Unknown resolution '{resolution}'. Expected one of {tuple(RESOLUTION_CODES)}")
+
+        base = calculator.encode_features([cpu_score], [gpu_score], [ram_gb], [ram_speed], [storage_type], [resolution])
+        current_fps = calculator.predict_fps(base)
+        current = calculator.describe(base, current_fps, [resolution], [ram_gb])[0]
+        bottleneck = current["bottleneck_component"].lower()
+
+        if category is not None:
+            categories = [category.lower()]
+            if categories[0] not in MERIT_FEATURES:
+                raise KeyError(f"Cannot upgrade '{category}'. Expected one of {tuple(MERIT_FEATURES)}")
+        elif target_fps is None and bottleneck in MERIT_FEATURES:
+            categories = [bottleneck]
+        else:
+            categories = list(MERIT_FEATURES)
+
+        # One feature row per candidate swap: the base build with one part's merit columns replaced
+        blocks, swaps = [], []
+        for c in categories:
+            frontier = catalog.frontier(c)
+            if frontier is None:
+                continue
+            columns = MERIT_FEATURES[c]
+            positions = frontier.improving(base[0, columns], max_price)
+            block = np.repeat(base, len(positions), axis=0)
+            block[:, columns] = frontier.merits[positions]
+            blocks.append(block)
+            swaps.extend((c, frontier, p) for p in positions)
+
+        result = {"current": current, "goal": "target_fps" if target_fps is not None else "remove_bottleneck",
+                  "categories": categories, "candidates": len(swaps), "upgrade": None, "best_value": None,
+                  "catalog": catalog}
+        if not swaps:
+            return result
+
+        features = np.vstack(blocks)
+        predicted_fps = calculator.predict_fps(features)
+        ram = features[:, 2].astype(int).tolist()
+        perf = calculator.describe(features, predicted_fps, [resolution] * len(swaps), ram)
+
+        price = np.array([frontier.price[p] for _, frontier, p in swaps])
+        gain = predicted_fps - current_fps[0]
+        if target_fps is not None:
+            meets_goal = predicted_fps >= target_fps
+        else:
+            meets_goal = np.array([
+                r["bottleneck_component"] != current["bottleneck_component"]
+                or r["bottleneck_severity"] in RESOLVED_SEVERITIES
+                for r in perf
+            ]) & (current["bottleneck_severity"] not in RESOLVED_SEVERITIES)
+
+        def swap(i: int) -> dict:
+            c, frontier, p = swaps[i]
+            return {
+                "category": c,
+                "row": int(frontier.rows[p]),
+                "price": float(price[i]),
+                "perf": perf[i],
+                "fps_gain": round(float(gain[i]), 1),
+                "fps_per_dollar": round(float(gain[i] / price[i]), 4) if price[i] > 0 else 0.0,
+            }
+
+        if meets_goal.any():
+            # Cheapest qualifying swap, higher FPS first among equal prices
+            qualifying = np.flatnonzero(meets_goal)
+            result["upgrade"] = swap(int(qualifying[np.lexsort((-predicted_fps[qualifying], price[qualifying]))[0]]))
+        if (gain > 0).any():
+            per_dollar = np.where(gain > 0, gain / np.maximum(price, 1e-9), -np.inf)
+            result["best_value"] = swap(int(per_dollar.argmax()))
+        return result
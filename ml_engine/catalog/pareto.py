@@ -0,0 +1,107 @@
+"""
+Pareto Frontiers
+Price-vs-performance dominance filtering over catalog columns
+"""
+
+import numpy as np
+
+from models.bottleneck import STORAGE_CODES
+
+# Categories with a frontier, and the bottleneck model features their merit columns feed
+MERIT_FEATURES = {"cpu": [0], "gpu": [1], "ram": [2, 3], "storage": [4]}
+
+# Candidate rows compared against all others at once when there are several merit columns
+DOMINANCE_BLOCK = 256
+
+
+def fps_merits(category: str, table) -> np.ndarray:
+    """N x M columns the FPS model responds to, in MERIT_FEATURES order (higher is better)"""
+    if category == "ram":
+        return np.nan_to_num(np.column_stack([table.columns["capacity"], table.columns["speed_mhz"]]))
+    if category == "storage":
+        kinds, codes = np.unique(table.columns["kind"], return_inverse=True)
+        merit = np.array([STORAGE_CODES.get(str(kind), 1) for kind in kinds], dtype=np.float64)
+        return merit[codes.reshape(-1)].reshape(-1, 1)
+    return table.benchmark.reshape(-1, 1)
+
+
+def pareto_frontier(price: np.ndarray, merits: np.ndarray) -> np.ndarray:
+    """
+    Rows not dominated by a part that is no more expensive and at least as good
+    on every merit column (and strictly better somewhere), sorted by price.
+
+    merits is N x M (or N for a single merit); higher is better. Among exact
+    duplicates only the first row in catalog order is kept.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    merits = np.asarray(merits, dtype=np.float64).reshape(len(price), -1)
+    if len(price) == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    # Price ascending, then merits descending, so any dominating row comes first
+    keys = [np.arange(len(price))] + [-merits[:, j] for j in reversed(range(merits.shape[1]))] + [price]
+    order = np.lexsort(keys)
+
+    if merits.shape[1] == 1:
+        m = merits[order, 0]
+        best_before = np.concatenate([[-np.inf], np.maximum.accumulate(m)[:-1]])
+        return order[m > best_before]
+
+    # A later row with the same merits as an earlier one never makes the frontier, so
+    # only the first row of each distinct merit vector is compared, a block at a time
+    ordered = merits[order]
+    grouped = np.lexsort([np.arange(len(order))] + [ordered[:, j] for j in range(ordered.shape[1])])
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = np.any(ordered[grouped[1:]] != ordered[grouped[:-1]], axis=1)
+    candidates = order[np.sort(grouped[first])]
+    m = merits[candidates]
+    # Candidates' merits are distinct, so an earlier one at least as good everywhere dominates
+    earlier = np.arange(len(m))
+    dominated = np.zeros(len(m), dtype=bool)
+    for start in range(0, len(m), DOMINANCE_BLOCK):
+        block = m[start:start + DOMINANCE_BLOCK]
+        covers = earlier[None, :] < earlier[start:start + len(block), None]
+        for j in range(m.shape[1]):
+            covers &= m[None, :, j] >= block[:, None, j]
+        dominated[start:start + len(block)] = covers.any(axis=1)
+    return candidates[~dominated]
+
+
+class Frontier:
+    """
+    A category's Pareto frontier as price-sorted arrays.
+
+    With a single merit column the merit strictly increases along the frontier,
+    so both price and merit lookups are binary searches.
+    """
+
+    def __init__(self, rows: np.ndarray, price: np.ndarray, merits: np.ndarray):
+        self.rows = rows
+        self.price = price
+        self.merits = merits
+
+    @classmethod
+    def build(cls, price: np.ndarray, merits: np.ndarray) -> "Frontier":
+        merits = np.asarray(merits, dtype=np.float64).reshape(len(price), -1)
+        rows = pareto_frontier(price, merits)
+        return cls(rows, np.asarray(price, dtype=np.float64)[rows], merits[rows])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def affordable(self, max_price: float | None) -> int:
+        """Number of leading frontier entries priced at or below max_price"""
+        if max_price is None:
+            return len(self)
+        return int(np.searchsorted(self.price, max_price, side="right"))
+
+    def improving(self, current, max_price: float | None = None) -> np.ndarray:
+        """Frontier positions at least as good as current on every merit and better on one"""
+        current = np.asarray(current, dtype=np.float64).reshape(-1)
+        end = self.affordable(max_price)
+        if self.merits.shape[1] == 1:
+            start = int(np.searchsorted(self.merits[:end, 0], current[0], side="right"))
+            return np.arange(start, end)
+        merits = self.merits[:end]
+        better = np.all(merits >= current, axis=1) & np.any(merits > current, axis=1)
+        return np.flatnonzero(better)
@@ -0,0 +1,49 @@
+"""
+Streaming JSON Parser
+Yields the objects of a top-level JSON array without loading the whole file
+"""
+
+import json
+from typing import Iterator
+
+_SKIP = " \t\r\n,"
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """
+    Decode a file shaped like [{...}, {...}, ...] one element at a time.
+
+    Only the current chunk plus at most one partially read element are held in
+    memory, so multi-megabyte pc-part-dataset files parse in constant space.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} is not a JSON array")
+        pos = 1
+        eof = False
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SKIP:
+                pos += 1
+
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+
+            if pos < len(buffer):
+                try:
+                    obj, pos = decoder.raw_decode(buffer, pos)
+                    yield obj
+                    continue
+                except json.JSONDecodeError:
+                    # The element straddles the chunk boundary
+                    if eof:
+                        raise
+
+            if eof:
+                raise ValueError(f"{path} ended before the closing ]")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
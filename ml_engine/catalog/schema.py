@@ -0,0 +1,146 @@
+"""
+Catalog Schema
+How each pc-part-dataset file maps onto catalog columns.
+Column names mirror the tables in supabase/schema.sql.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+
+def _pair(value, index):
+    """Pick one element of the [a, b] pairs the dataset uses for speed/modules"""
+    return value[index] if isinstance(value, list) and len(value) > index else None
+
+
+def _pg_round(x: np.ndarray) -> np.ndarray:
+    """CAST(x AS INTEGER) in Postgres rounds half away from zero"""
+    return np.sign(x) * np.floor(np.abs(x) + 0.5)
+
+
+def _storage_kind(row: dict) -> str:
+    """Collapse type/interface into the storage_type values BottleneckCalculator accepts"""
+    if row.get("type") != "SSD":
+        return "hdd"
+    interface = (row.get("interface") or "").lower()
+    return "nvme" if "pcie" in interface or "nvme" in interface else "ssd"
+
+
+def _zeros(columns: dict[str, np.ndarray]) -> np.ndarray:
+    return np.zeros(len(columns["price"]))
+
+
+def _no_derived(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    return {}
+
+
+@dataclass(frozen=True)
+class CategorySpec:
+    name: str  # catalog key, same as PartSpec.category
+    table: str  # table in supabase/schema.sql
+    source: str  # file in the data directory
+    numeric: tuple[str, ...]
+    text: tuple[str, ...]
+    extract: Callable[[dict], dict]
+    benchmark: Callable[[dict[str, np.ndarray]], np.ndarray]
+    # Catalog columns computed from other columns (generated columns in the table),
+    # recomputed when rows change in place (see catalog.delta)
+    derived: Callable[[dict[str, np.ndarray]], dict[str, np.ndarray]] = _no_derived
+
+
+CATEGORIES: dict[str, CategorySpec] = {spec.name: spec for spec in [
+    CategorySpec(
+        name="cpu",
+        table="cpus",
+        source="cpu.json",
+        numeric=("core_count", "core_clock", "boost_clock", "tdp"),
+        text=("microarchitecture", "graphics"),
+        extract=lambda row: row,
+        # benchmark_score generated column of the cpus table
+        benchmark=lambda c: (
+            np.nan_to_num(c["core_count"]) * 1000
+            + _pg_round(np.nan_to_num(c["core_clock"]) * 1000)
+            + _pg_round(np.nan_to_num(c["boost_clock"]) * 500)
+        ),
+    ),
+    CategorySpec(
+        name="gpu",
+        table="gpus",
+        source="video-card.json",
+        numeric=("memory", "core_clock", "boost_clock", "length"),
+        text=("chipset",),
+        extract=lambda row: row,
+        # benchmark_score generated column of the gpus table
+        benchmark=lambda c: (
+            _pg_round(np.nan_to_num(c["memory"])) * 2000
+            + np.nan_to_num(c["core_clock"])
+            + np.nan_to_num(c["boost_clock"])
+        ),
+    ),
+    CategorySpec(
+        name="ram",
+        table="memory",
+        source="memory.json",
+        numeric=("speed_ddr", "speed_mhz", "module_count", "module_size", "capacity", "cas_latency"),
+        text=(),
+        extract=lambda row: {
+            "speed_ddr": _pair(row.get("speed"), 0),
+            "speed_mhz": _pair(row.get("speed"), 1),
+            "module_count": _pair(row.get("modules"), 0),
+            "module_size": _pair(row.get("modules"), 1),
+            "capacity": (_pair(row.get("modules"), 0) or 0) * (_pair(row.get("modules"), 1) or 0),
+            "cas_latency": row.get("cas_latency"),
+        },
+        benchmark=lambda c: np.nan_to_num(c["speed_mhz"]),
+        # total_capacity generated column of the memory table
+        derived=lambda c: {"capacity": np.nan_to_num(c["module_count"]) * np.nan_to_num(c["module_size"])},
+    ),
+    CategorySpec(
+        name="storage",
+        table="storage",
+        source="internal-hard-drive.json",
+        numeric=("capacity", "cache"),
+        text=("type", "form_factor", "interface", "kind"),
+        extract=lambda row: {
+            **row,
+            "type": None if row.get("type") is None else str(row["type"]),
+            "kind": _storage_kind(row),
+        },
+        benchmark=lambda c: np.nan_to_num(c["capacity"]),
+        derived=lambda c: {"kind": np.array(
+            [_storage_kind({"type": t, "interface": i}) for t, i in zip(c["type"], c["interface"])], dtype=str
+        )},
+    ),
+    CategorySpec(
+        name="psu",
+        table="power_supplies",
+        source="power-supply.json",
+        numeric=("wattage",),
+        text=("type", "efficiency", "modular"),
+        extract=lambda row: {
+            **row,
+            "modular": ("Full" if row["modular"] else "No") if isinstance(row.get("modular"), bool) else row.get("modular"),
+        },
+        benchmark=lambda c: np.nan_to_num(c["wattage"]),
+    ),
+    CategorySpec(
+        name="motherboard",
+        table="motherboards",
+        source="motherboard.json",
+        numeric=("max_memory", "memory_slots"),
+        text=("socket", "form_factor"),
+        extract=lambda row: row,
+        benchmark=_zeros,
+    ),
+    CategorySpec(
+        name="case",
+        table="cases",
+        source="case.json",
+        numeric=("external_volume", "internal_35_bays"),
+        text=("type",),
+        extract=lambda row: row,
+        benchmark=_zeros,
+    ),
+]}
@@ -0,0 +1,443 @@
+"""
+Parts Catalog Store
+Per-category columnar NumPy arrays built from the pc-part-dataset files,
+persisted as a binary snapshot for fast reloads
+"""
+
+import copy
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from functools import cached_property
+from typing import Callable
+
+import numpy as np
+
+from models.loading import LazyModel
+from .compatibility import KEY_COLUMNS, CompatibilityIndex
+from .neighbors import PartIndex
+from .pareto import MERIT_FEATURES, Frontier, fps_merits
+from .parser import iter_json_array
+from .schema import CATEGORIES, CategorySpec
+
+SNAPSHOT_FORMAT = 1
+
+# Parts without an id in the source get a stable uuid5 derived from table, name and occurrence
+CATALOG_NAMESPACE = uuid.UUID("6f1d3c9e-5b7a-4c38-9a51-2e4f0d8b7c16")
+
+TierFn = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+class CategoryTable:
+    """
+    Columnar view of one catalog category (priced parts only).
+
+    Every column is a NumPy array of the same length. Per-tier aggregates are
+    computed once here so lookups such as the tier average value are O(1), and
+    kept as running sums so with_updates() can adjust them row by row.
+    """
+
+    def __init__(self, name: str, columns: dict[str, np.ndarray], n_tiers: int):
+        self.name = name
+        self.columns = columns
+        self.n_tiers = n_tiers
+        self._compute_aggregates()
+
+    def __len__(self) -> int:
+        return len(self.columns["price"])
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.columns["id"]
+
+    @property
+    def names(self) -> np.ndarray:
+        return self.columns["name"]
+
+    @property
+    def price(self) -> np.ndarray:
+        return self.columns["price"]
+
+    @property
+    def benchmark(self) -> np.ndarray:
+        return self.columns["benchmark"]
+
+    @property
+    def value(self) -> np.ndarray:
+        return self.columns["value"]
+
+    @property
+    def tier(self) -> np.ndarray:
+        return self.columns["tier"]
+
+    @cached_property
+    def id_order(self) -> np.ndarray:
+        """Row order that sorts ids, for vectorized id lookups"""
+        return np.argsort(self.ids, kind="stable")
+
+    def rows_of(self, ids) -> np.ndarray:
+        """Row of each id, -1 where the table has no such part"""
+        ids = np.asarray(ids, dtype=str)
+        if not len(self):
+            return np.full(len(ids), -1, dtype=np.intp)
+        positions = np.minimum(np.searchsorted(self.ids, ids, sorter=self.id_order), len(self) - 1)
+        rows = self.id_order[positions]
+        return np.where(self.ids[rows] == ids, rows, -1)
+
+    def _compute_aggregates(self):
+        tier = self.tier.astype(np.intp)
+        self.tier_count = np.bincount(tier, minlength=self.n_tiers)
+        self.tier_value_sum = np.bincount(tier, weights=self.value, minlength=self.n_tiers)
+        self.price_sum = float(self.price.sum())
+        self.benchmark_sum = float(self.benchmark.sum())
+        self._finish_aggregates()
+
+    def _finish_aggregates(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # NaN for empty tiers, which value scoring treats as "no reference"
+            self.tier_avg_value = self.tier_value_sum / self.tier_count
+
+        if len(self):
+            self.stats = {
+                "count": len(self),
+                "price_min": float(self.price.min()),
+                "price_max": float(self.price.max()),
+                "price_mean": self.price_sum / len(self),
+                "benchmark_min": float(self.benchmark.min()),
+                "benchmark_max": float(self.benchmark.max()),
+                "benchmark_mean": self.benchmark_sum / len(self),
+                "tier_count": self.tier_count.tolist(),
+            }
+        else:
+            self.stats = {"count": 0}
+
+    def with_updates(self, rows: np.ndarray, updates: dict[str, np.ndarray]) -> "CategoryTable":
+        """
+        A copy with new values for some (distinct) rows. Changed columns are
+        copied and the rest shared; the aggregates are adjusted by the changed
+        rows' old and new contributions instead of being recomputed.
+        """
+        table = copy.copy(self)
+        table.columns = dict(self.columns)
+        for column, values in updates.items():
+            old = self.columns[column]
+            # Widens fixed-width string columns when a new value is longer
+            table.columns[column] = old.astype(np.result_type(old, values))
+            table.columns[column][rows] = values
+        if "id" in updates:
+            table.__dict__.pop("id_order", None)
+
+        old_tier, new_tier = self.tier[rows].astype(np.intp), table.tier[rows].astype(np.intp)
+        table.tier_count = (
+            self.tier_count
+            + np.bincount(new_tier, minlength=self.n_tiers)
+            - np.bincount(old_tier, minlength=self.n_tiers)
+        )
+        table.tier_value_sum = (
+            self.tier_value_sum
+            + np.bincount(new_tier, weights=table.value[rows], minlength=self.n_tiers)
+            - np.bincount(old_tier, weights=self.value[rows], minlength=self.n_tiers)
+        )
+        # A tier that emptied has no value left, not the rounding residue of the updates
+        table.tier_value_sum[table.tier_count == 0] = 0.0
+        table.price_sum = self.price_sum + float((table.price[rows] - self.price[rows]).sum())
+        table.benchmark_sum = self.benchmark_sum + float((table.benchmark[rows] - self.benchmark[rows]).sum())
+        table._finish_aggregates()
+        return table
+
+
+class CatalogSnapshot:
+    """An immutable set of category tables plus the metadata describing how they were built"""
+
+    def __init__(self, tables: dict[str, CategoryTable], meta: dict):
+        self.tables = tables
+        self.meta = meta
+        self.version = snapshot_version(meta)
+
+    def table(self, category: str) -> CategoryTable | None:
+        return self.tables.get(category)
+
+    def with_tiers(self, tier_fn: TierFn, tier_model_version: str) -> "CatalogSnapshot":
+        """Re-assign tiers with a different tier model, reusing every other column"""
+        tables = {}
+        for name, table in self.tables.items():
+            columns = {**table.columns, "tier": tier_fn(table.price, table.benchmark).astype(np.int8)}
+            tables[name] = CategoryTable(name, columns, table.n_tiers)
+        return CatalogSnapshot(tables, {**self.meta, "tier_model_version": tier_model_version})
+
+
+def snapshot_version(meta: dict) -> str:
+    return hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def source_fingerprints(data_dir: str) -> dict[str, list[int]]:
+    """(size, mtime) of every source file, used to tell whether a snapshot is stale"""
+    fingerprints = {}
+    for spec in CATEGORIES.values():
+        path = os.path.join(data_dir, spec.source)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprints[spec.source] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprints
+
+
+def _read_category(spec: CategorySpec, path: str) -> dict[str, np.ndarray]:
+    """Stream-parse one source file straight into column lists, then arrays"""
+    columns: dict[str, list] = {name: [] for name in ("id", "name", "price", *spec.numeric, *spec.text)}
+    occurrences = Counter()
+
+    for row in iter_json_array(path):
+        name = row.get("name") or ""
+        occurrence = occurrences[name]
+        occurrences[name] += 1
+
+        price = row.get("price")
+        if not price or price <= 0:
+            continue
+
+        flat = spec.extract(row)
+        columns["id"].append(str(row.get("id") or uuid.uuid5(CATALOG_NAMESPACE, f"{spec.table}:{name}:{occurrence}")))
+        columns["name"].append(name)
+        columns["price"].append(price)
+        for column in spec.numeric:
+            columns[column].append(flat.get(column))
+        for column in spec.text:
+            columns[column].append(flat.get(column) or "")
+
+    arrays = {
+        "id": np.array(columns["id"], dtype=str),
+        "name": np.array(columns["name"], dtype=str),
+        "price": np.array(columns["price"], dtype=np.float64),
+    }
+    for column in spec.numeric:
+        arrays[column] = np.array(columns[column], dtype=np.float64)
+    for column in spec.text:
+        arrays[column] = np.array(columns[column], dtype=str)
+
+    arrays["benchmark"] = spec.benchmark(arrays).astype(np.float64)
+    arrays["value"] = arrays["benchmark"] / arrays["price"]
+    return arrays
+
+
+def build_snapshot(
+    data_dir: str,
+    tier_fn: TierFn,
+    tier_labels: list[str],
+    tier_model_version: str
+) -> CatalogSnapshot:
+    """Parse every available source file into a fresh snapshot"""
+    tables = {}
+    for spec in CATEGORIES.values():
+        path = os.path.join(data_dir, spec.source)
+        if not os.path.exists(path):
+            continue
+        columns = _read_category(spec, path)
+        columns["tier"] = tier_fn(columns["price"], columns["benchmark"]).astype(np.int8)
+        tables[spec.name] = CategoryTable(spec.name, columns, len(tier_labels))
+
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "sources": source_fingerprints(data_dir),
+        "tier_labels": tier_labels,
+        "tier_model_version": tier_model_version,
+    }
+    return CatalogSnapshot(tables, meta)
+
+
+def save_snapshot(snapshot: CatalogSnapshot, path: str):
+    """Write all columns into one uncompressed .npz, swapped in atomically"""
+    arrays = {
+        f"{name}/{column}": values
+        for name, table in snapshot.tables.items()
+        for column, values in table.columns.items()
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, __meta__=np.array(json.dumps(snapshot.meta)), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot_meta(path: str) -> dict:
+    """A snapshot's metadata, without reading its columns"""
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data["__meta__"]))
+
+
+def load_snapshot(path: str) -> CatalogSnapshot:
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["__meta__"]))
+        columns: dict[str, dict[str, np.ndarray]] = {}
+        for key in data.files:
+            if key == "__meta__":
+                continue
+            name, column = key.split("/", 1)
+            columns.setdefault(name, {})[column] = data[key]
+
+    n_tiers = len(meta["tier_labels"])
+    tables = {name: CategoryTable(name, cols, n_tiers) for name, cols in columns.items()}
+    return CatalogSnapshot(tables, meta)
+
+
+class PartsCatalog(LazyModel):
+    """
+    Serves the current catalog snapshot.
+
+    On load, a snapshot whose sources are unchanged is reused as is; if only the
+    tier model changed the tiers are recomputed from the stored columns, and
+    otherwise the JSON sources are parsed again and a new snapshot is written.
+    Price and spec updates between source releases come in as deltas (see
+    with_delta and catalog.delta).
+    """
+
+    def __init__(self, data_dir: str, snapshot_path: str, tier_model):
+        super().__init__()
+        self.data_dir = data_dir
+        self.snapshot_path = snapshot_path
+        self.tier_model = tier_model
+        self.snapshot: CatalogSnapshot | None = None
+        self.indexes: dict[str, PartIndex] = {}
+        self.frontiers: dict[str, Frontier] = {}
+        self.compat: CompatibilityIndex | None = None
+        # Per category, what the delta that produced this catalog changed (see with_delta)
+        self.changes: dict = {}
+
+    def _load(self):
+        self.tier_model.ensure_loaded()
+        tier_fn = self.tier_model.assign_tiers
+        tier_version = self.tier_model.model_version
+        sources = source_fingerprints(self.data_dir)
+
+        snapshot = None
+        if os.path.exists(self.snapshot_path):
+            snapshot = load_snapshot(self.snapshot_path)
+            # Without source files the snapshot is the only copy of the data, so keep it
+            if snapshot.meta.get("format") != SNAPSHOT_FORMAT or (sources and snapshot.meta["sources"] != sources):
+                snapshot = None
+            elif snapshot.meta["tier_model_version"] != tier_version:
+                snapshot = snapshot.with_tiers(tier_fn, tier_version)
+                save_snapshot(snapshot, self.snapshot_path)
+
+        if snapshot is None:
+            snapshot = build_snapshot(self.data_dir, tier_fn, self.tier_model.tier_labels, tier_version)
+            if snapshot.tables:
+                save_snapshot(snapshot, self.snapshot_path)
+
+        self.indexes = {name: PartIndex(table) for name, table in snapshot.tables.items()}
+        self.frontiers = {
+            name: Frontier.build(table.price, fps_merits(name, table))
+            for name, table in snapshot.tables.items() if name in MERIT_FEATURES
+        }
+        self.compat = CompatibilityIndex(snapshot.tables)
+        self.snapshot = snapshot
+        self.model_version = snapshot.version
+
+    def with_delta(self, delta: dict) -> "PartsCatalog":
+        """
+        A loaded catalog with a parsed delta applied to this one's snapshot.
+
+        Only the delta's rows are recomputed. Untouched tables keep their
+        indexes; neighbor indexes of tables updated in place are patched,
+        frontiers of changed tables are rebuilt, and the compatibility bitsets
+        are only re-sorted unless rows were added or removed or a column the
+        compatibility keys come from changed.
+        """
+        from .delta import apply_delta
+
+        start = time.perf_counter()
+        self.ensure_loaded()
+        snapshot, changes = apply_delta(self.snapshot, delta, self.tier_model.assign_tiers)
+
+        catalog = PartsCatalog(self.data_dir, self.snapshot_path, self.tier_model)
+        catalog.indexes = dict(self.indexes)
+        catalog.frontiers = dict(self.frontiers)
+        rebuild_compat, repriced = False, []
+        for name, change in changes.items():
+            if change.rows is not None and not len(change.rows):
+                continue
+            table = snapshot.tables[name]
+            if change.rows is None:
+                catalog.indexes[name] = PartIndex(table)
+            else:
+                catalog.indexes[name] = self.indexes[name].with_updates(table, change.rows)
+            if name in MERIT_FEATURES:
+                catalog.frontiers[name] = Frontier.build(table.price, fps_merits(name, table))
+            if change.rows is None or change.columns & set(KEY_COLUMNS.get(name, ())):
+                rebuild_compat = True
+            elif "price" in change.columns:
+                repriced.append(name)
+
+        catalog.compat = CompatibilityIndex(snapshot.tables) if rebuild_compat else self.compat.repriced(snapshot.tables, repriced)
+        catalog.snapshot = snapshot
+        catalog.changes = changes
+        catalog.model_version = snapshot.version
+        catalog.load_seconds = time.perf_counter() - start
+        catalog.load_state = "ready"
+        return catalog
+
+    def publish(self):
+        """Write this catalog's snapshot, replacing the file other workers load and follow"""
+        save_snapshot(self.snapshot, self.snapshot_path)
+
+    def follow(self) -> "PartsCatalog | None":
+        """
+        The catalog of the snapshot file when it holds another version than this
+        one, else None. A snapshot one delta ahead is reached by replaying that
+        delta, anything else by loading the file. Snapshots tiered by another
+        value tier version are left to that model's deploy.
+        """
+        if not os.path.exists(self.snapshot_path):
+            return None
+        meta = load_snapshot_meta(self.snapshot_path)
+        version = snapshot_version(meta)
+        if version == self.model_version or meta.get("tier_model_version") != self.tier_model.model_version:
+            return None
+
+        delta = meta.get("delta")
+        if delta is not None and delta["parent"] == self.model_version:
+            catalog = self.with_delta(delta["changes"])
+            if catalog.model_version == version:
+                return catalog
+        catalog = PartsCatalog(self.data_dir, self.snapshot_path, self.tier_model)
+        catalog.ensure_loaded()
+        return catalog
+
+    def table(self, category: str) -> CategoryTable | None:
+        """The category's table, or None while the catalog is not loaded"""
+        if self.snapshot is None:
+            return None
+        return self.snapshot.table(category)
+
+    def index(self, category: str) -> PartIndex | None:
+        """The category's neighbor index, or None while the catalog is not loaded"""
+        return self.indexes.get(category)
+
+    def frontier(self, category: str) -> Frontier | None:
+        """The category's price/performance frontier, or None while the catalog is not loaded"""
+        return self.frontiers.get(category)
+
+    def find(self, category: str, key: str) -> int:
+        """Row of a part given its catalog id or exact (case-insensitive) name"""
+        table = self.table(category)
+        if table is None:
+            raise KeyError(f"Unknown catalog category: {category}")
+        matches = np.flatnonzero(table.ids == key)
+        if not len(matches):
+            matches = np.flatnonzero(np.char.lower(table.names) == key.lower())
+        if not len(matches):
+            raise KeyError(f"No {category} named or with id '{key}' in the catalog")
+        return int(matches[0])
+
+    def part(self, category: str, row: int) -> dict:
+        """One catalog row as a plain dict"""
+        table = self.snapshot.table(category)
+        return {
+            "id": str(table.ids[row]),
+            "name": str(table.names[row]),
+            "price": float(table.price[row]),
+            "benchmark": float(table.benchmark[row]),
+            "value": float(table.value[row]),
+            "tier": self.snapshot.meta["tier_labels"][int(table.tier[row])],
+        }
@@ -0,0 +1,95 @@
+"""
+ML Engine Configuration
+Runtime settings, overridable through SILICONSAGE_* environment variables
+"""
+
+import os
+
+# Forest inference engine: "compiled" (flat NumPy arrays), "sklearn", or "lattice"
+# (interpolated lookup table from build_artifacts.py --lattice, forest for uncovered inputs)
+INFERENCE_ENGINE = os.getenv("SILICONSAGE_INFERENCE_ENGINE", "compiled")
+# Forest calls with more rows than this leave the compiled engine for sklearn's C tree walk, which
+# is faster on large batches (the pickled forest is loaded on first use); 0 keeps every call compiled
+COMPILED_MAX_ROWS = int(os.getenv("SILICONSAGE_COMPILED_MAX_ROWS", "512"))
+
+# Points per axis of the (cpu_score, gpu_score) lattice grid; finer grids are larger but more exact
+LATTICE_GRID_SIZE = int(os.getenv("SILICONSAGE_LATTICE_GRID_SIZE", "129"))
+
+# Game profiles (bottleneck.GAME_PROFILES names, or "all") build_artifacts.py trains per-game FPS
+# outputs for, in the same forest as the generic FPS; empty trains the single-output model
+FPS_GAMES = os.getenv("SILICONSAGE_FPS_GAMES", "")
+
+# Threads that run model inference off the asyncio event loop
+INFERENCE_WORKERS = int(os.getenv("SILICONSAGE_INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Threads each inference call may use inside BLAS/OpenMP and sklearn's n_jobs. The default of 1
+# keeps workers x INFERENCE_WORKERS threads from oversubscribing the node; see benchmark.py --threads
+INFERENCE_THREADS = int(os.getenv("SILICONSAGE_INFERENCE_THREADS", "1"))
+# Worker CPU affinity: "" (none), "spread" (one CPU per worker, round-robin) or a CPU list like "0-3"
+CPU_AFFINITY = os.getenv("SILICONSAGE_CPU_AFFINITY", "")
+
+# Requests arriving within this window are merged into one batched model call
+BATCH_WINDOW_MS = float(os.getenv("SILICONSAGE_BATCH_WINDOW_MS", "2.0"))
+MAX_BATCH_SIZE = int(os.getenv("SILICONSAGE_MAX_BATCH_SIZE", "256"))
+
+# Largest grid /predict/fps/sweep will evaluate in one call
+SWEEP_MAX_CELLS = int(os.getenv("SILICONSAGE_SWEEP_MAX_CELLS", "10000"))
+
+# Parts scored per vectorized call by the streaming value tier endpoints, and the longest
+# NDJSON input line accepted (bounds the memory one stream can hold)
+STREAM_CHUNK_SIZE = int(os.getenv("SILICONSAGE_STREAM_CHUNK_SIZE", "2048"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("SILICONSAGE_STREAM_MAX_LINE_BYTES", "65536"))
+
+# /predict/fps result cache; set SILICONSAGE_CACHE_MAX_ENTRIES=0 to disable
+CACHE_MAX_ENTRIES = int(os.getenv("SILICONSAGE_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("SILICONSAGE_CACHE_TTL_SECONDS", "3600"))
+# Benchmark scores are snapped to this step before keying, so float noise shares one entry
+CACHE_SCORE_QUANTUM = float(os.getenv("SILICONSAGE_CACHE_SCORE_QUANTUM", "1.0"))
+
+# Directory holding the artifacts written by build_artifacts.py
+MODEL_DIR = os.getenv("SILICONSAGE_MODEL_DIR", os.path.join(os.path.dirname(__file__), "models"))
+
+# When to load models: "background" (start serving immediately, load in a thread),
+# "lazy" (on the first request that needs them) or "eager" (block startup until loaded)
+MODEL_LOADING = os.getenv("SILICONSAGE_MODEL_LOADING", "background")
+
+# pc-part-dataset JSON files the parts catalog is built from, and its binary snapshot
+CATALOG_DATA_DIR = os.getenv(
+    "SILICONSAGE_CATALOG_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+)
+CATALOG_SNAPSHOT = os.getenv("SILICONSAGE_CATALOG_SNAPSHOT", os.path.join(MODEL_DIR, "catalog_snapshot.npz"))
+# How often each worker checks the snapshot for catalog deltas applied through another worker (0 disables)
+CATALOG_POLL_SECONDS = float(os.getenv("SILICONSAGE_CATALOG_POLL_SECONDS", "5"))
+
+# Opt-in request profiling: a random fraction of requests (and, when a header name is set,
+# any request sending that header with a non-zero value) is stack-sampled every
+# PROFILE_INTERVAL_MS; sampled requests slower than PROFILE_SLOW_MS are written to
+# PROFILE_DIR as folded stacks for flame graphs
+PROFILE_SAMPLE_RATE = float(os.getenv("SILICONSAGE_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = os.getenv("SILICONSAGE_PROFILE_HEADER", "")
+PROFILE_SLOW_MS = float(os.getenv("SILICONSAGE_PROFILE_SLOW_MS", "250"))
+PROFILE_INTERVAL_MS = float(os.getenv("SILICONSAGE_PROFILE_INTERVAL_MS", "1.0"))
+PROFILE_DIR = os.getenv("SILICONSAGE_PROFILE_DIR", os.path.join(os.path.dirname(__file__), "profiles"))
+
+# Versioned model registry written by build_artifacts.py; models are served from the
+# active version there, or straight from MODEL_DIR when nothing has been published
+MODEL_REGISTRY_DIR = os.getenv("SILICONSAGE_MODEL_REGISTRY_DIR", os.path.join(MODEL_DIR, "registry"))
+# How often each worker checks the registry for an active version changed by another worker (0 disables)
+REGISTRY_POLL_SECONDS = float(os.getenv("SILICONSAGE_REGISTRY_POLL_SECONDS", "5"))
+
+# Token the /admin endpoints require in the X-Admin-Token header; they are disabled when unset
+ADMIN_TOKEN = os.getenv("SILICONSAGE_ADMIN_TOKEN", "")
+
+# Overload protection for the model endpoints: each runs at most ADMISSION_MAX_IN_FLIGHT requests at
+# once with up to ADMISSION_MAX_QUEUE more waiting, and anything beyond fails fast with 503 + Retry-After.
+# ADMISSION_LIMITS overrides both per path, e.g. "/predict/fps=256:1024,/optimize/build=4:8"
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("SILICONSAGE_ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_MAX_QUEUE = int(os.getenv("SILICONSAGE_ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_LIMITS = os.getenv("SILICONSAGE_ADMISSION_LIMITS", "")
+# Request header carrying the client's time budget in milliseconds; work still queued when it runs out
+# is dropped with 504. DEFAULT_DEADLINE_MS applies to requests without the header (0: no deadline)
+DEADLINE_HEADER = os.getenv("SILICONSAGE_DEADLINE_HEADER", "X-Request-Deadline-Ms")
+DEFAULT_DEADLINE_MS = float(os.getenv("SILICONSAGE_DEFAULT_DEADLINE_MS", "0"))
+# Degraded mode: once this many /predict/fps requests are queued, further ones skip the queue and get a
+# cached answer or a lattice-interpolated one without fps_headroom (0 disables)
+DEGRADE_QUEUE_DEPTH = int(os.getenv("SILICONSAGE_DEGRADE_QUEUE_DEPTH", "0"))
@@ -3,20 +3,89 @@ SiliconSage ML Engine - FastAPI Backend
 The Brain of the PC Building Value Optimization Engine
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from functools import partial
+from typing import Optional, Union
+import hmac
+import numpy as np
+import threading
 import uvicorn
 
+import config
+from catalog.delta import DeltaError, parse_delta
+from catalog.optimizer import BuildOptimizer
+from catalog.store import PartsCatalog
+from models import bottleneck, value_tier
 from models.bottleneck import BottleneckCalculator
 from models.value_tier import ValueTierClusterer
-from models.integrity import IntegrityAnalyzer
+from models.integrity import COMPATIBILITY_CHECKS, IntegrityAnalyzer
+from models.registry import ModelRegistry
+from serving import columnar, ndjson
+from serving.admission import AdmissionController, AdmissionMiddleware, EndpointLimit, current_ticket, parse_limits
+from serving.cache import PredictionCache
+from serving.hotswap import CatalogUpdater, ManagedModel, ModelManager, ModelSlot
+from serving.memory import memory_report
+from serving.metrics import MetricsRegistry, ModelStageTimer, RequestMetrics, gauge_samples
+from serving.profiler import SamplingProfiler
+from serving.scheduler import InferenceScheduler
+from serving.threads import apply_policy, policy_status
+
+
+def _load_models():
+    """Load every model artifact; failures are recorded in each model's status"""
+    for model in lazy_models.values():
+        try:
+            model.ensure_loaded()
+        except RuntimeError:
+            pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing is trained at startup; artifacts come from build_artifacts.py
+    if config.MODEL_LOADING == "eager":
+        _load_models()
+    elif config.MODEL_LOADING == "background":
+        threading.Thread(target=_load_models, name="model-loader", daemon=True).start()
+    model_manager.start_polling()
+    catalog_updater.start_polling()
+    yield
+    catalog_updater.stop_polling()
+    model_manager.stop_polling()
+    scheduler.shutdown()
+
 
 app = FastAPI(
     title="SiliconSage ML Engine",
     description="AI-Powered PC Part Value Optimization API",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan
+)
+
+# Model endpoints behind admission control; health, metrics, admin and catalog lookups always answer
+ADMITTED_ENDPOINTS = (
+    "/predict/fps", "/predict/fps/batch", "/predict/fps/sweep",
+    "/optimize/build", "/optimize/upgrade", "/analyze/value-tier"
+)
+_admission_limits = parse_limits(config.ADMISSION_LIMITS)
+admission = AdmissionController({
+    path: EndpointLimit(
+        *_admission_limits.get(path, (config.ADMISSION_MAX_IN_FLIGHT, config.ADMISSION_MAX_QUEUE)),
+        degrade_at=config.DEGRADE_QUEUE_DEPTH if path == "/predict/fps" else 0
+    )
+    for path in ADMITTED_ENDPOINTS
+})
+# Added first so CORS stays outermost and rejections still carry CORS headers
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    deadline_header=config.DEADLINE_HEADER,
+    default_deadline_ms=config.DEFAULT_DEADLINE_MS
 )
 
 # CORS middleware for Next.js frontend
@@ -28,10 +97,99 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize ML models
-bottleneck_calculator = BottleneckCalculator()
-value_clusterer = ValueTierClusterer()
+# Per-worker native thread pools and CPU affinity, set before any model runs
+apply_policy(config.INFERENCE_THREADS, config.CPU_AFFINITY)
+
+model_registry = ModelRegistry(config.MODEL_REGISTRY_DIR)
+
+
+def _model_dir(name: str) -> str:
+    """Artifacts of the model's active registry version, or MODEL_DIR when none is published"""
+    return model_registry.active_path(name, config.MODEL_DIR)
+
+
+# Initialize ML models (artifacts are loaded later, see lifespan). Each model is
+# served from a slot, so a new version can be swapped in while requests run
+def _bottleneck_calculator(model_dir: str) -> BottleneckCalculator:
+    # Degraded mode interpolates the lattice, so map it whatever the engine
+    return BottleneckCalculator(
+        engine=config.INFERENCE_ENGINE,
+        model_dir=model_dir,
+        n_jobs=config.INFERENCE_THREADS,
+        approximate=config.DEGRADE_QUEUE_DEPTH > 0,
+        compiled_max_rows=config.COMPILED_MAX_ROWS
+    )
+
+
+bottleneck_calculator = ModelSlot(_bottleneck_calculator(_model_dir("bottleneck")))
+value_clusterer = ModelSlot(ValueTierClusterer(model_dir=_model_dir("value_tier")))
 integrity_analyzer = IntegrityAnalyzer()
+parts_catalog = ModelSlot(
+    PartsCatalog(config.CATALOG_DATA_DIR, config.CATALOG_SNAPSHOT, tier_model=value_clusterer.current)
+)
+value_clusterer.current.catalog = parts_catalog
+build_optimizer = BuildOptimizer(parts_catalog, bottleneck_calculator, integrity_analyzer)
+
+# Loaded in this order; the catalog tiers its parts with the value tier model
+lazy_models = {
+    "bottleneck": bottleneck_calculator,
+    "value_tier": value_clusterer,
+    "catalog": parts_catalog,
+}
+
+# Hot-path instrumentation, exposed at GET /metrics; routes declared below time
+# validation, handler and serialization separately
+metrics = MetricsRegistry()
+profiler = SamplingProfiler(
+    sample_rate=config.PROFILE_SAMPLE_RATE,
+    header=config.PROFILE_HEADER,
+    slow_ms=config.PROFILE_SLOW_MS,
+    interval_ms=config.PROFILE_INTERVAL_MS,
+    output_dir=config.PROFILE_DIR
+)
+request_metrics = RequestMetrics(metrics, profiler if profiler.enabled else None)
+app.router.route_class = request_metrics.route_class()
+model_stages = metrics.histogram(
+    "siliconsage_model_stage_seconds", "Model work per batch call, by stage", ("model", "version", "stage")
+)
+for _name, _slot in lazy_models.items():
+    _slot.current.stage_timer = ModelStageTimer(model_stages, _name, _slot.current)
+
+
+def _prepare_catalog(catalog: PartsCatalog):
+    catalog.stage_timer = ModelStageTimer(model_stages, "catalog", catalog)
+
+
+def _value_tier_catalog(clusterer: ValueTierClusterer) -> list:
+    """A catalog tiered by a new value tier version, swapped in together with it"""
+    catalog = PartsCatalog(config.CATALOG_DATA_DIR, config.CATALOG_SNAPSHOT, tier_model=clusterer)
+    _prepare_catalog(catalog)
+    return [(parts_catalog, catalog)]
+
+
+def _prepare_value_tier(clusterer: ValueTierClusterer):
+    clusterer.catalog = parts_catalog
+    clusterer.stage_timer = ModelStageTimer(model_stages, "value_tier", clusterer)
+
+
+# Versions published by build_artifacts.py are deployed through /admin/models
+model_manager = ModelManager(model_registry, poll_seconds=config.REGISTRY_POLL_SECONDS)
+model_manager.register("bottleneck", ManagedModel(
+    slot=bottleneck_calculator,
+    factory=_bottleneck_calculator,
+    feature_schema=bottleneck.FEATURE_SCHEMA,
+    prepare=lambda model: setattr(model, "stage_timer", ModelStageTimer(model_stages, "bottleneck", model))
+))
+model_manager.register("value_tier", ManagedModel(
+    slot=value_clusterer,
+    factory=lambda path: ValueTierClusterer(model_dir=path),
+    feature_schema=value_tier.FEATURE_SCHEMA,
+    prepare=_prepare_value_tier,
+    companions=_value_tier_catalog
+))
+
+# Price and spec updates between dataset releases, through /admin/catalog/delta
+catalog_updater = CatalogUpdater(parts_catalog, poll_seconds=config.CATALOG_POLL_SECONDS, prepare=_prepare_catalog)
 
 
 # Request/Response Models
@@ -49,6 +207,11 @@ class BuildSpecs(BaseModel):
     psu_efficiency: str
     mobo_chipset: str
     cpu_clock: float
+    # Optional catalog parts (id or exact name), checked for socket/DDR/form-factor compatibility
+    cpu_part: Optional[str] = None
+    motherboard_part: Optional[str] = None
+    ram_part: Optional[str] = None
+    case_part: Optional[str] = None
 
 
 class PartSpec(BaseModel):
@@ -68,64 +231,935 @@ class FPSPrediction(BaseModel):
     integrity_status: str
     integrity_warnings: list[str]
     integrity_notes: list[str]
+    # FPS the forest predicts each component's upgrade would add, and the largest of them
+    fps_headroom: dict[str, float] = {}
+    attributed_bottleneck: Optional[str] = None
+    # Per-game FPS from a multi-output model, predicted in the same forest pass
+    game_fps: dict[str, float] = {}
+    # Bottleneck model version that made the prediction
+    model_version: Optional[str] = None
+    # Approximate answer served under overload (lattice FPS, no fps_headroom)
+    degraded: bool = False
+
+
+class BatchBuildSpecs(BaseModel):
+    builds: list[BuildSpecs]
+
+
+class BatchFPSPrediction(BaseModel):
+    predictions: list[FPSPrediction]
 
 
 class ValueTierResult(BaseModel):
     tier: str
     value_score: float
     similar_parts: list[str]
+    cheaper_alternative: Optional[str] = None
+    faster_alternative: Optional[str] = None
+    model_version: Optional[str] = None
+
+
+class CatalogPart(BaseModel):
+    id: str
+    name: str
+    price: float
+    benchmark: float
+    value: float
+    tier: str
+
+
+class SimilarPartsResult(BaseModel):
+    category: str
+    similar: list[CatalogPart]
+    cheaper_alternative: Optional[CatalogPart]
+    faster_alternative: Optional[CatalogPart]
+
+
+class CompatiblePartsResult(BaseModel):
+    category: str
+    total: int
+    parts: list[CatalogPart]
+
+
+class OptimizeBuildRequest(BaseModel):
+    budget: float
+    target_resolution: str
+    # category -> catalog part id or exact name
+    pinned: dict[str, str] = {}
+    top_k: int = 5
+    # Assumed for the integrity check (the catalog has no GPU power draw or chipset data)
+    gpu_tdp: float = 200
+    psu_wattage: float = 650
+    psu_efficiency: str = "80+ Gold"
+    mobo_chipset: str = "B650"
+
+
+class OptimizedBuild(BaseModel):
+    parts: dict[str, CatalogPart]
+    total_price: float
+    prediction: FPSPrediction
+
+
+class OptimizeBuildResult(BaseModel):
+    budget: float
+    target_resolution: str
+    builds: list[OptimizedBuild]
+
+
+class UpgradeRequest(BaseModel):
+    build: BuildSpecs
+    # Reach this FPS; without it the goal is removing the detected bottleneck
+    target_fps: Optional[float] = None
+    # Only consider swapping this category (cpu, gpu, ram, storage)
+    category: Optional[str] = None
+    max_price: Optional[float] = None
+
+
+class UpgradeOption(BaseModel):
+    category: str
+    part: CatalogPart
+    predicted_fps: float
+    fps_gain: float
+    fps_per_dollar: float
+    bottleneck_component: str
+    bottleneck_severity: str
+
+
+class UpgradeResult(BaseModel):
+    current_fps: float
+    bottleneck_component: str
+    bottleneck_severity: str
+    goal: str
+    candidates_scored: int
+    upgrade: Optional[UpgradeOption]
+    best_value: Optional[UpgradeOption]
+
+
+# BuildSpecs fields a sweep can vary, and the BottleneckCalculator input each one feeds
+SWEEP_FIELDS = {
+    "cpu_benchmark": "cpu_score",
+    "gpu_benchmark": "gpu_score",
+    "ram_gb": "ram_gb",
+    "ram_speed": "ram_speed",
+    "storage_type": "storage_type",
+    "target_resolution": "resolution",
+}
+SWEEP_TEXT_FIELDS = ("storage_type", "target_resolution")
+
+
+class SweepAxis(BaseModel):
+    field: str
+    # Either explicit values, or an evenly spaced numeric range from start to stop
+    values: Optional[list[Union[float, str]]] = None
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = 20
+
+
+class SweepRequest(BaseModel):
+    build: BuildSpecs
+    axes: list[SweepAxis]
+
+
+class SweepAxisValues(BaseModel):
+    field: str
+    values: list[Union[float, str]]
+
+
+class SweepResult(BaseModel):
+    axes: list[SweepAxisValues]
+    # A curve for one axis, a heatmap (rows follow the first axis) for two
+    predicted_fps: Union[list[float], list[list[float]]]
+    bottleneck_component: Union[list[str], list[list[str]]]
+    bottleneck_severity: Union[list[str], list[list[str]]]
+    # Per-game FPS grids, shaped like predicted_fps, from a multi-output model
+    game_fps: dict[str, Union[list[float], list[list[float]]]] = {}
+
+
+class ModelStatus(BaseModel):
+    state: str
+    load_seconds: Optional[float]
+    version: Optional[str]
+    error: Optional[str]
 
 
 class HealthCheck(BaseModel):
     status: str
-    ml_models_loaded: bool
     version: str
+    models: dict[str, ModelStatus]
+
+
+class ReadinessCheck(BaseModel):
+    ready: bool
+    models: dict[str, ModelStatus]
+
+
+class DeployRequest(BaseModel):
+    version: str
+
+
+def _to_fps_prediction(
+    perf_result: dict, integrity_result: dict, model_version: Optional[str], degraded: bool = False
+) -> FPSPrediction:
+    return FPSPrediction(
+        **perf_result,
+        integrity_score=integrity_result["score"],
+        integrity_status=integrity_result["status"],
+        integrity_warnings=integrity_result["warnings"],
+        integrity_notes=integrity_result["notes"],
+        model_version=model_version,
+        degraded=degraded
+    )
+
+
+def _catalog_row(catalog: PartsCatalog, category: str, key: Optional[str]) -> Optional[int]:
+    """Catalog row of a named part; parts the catalog does not know are left unchecked"""
+    if key is None:
+        return None
+    try:
+        return catalog.find(category, key)
+    except KeyError:
+        return None
+
+
+# Catalog categories of the optional *_part columns of a build
+PART_CATEGORIES = ("cpu", "motherboard", "ram", "case")
+
+
+def _build_columns(builds: list[BuildSpecs]) -> dict:
+    """BuildSpecs fields as columns, the layout the scoring functions take"""
+    return {name: [getattr(b, name) for b in builds] for name in BuildSpecs.model_fields}
+
+
+def _decode_build_columns(body: bytes) -> dict:
+    """
+    Columns of a columnar /predict/fps/batch body, checked against BuildSpecs.
+    Numbers stay NumPy views of the body; strings stay dictionary-encoded.
+    """
+    try:
+        columns, _ = columnar.decode(body)
+    except columnar.ColumnarError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    builds = {}
+    for name, field in BuildSpecs.model_fields.items():
+        column = columns.get(name)
+        if column is None:
+            if field.is_required():
+                raise HTTPException(status_code=422, detail=f"Missing column '{name}'")
+            continue
+        if field.annotation in (int, float):
+            kinds = "iu" if field.annotation is int else "iuf"
+            if not isinstance(column, np.ndarray) or column.dtype.kind not in kinds:
+                raise HTTPException(status_code=422, detail=f"Column '{name}' must be {field.annotation.__name__}")
+            if column.dtype.kind == "f" and not np.isfinite(column).all():
+                raise HTTPException(status_code=422, detail=f"Column '{name}' has non-finite values")
+            builds[name] = column
+        else:
+            if not isinstance(column, columnar.Strings) or (field.is_required() and (column.codes < 0).any()):
+                raise HTTPException(status_code=422, detail=f"Column '{name}' must be strings without nulls")
+            builds[name] = column
+    return builds
+
+
+def _compatibility_columns(columns: dict) -> Optional[dict]:
+    """Compatibility checks for builds that name their catalog parts, one check per distinct part set"""
+    parts = [columnar.Strings.encode(columns.get(f"{category}_part") or []) for category in PART_CATEGORIES]
+    if all(not len(part) or (part.codes < 0).all() for part in parts):
+        return None
+    catalog = parts_catalog.current
+    catalog.ensure_loaded()
+    n_builds = len(columns["cpu_benchmark"])
+    rows = np.full((len(PART_CATEGORIES), n_builds), -1, dtype=np.int64)
+    for k, (category, part) in enumerate(zip(PART_CATEGORIES, parts)):
+        if len(part):
+            # Unknown parts and nulls (code -1, the appended entry) go unchecked
+            lookup = [_catalog_row(catalog, category, key) for key in part.categories]
+            rows[k] = np.array([-1 if row is None else row for row in lookup] + [-1])[part.codes]
+    combinations, inverse = np.unique(rows, axis=1, return_inverse=True)
+    checks = [
+        catalog.compat.check(**{
+            category: None if row < 0 else row for category, row in zip(PART_CATEGORIES, combination)
+        })
+        for combination in combinations.T.tolist()
+    ]
+    return {
+        key: np.array([check[key] for check in checks], dtype=bool)[inverse.reshape(-1)]
+        for key in COMPATIBILITY_CHECKS
+    }
+
+
+def _score_builds(builds: list[BuildSpecs], approximate: bool = False) -> list[FPSPrediction]:
+    """
+    Predict FPS, bottlenecks and integrity for every build in one vectorized pass;
+    approximate serves degraded predictions (see BottleneckCalculator.predict_batch)
+    """
+    return _score_build_columns(_build_columns(builds), approximate)
+
+
+def _score_build_columns(columns: dict, approximate: bool = False) -> list[FPSPrediction]:
+    """_score_builds for builds given as columns (see _build_columns and _decode_build_columns)"""
+    # One instance for the whole batch, so the reported version is the one that predicted
+    calculator = bottleneck_calculator.current
+    # FPS & Bottleneck
+    perf_results = calculator.predict_batch(
+        cpu_scores=columns["cpu_benchmark"],
+        gpu_scores=columns["gpu_benchmark"],
+        ram_gb=columns["ram_gb"],
+        ram_speed=columns["ram_speed"],
+        storage_types=columns["storage_type"],
+        resolutions=columns["target_resolution"],
+        approximate=approximate
+    )
+    
+    # Build Integrity
+    with model_stages.time("integrity", "", "rules"):
+        integrity_results = integrity_analyzer.analyze_batch(
+            cpu_tdp=columns["cpu_tdp"],
+            gpu_tdp=columns["gpu_tdp"],
+            psu_wattage=columns["psu_wattage"],
+            psu_efficiency=columns["psu_efficiency"],
+            mobo_chipset=columns["mobo_chipset"],
+            cpu_clock=columns["cpu_clock"],
+            compatibility=_compatibility_columns(columns)
+        )
+    
+    return [
+        _to_fps_prediction(perf, integrity, calculator.model_version, degraded=approximate)
+        for perf, integrity in zip(perf_results, integrity_results)
+    ]
+
+
+def _score_build_table(columns: dict) -> tuple[dict, Optional[str]]:
+    """
+    Columnar scoring for binary batch responses: one result column per
+    FPSPrediction field, without building an object per build.
+    Returns the columns and the model version that made them.
+    """
+    calculator = bottleneck_calculator.current
+    perf = calculator.predict_columns(
+        cpu_scores=columns["cpu_benchmark"],
+        gpu_scores=columns["gpu_benchmark"],
+        ram_gb=columns["ram_gb"],
+        ram_speed=columns["ram_speed"],
+        storage_types=columns["storage_type"],
+        resolutions=columns["target_resolution"]
+    )
+    with model_stages.time("integrity", "", "rules"):
+        integrity = integrity_analyzer.analyze_columns(
+            cpu_tdp=columns["cpu_tdp"],
+            gpu_tdp=columns["gpu_tdp"],
+            psu_wattage=columns["psu_wattage"],
+            psu_efficiency=columns["psu_efficiency"],
+            mobo_chipset=columns["mobo_chipset"],
+            cpu_clock=columns["cpu_clock"],
+            compatibility=_compatibility_columns(columns)
+        )
+    table = {
+        "predicted_fps": perf["predicted_fps"],
+        "bottleneck_component": perf["bottleneck_component"],
+        "bottleneck_severity": perf["bottleneck_severity"],
+        "recommendation": perf["recommendation"],
+        "integrity_score": integrity["score"].astype(np.int32),
+        "integrity_status": integrity["status"],
+        "integrity_warnings": columnar.StringLists.encode(integrity["warnings"]),
+        "integrity_notes": columnar.StringLists.encode(integrity["notes"]),
+        # Flattened dict field: one column per component
+        **{f"fps_headroom.{component}": fps for component, fps in perf["fps_headroom"].items()},
+        "attributed_bottleneck": perf["attributed_bottleneck"],
+        **{f"game_fps.{game}": fps for game, fps in perf.get("game_fps", {}).items()},
+    }
+    return table, calculator.model_version
+
+
+def _analyze_parts(parts: list[PartSpec]) -> list[ValueTierResult]:
+    """Assign value tiers to every part with one scaler/K-Means call"""
+    clusterer = value_clusterer.current
+    results = clusterer.analyze_batch(
+        names=[p.name for p in parts],
+        prices=[p.price for p in parts],
+        benchmarks=[p.benchmark_score for p in parts],
+        categories=[p.category for p in parts]
+    )
+    return [ValueTierResult(**result, model_version=clusterer.model_version) for result in results]
+
+
+def _score_part_lines(clusterer: ValueTierClusterer, lines: list[tuple[int, bytes]]) -> bytes:
+    """Validate and tier one chunk of uploaded NDJSON parts; invalid lines are reported in their place"""
+    parts, records = [], []
+    for line_no, line in lines:
+        try:
+            parts.append(PartSpec.model_validate_json(line))
+            records.append(None)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'line'}: {err['msg']}" for err in e.errors())
+            records.append({"line": line_no, "error": errors})
+
+    tier_idx, value_score = clusterer.score_batch(
+        [p.price for p in parts], [p.benchmark_score for p in parts], [p.category for p in parts]
+    )
+    scored = iter(zip(parts, tier_idx.tolist(), value_score.tolist()))
+    for i, record in enumerate(records):
+        if record is None:
+            part, tier, score = next(scored)
+            records[i] = {
+                "name": part.name, "category": part.category,
+                "tier": clusterer.tier_labels[tier], "value_score": round(score, 1)
+            }
+    return ndjson.encode(records)
+
+
+def _score_catalog_rows(clusterer: ValueTierClusterer, category: str, table, start: int, stop: int) -> bytes:
+    """Tier one chunk of a catalog table"""
+    price = table.price[start:stop]
+    tier_idx, value_score = clusterer.score_batch(price, table.benchmark[start:stop], [category] * len(price))
+    return ndjson.encode([
+        {
+            "id": part_id, "name": name, "category": category, "price": part_price,
+            "tier": clusterer.tier_labels[tier], "value_score": round(score, 1)
+        }
+        for part_id, name, part_price, tier, score in zip(
+            table.ids[start:stop].tolist(), table.names[start:stop].tolist(),
+            price.tolist(), tier_idx.tolist(), value_score.tolist()
+        )
+    ])
+
+
+def _find_similar_parts(
+    category: str,
+    price: float,
+    benchmark: float,
+    k: int,
+    min_price: Optional[float],
+    max_price: Optional[float]
+) -> SimilarPartsResult:
+    """Nearest catalog parts plus the closest cheaper and faster ones"""
+    catalog = parts_catalog.current
+    catalog.ensure_loaded()
+    category = category.lower()
+    index = catalog.index(category)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"Unknown catalog category: {category}")
+
+    rows, _ = index.similar(price, benchmark, k=k, min_price=min_price, max_price=max_price)
+    cheaper, faster = index.cheaper(price, benchmark), index.faster(price, benchmark)
+    return SimilarPartsResult(
+        category=category,
+        similar=[CatalogPart(**catalog.part(category, row)) for row in rows],
+        cheaper_alternative=None if cheaper is None else CatalogPart(**catalog.part(category, cheaper)),
+        faster_alternative=None if faster is None else CatalogPart(**catalog.part(category, faster))
+    )
+
+
+def _find_compatible_parts(
+    category: str,
+    parts: dict[str, Optional[str]],
+    max_price: Optional[float],
+    limit: int
+) -> CompatiblePartsResult:
+    """Catalog parts of a category that work with every given part, cheapest first"""
+    catalog = parts_catalog.current
+    catalog.ensure_loaded()
+    category = category.lower()
+    try:
+        rows = catalog.compat.compatible_rows(
+            category,
+            max_price=max_price,
+            **{c: catalog.find(c, key) for c, key in parts.items() if key is not None}
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=str(e.args[0]))
+    return CompatiblePartsResult(
+        category=category,
+        total=len(rows),
+        parts=[CatalogPart(**catalog.part(category, row)) for row in rows[:limit]]
+    )
+
+
+def _optimize_build(request: OptimizeBuildRequest) -> OptimizeBuildResult:
+    """Run the catalog search and attach part details to each build"""
+    try:
+        result = build_optimizer.optimize(
+            budget=request.budget,
+            resolution=request.target_resolution,
+            pinned=request.pinned,
+            top_k=request.top_k,
+            gpu_tdp=request.gpu_tdp,
+            psu_wattage=request.psu_wattage,
+            psu_efficiency=request.psu_efficiency,
+            mobo_chipset=request.mobo_chipset
+        )
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e.args[0]))
+
+    # Rows belong to the catalog the search ran on, which a delta may since have replaced
+    catalog = result["catalog"]
+    return OptimizeBuildResult(
+        budget=request.budget,
+        target_resolution=request.target_resolution,
+        builds=[
+            OptimizedBuild(
+                parts={category: CatalogPart(**catalog.part(category, row)) for category, row in build["parts"].items()},
+                total_price=build["total_price"],
+                prediction=_to_fps_prediction(build["perf"], build["integrity"], result["model_version"])
+            )
+            for build in result["builds"]
+        ]
+    )
+
+
+def _to_upgrade_option(catalog: PartsCatalog, swap: Optional[dict]) -> Optional[UpgradeOption]:
+    if swap is None:
+        return None
+    return UpgradeOption(
+        category=swap["category"],
+        part=CatalogPart(**catalog.part(swap["category"], swap["row"])),
+        predicted_fps=swap["perf"]["predicted_fps"],
+        fps_gain=swap["fps_gain"],
+        fps_per_dollar=swap["fps_per_dollar"],
+        bottleneck_component=swap["perf"]["bottleneck_component"],
+        bottleneck_severity=swap["perf"]["bottleneck_severity"]
+    )
+
+
+def _suggest_upgrade(request: UpgradeRequest) -> UpgradeResult:
+    """Score every frontier swap for the build and pick the cheapest one meeting the goal"""
+    build = request.build
+    try:
+        result = build_optimizer.cheapest_upgrade(
+            cpu_score=build.cpu_benchmark,
+            gpu_score=build.gpu_benchmark,
+            ram_gb=build.ram_gb,
+            ram_speed=build.ram_speed,
+            storage_type=build.storage_type,
+            resolution=build.target_resolution,
+            target_fps=request.target_fps,
+            category=request.category,
+            max_price=request.max_price
+        )
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e.args[0]))
+
+    return UpgradeResult(
+        current_fps=result["current"]["predicted_fps"],
+        bottleneck_component=result["current"]["bottleneck_component"],
+        bottleneck_severity=result["current"]["bottleneck_severity"],
+        goal=result["goal"],
+        candidates_scored=result["candidates"],
+        upgrade=_to_upgrade_option(result["catalog"], result["upgrade"]),
+        best_value=_to_upgrade_option(result["catalog"], result["best_value"])
+    )
+
+
+def _sweep_values(axis: SweepAxis) -> list:
+    if axis.field not in SWEEP_FIELDS:
+        raise ValueError(f"Cannot sweep '{axis.field}'. Expected one of {tuple(SWEEP_FIELDS)}")
+    if axis.values is not None:
+        values = axis.values
+    elif axis.start is not None and axis.stop is not None and axis.field not in SWEEP_TEXT_FIELDS:
+        values = np.linspace(axis.start, axis.stop, axis.steps).round(2).tolist()
+    else:
+        raise ValueError(f"Axis '{axis.field}' needs values, or start and stop")
+    if not values:
+        raise ValueError(f"Axis '{axis.field}' has no values")
+
+    if axis.field in SWEEP_TEXT_FIELDS:
+        return [str(v) for v in values]
+    if any(isinstance(v, str) for v in values):
+        raise ValueError(f"Axis '{axis.field}' takes numeric values")
+    return values
+
+
+def _sweep(request: SweepRequest) -> SweepResult:
+    """Evaluate the whole what-if grid with one forest call"""
+    try:
+        if not 1 <= len(request.axes) <= 2:
+            raise ValueError("A sweep takes one or two axes")
+        axes = [(axis.field, _sweep_values(axis)) for axis in request.axes]
+        if len({field for field, _ in axes}) != len(axes):
+            raise ValueError("Sweep axes must vary different fields")
+        n_cells = int(np.prod([len(values) for _, values in axes]))
+        if n_cells > config.SWEEP_MAX_CELLS:
+            raise ValueError(f"Sweep has {n_cells} cells; the limit is {config.SWEEP_MAX_CELLS}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    build = request.build.model_dump()
+    grid = bottleneck_calculator.predict_grid(
+        base={name: build[field] for field, name in SWEEP_FIELDS.items()},
+        axes=[(SWEEP_FIELDS[field], values) for field, values in axes]
+    )
+    return SweepResult(
+        axes=[SweepAxisValues(field=field, values=values) for field, values in axes],
+        predicted_fps=grid["predicted_fps"].tolist(),
+        bottleneck_component=grid["bottleneck_component"].tolist(),
+        bottleneck_severity=grid["bottleneck_severity"].tolist(),
+        game_fps={game: fps.tolist() for game, fps in grid.get("game_fps", {}).items()}
+    )
+
+
+def _canonical_build(specs: BuildSpecs) -> BuildSpecs:
+    """Quantize and normalize a build so equivalent requests share one cache entry"""
+    quantum = config.CACHE_SCORE_QUANTUM
+    return specs.model_copy(update={
+        "cpu_benchmark": round(specs.cpu_benchmark / quantum) * quantum,
+        "gpu_benchmark": round(specs.gpu_benchmark / quantum) * quantum,
+        "storage_type": specs.storage_type.strip().lower(),
+        "target_resolution": specs.target_resolution.strip().lower(),
+        "cpu_tdp": float(round(specs.cpu_tdp)),
+        "gpu_tdp": float(round(specs.gpu_tdp)),
+        "psu_wattage": float(round(specs.psu_wattage)),
+        "psu_efficiency": specs.psu_efficiency.strip().lower(),
+        "mobo_chipset": specs.mobo_chipset.strip().lower(),
+        "cpu_clock": round(specs.cpu_clock, 2),
+    })
+
+
+# Model calls run on a bounded thread pool so the event loop stays responsive;
+# concurrent single requests are coalesced into one batched call per window
+scheduler = InferenceScheduler(max_workers=config.INFERENCE_WORKERS)
+fps_batcher = scheduler.batcher(_score_builds, config.MAX_BATCH_SIZE, config.BATCH_WINDOW_MS)
+degraded_fps_batcher = scheduler.batcher(
+    partial(_score_builds, approximate=True), config.MAX_BATCH_SIZE, config.BATCH_WINDOW_MS
+)
+value_batcher = scheduler.batcher(_analyze_parts, config.MAX_BATCH_SIZE, config.BATCH_WINDOW_MS)
+
+# Full /predict/fps responses keyed on the canonical build, dropped whenever the model changes
+prediction_cache = PredictionCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    ttl_seconds=config.CACHE_TTL_SECONDS
+)
+
+
+def _prediction_cache_version() -> str:
+    """
+    Tag of /predict/fps cache entries: the FPS model version plus the catalog
+    version, which the *_part compatibility checks read. Every entry carries
+    both, so a catalog delta drops the cache instead of builds with and
+    without catalog parts evicting each other's tag.
+    """
+    return f"{bottleneck_calculator.model_version}+{parts_catalog.model_version}"
+
+
+def _readiness() -> ReadinessCheck:
+    models = {name: ModelStatus(**model.status()) for name, model in lazy_models.items()}
+    return ReadinessCheck(
+        ready=all(model.is_loaded for model in lazy_models.values()),
+        models=models
+    )
 
 
 # API Endpoints
 @app.get("/", response_model=HealthCheck)
 async def root():
     """Health check endpoint"""
+    readiness = _readiness()
     return HealthCheck(
-        status="healthy",
-        ml_models_loaded=bottleneck_calculator.is_loaded,
-        version="1.1.0"
+        status="healthy" if readiness.ready else "loading",
+        version="1.1.0",
+        models=readiness.models
     )
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and the event loop is responsive"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", response_model=ReadinessCheck)
+async def readiness():
+    """Readiness probe: 503 until every model artifact has loaded"""
+    result = _readiness()
+    if not result.ready:
+        return JSONResponse(status_code=503, content=result.model_dump())
+    return result
+
+
+@app.get("/health/memory")
+async def memory():
+    """RSS of this worker split into shared and private pages, per model artifact file and registry version"""
+    return memory_report(config.MODEL_DIR, model_registry.root)
+
+
 @app.post("/predict/fps", response_model=FPSPrediction)
 async def predict_fps(specs: BuildSpecs):
     """
     Predict FPS, detect bottlenecks, and analyze build integrity.
     """
     try:
-        # FPS & Bottleneck
-        perf_result = bottleneck_calculator.predict(
-            cpu_score=specs.cpu_benchmark,
-            gpu_score=specs.gpu_benchmark,
-            ram_gb=specs.ram_gb,
-            ram_speed=specs.ram_speed,
-            storage_type=specs.storage_type,
-            resolution=specs.target_resolution
-        )
-        
-        # Build Integrity
-        integrity_result = integrity_analyzer.analyze(
-            cpu_tdp=specs.cpu_tdp,
-            gpu_tdp=specs.gpu_tdp,
-            psu_wattage=specs.psu_wattage,
-            psu_efficiency=specs.psu_efficiency,
-            mobo_chipset=specs.mobo_chipset,
-            cpu_clock=specs.cpu_clock
+        # Predictions are computed on the canonical build so a cached answer is
+        # exactly what any request mapping to the same key would have received
+        canonical = _canonical_build(specs)
+        if not bottleneck_calculator.is_loaded:
+            # Load before keying the cache so entries carry the real model version
+            await scheduler.run(bottleneck_calculator.ensure_loaded)
+        key = tuple(canonical.model_dump().values())
+        ticket = current_ticket()
+        if ticket is not None and ticket.degraded:
+            # Overloaded: a cached full answer if there is one, else an approximate one (never cached)
+            found, cached = prediction_cache.get(key, _prediction_cache_version())
+            return cached if found else await degraded_fps_batcher.submit(canonical)
+        return await prediction_cache.get_or_compute(
+            key,
+            _prediction_cache_version(),
+            lambda: fps_batcher.submit(canonical)
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return FPSPrediction(
-            **perf_result, 
-            integrity_score=integrity_result["score"],
-            integrity_status=integrity_result["status"],
-            integrity_warnings=integrity_result["warnings"],
-            integrity_notes=integrity_result["notes"]
-        )
+
+_BATCH_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {
+            "schema": {k: v for k, v in BatchBuildSpecs.model_json_schema(
+                ref_template="#/components/schemas/{model}"
+            ).items() if k != "$defs"}
+        },
+        columnar.MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    },
+}
+
+
+@app.post(
+    "/predict/fps/batch",
+    response_model=BatchFPSPrediction,
+    openapi_extra={"requestBody": _BATCH_REQUEST_BODY},
+    responses={200: {"content": {columnar.MEDIA_TYPE: {}}}}
+)
+async def predict_fps_batch(request: Request):
+    """
+    Score many builds at once.
+    All builds go through a single forest call and vectorized bottleneck/integrity rules.
+
+    Large batches can use the binary columnar format (serving/columnar.py) in either
+    direction: send it with Content-Type and/or ask for it with Accept. Columnar
+    input is decoded straight into arrays, and columnar output is built from
+    result arrays, skipping per-build pydantic objects.
+    """
+    try:
+        body = await request.body()
+        if request.headers.get("content-type", "").startswith(columnar.MEDIA_TYPE):
+            columns = _decode_build_columns(body)
+        else:
+            try:
+                batch = BatchBuildSpecs.model_validate_json(body)
+            except ValidationError as e:
+                raise RequestValidationError(
+                    [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)], body=body
+                )
+            columns = _build_columns(batch.builds)
+
+        if columnar.accepts(request.headers.get("accept")):
+            table, model_version = await scheduler.run(_score_build_table, columns)
+            return Response(
+                columnar.encode(table, {"model_version": model_version}),
+                media_type=columnar.MEDIA_TYPE,
+                headers={"X-Model-Version": model_version or ""}
+            )
+        if not len(columns["cpu_benchmark"]):
+            return BatchFPSPrediction(predictions=[])
+        return BatchFPSPrediction(predictions=await scheduler.run(_score_build_columns, columns))
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict/fps/sweep", response_model=SweepResult)
+async def predict_fps_sweep(request: SweepRequest):
+    """
+    What-if FPS curves (one axis) or heatmaps (two axes) around a base build.
+    The full grid is a single feature matrix evaluated in one forest call.
+    """
+    try:
+        return await scheduler.run(_sweep, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/optimize/build", response_model=OptimizeBuildResult)
+async def optimize_build(request: OptimizeBuildRequest):
+    """
+    Best catalog builds for a budget and target resolution.
+    Dominated parts are pruned per category and all remaining combinations are scored in one batch.
+    """
+    try:
+        return await scheduler.run(_optimize_build, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/optimize/upgrade", response_model=UpgradeResult)
+async def optimize_upgrade(request: UpgradeRequest):
+    """
+    Cheapest catalog part that removes the build's bottleneck or reaches a target FPS.
+    Also returns the swap with the most FPS gained per dollar.
+    """
+    try:
+        return await scheduler.run(_suggest_upgrade, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters for the /predict/fps result cache"""
+    return prediction_cache.stats()
+
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """In-flight requests, queue depth, shed and degraded counts per admitted endpoint"""
+    return admission.stats()
+
+
+@metrics.collector
+def _serving_state() -> list:
+    """Model versions, cache counters, thread pool sizes and admission queues, read at scrape time"""
+    cache = prediction_cache.stats()
+    threads = policy_status()
+    endpoints = admission.stats()
+    models = [
+        ((name, model.model_version or "", model.load_state), 1)
+        for name, model in lazy_models.items()
+    ]
+    return [
+        ("siliconsage_model_info", "gauge", "Served model versions and load state",
+         gauge_samples("siliconsage_model_info", ("model", "version", "state"), models)),
+        ("siliconsage_inference_engine_info", "gauge", "Forest inference engine in use",
+         gauge_samples("siliconsage_inference_engine_info", ("engine",), [((bottleneck_calculator.engine,), 1)])),
+        ("siliconsage_prediction_cache_lookups", "counter", "/predict/fps cache lookups by result",
+         gauge_samples("siliconsage_prediction_cache_lookups_total", ("result",), [
+             (("hit",), cache["hits"]), (("miss",), cache["misses"]), (("deduplicated",), cache["deduplicated"])
+         ])),
+        ("siliconsage_prediction_cache_entries", "gauge", "Entries in the /predict/fps cache",
+         gauge_samples("siliconsage_prediction_cache_entries", (), [((), cache["size"])])),
+        ("siliconsage_thread_pool_size", "gauge", "Threads per pool in this worker (inference scheduler, BLAS, OpenMP)",
+         gauge_samples("siliconsage_thread_pool_size", ("pool",), [
+             (("inference",), config.INFERENCE_WORKERS), *(((name,), size) for name, size in threads["pools"].items())
+         ])),
+        ("siliconsage_worker_cpus", "gauge", "CPUs this worker may run on",
+         gauge_samples("siliconsage_worker_cpus", (), [((), len(threads["cpus"]))])),
+        ("siliconsage_model_swaps", "counter", "Model versions swapped in, by deploy or rollback",
+         gauge_samples("siliconsage_model_swaps_total", ("model", "kind"), [
+             ((name, kind), count)
+             for name, managed in model_manager.models.items() for kind, count in managed.swaps.items()
+         ])),
+        ("siliconsage_admission_in_flight", "gauge", "Admitted requests running, by endpoint",
+         gauge_samples("siliconsage_admission_in_flight", ("endpoint",), [
+             ((path,), stats["in_flight"]) for path, stats in endpoints.items()
+         ])),
+        ("siliconsage_admission_queue_depth", "gauge", "Requests waiting for an in-flight slot, by endpoint",
+         gauge_samples("siliconsage_admission_queue_depth", ("endpoint",), [
+             ((path,), stats["queue_depth"]) for path, stats in endpoints.items()
+         ])),
+        ("siliconsage_admission_shed", "counter", "Requests rejected (queue_full: 503) or dropped (deadline: 504)",
+         gauge_samples("siliconsage_admission_shed_total", ("endpoint", "reason"), [
+             ((path, reason), count) for path, stats in endpoints.items() for reason, count in stats["shed"].items()
+         ])),
+        ("siliconsage_admission_degraded", "counter", "Requests served in degraded mode, by endpoint",
+         gauge_samples("siliconsage_admission_degraded_total", ("endpoint",), [
+             ((path,), stats["degraded"]) for path, stats in endpoints.items()
+         ])),
+    ]
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request, stage and model metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _check_admin_token(token: Optional[str]):
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set SILICONSAGE_ADMIN_TOKEN")
+    if token is None or not hmac.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _manager_call(action, *args) -> dict:
+    """Run a model manager action, mapping its errors to HTTP status codes"""
+    try:
+        return action(*args)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/models")
+async def admin_models(x_admin_token: Optional[str] = Header(default=None)):
+    """Served, previous and active version of each model, its registry versions and the last deploy job"""
+    _check_admin_token(x_admin_token)
+    return await scheduler.run(model_manager.status)
+
+
+@app.post("/admin/models/{name}/deploy", status_code=202)
+async def admin_deploy(name: str, request: DeployRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Load a registry version in the background, warm it up and swap it in.
+    Requests keep being served by the current version until the swap; poll
+    GET /admin/models for the job state.
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        return await scheduler.run(_manager_call, model_manager.deploy, name, request.version)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/admin/models/{name}/rollback")
+async def admin_rollback(name: str, x_admin_token: Optional[str] = Header(default=None)):
+    """Return to the previously active version; instant while that version is still in memory"""
+    _check_admin_token(x_admin_token)
+    try:
+        return await scheduler.run(_manager_call, model_manager.rollback, name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/admin/catalog")
+async def admin_catalog(x_admin_token: Optional[str] = Header(default=None)):
+    """Served catalog version, delta and follow counts, and the last delta applied through this worker"""
+    _check_admin_token(x_admin_token)
+    return catalog_updater.status()
+
+
+@app.post("/admin/catalog/delta")
+async def admin_catalog_delta(request: Request, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Apply changed catalog rows keyed by part id, in tables named as in
+    supabase/schema.sql: {"cpus": [{"id": "...", "price": 189.99}], ...}.
+    Only those rows and the aggregates and indexes over them are recomputed;
+    the new snapshot is published to every worker and swapped in here.
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        try:
+            delta = parse_delta(await request.json())
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return await scheduler.run(catalog_updater.apply, delta)
+    except HTTPException:
+        raise
+    except DeltaError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -137,13 +1171,112 @@ async def analyze_value_tier(part: PartSpec):
     Returns the tier and similar parts for upsell/downsell suggestions.
     """
     try:
-        result = value_clusterer.analyze(
-            name=part.name,
-            price=part.price,
-            benchmark=part.benchmark_score,
-            category=part.category
+        return await value_batcher.submit(part)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/analyze/value-tier/stream")
+async def stream_value_tiers(request: Request):
+    """
+    Tier an uploaded NDJSON list of parts (one PartSpec per line).
+    Lines are scored in fixed-size vectorized chunks as they arrive and results
+    stream back as NDJSON in input order; invalid lines yield {"line", "error"}.
+    """
+    try:
+        # One model version for the whole stream, even if a new one is swapped in meanwhile
+        clusterer = value_clusterer.current
+        await scheduler.run(clusterer.ensure_loaded)
+
+        async def results():
+            try:
+                lines = ndjson.read_lines(request.stream(), config.STREAM_MAX_LINE_BYTES)
+                async for chunk in ndjson.chunked(lines, config.STREAM_CHUNK_SIZE):
+                    yield await scheduler.run(_score_part_lines, clusterer, chunk)
+            except Exception as e:
+                # Headers are already sent, so the failure ends the stream as its last line
+                yield ndjson.encode([{"error": str(e)}])
+
+        return ndjson.DuplexStreamingResponse(results(), headers={"X-Model-Version": clusterer.model_version})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/analyze/value-tier/stream")
+async def stream_catalog_value_tiers(category: Optional[str] = None):
+    """
+    Re-tier the catalog (one category, or all of them) with the served value tier
+    model, streamed as NDJSON in fixed-size vectorized chunks.
+    """
+    try:
+        clusterer, catalog = value_clusterer.current, parts_catalog.current
+        await scheduler.run(catalog.ensure_loaded)
+        categories = list(catalog.snapshot.tables) if category is None else [category.lower()]
+        if any(catalog.table(c) is None for c in categories):
+            raise HTTPException(status_code=404, detail=f"Unknown catalog category: {category}")
+
+        async def results():
+            try:
+                for name in categories:
+                    table = catalog.table(name)
+                    for start in range(0, len(table), config.STREAM_CHUNK_SIZE):
+                        stop = min(start + config.STREAM_CHUNK_SIZE, len(table))
+                        yield await scheduler.run(_score_catalog_rows, clusterer, name, table, start, stop)
+            except Exception as e:
+                yield ndjson.encode([{"error": str(e)}])
+
+        return StreamingResponse(
+            results(), media_type=ndjson.MEDIA_TYPE, headers={"X-Model-Version": clusterer.model_version}
         )
-        return ValueTierResult(**result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/parts/similar", response_model=SimilarPartsResult)
+async def similar_parts(
+    category: str,
+    price: float,
+    benchmark: float,
+    k: int = 5,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+):
+    """
+    Nearest catalog parts to a price/benchmark point, for upsell/downsell suggestions.
+    Optionally restricted to a price band.
+    """
+    try:
+        return await scheduler.run(_find_similar_parts, category, price, benchmark, k, min_price, max_price)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/parts/compatible", response_model=CompatiblePartsResult)
+async def compatible_parts(
+    category: str,
+    cpu: Optional[str] = None,
+    motherboard: Optional[str] = None,
+    ram: Optional[str] = None,
+    case: Optional[str] = None,
+    max_price: Optional[float] = None,
+    limit: int = 50
+):
+    """
+    Catalog parts of a category (cpu, motherboard, ram or case) compatible with the
+    given parts (ids or exact names) by socket, DDR generation and form factor,
+    cheapest first and optionally under max_price.
+    """
+    try:
+        parts = {"cpu": cpu, "motherboard": motherboard, "ram": ram, "case": case}
+        return await scheduler.run(_find_compatible_parts, category, parts, max_price, limit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
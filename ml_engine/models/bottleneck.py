@@ -4,98 +4,406 @@ Uses RandomForestRegressor to predict FPS and detect component bottlenecks
 """
 
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
-import joblib
+import logging
 import os
+import threading
+import time
+from typing import TYPE_CHECKING
 
+from .forest_engine import FlatForest, check_parity
+from .lattice import LATTICE_FILE, FPSLattice
+from .loading import LazyModel, dump_artifact, file_fingerprint, load_artifact
 
-class BottleneckCalculator:
-    def __init__(self):
-        self.model: RandomForestRegressor | None = None
-        self.resolution_encoder = LabelEncoder()
-        self.storage_encoder = LabelEncoder()
-        self.is_loaded = False
-        
-        # Initialize with default encodings
-        self.resolution_encoder.fit(["1080p", "1440p", "4k"])
-        self.storage_encoder.fit(["hdd", "ssd", "nvme"])
-        
-        # Try to load pre-trained model, otherwise initialize with synthetic data
-        self._initialize_model()
-    
-    def _initialize_model(self):
-        """Initialize or load the model"""
-        model_path = os.path.join(os.path.dirname(__file__), "bottleneck_model.joblib")
-        
-        if os.path.exists(model_path):
-            try:
-                self.model = joblib.load(model_path)
-                self.is_loaded = True
-                return
-            except Exception:
-                pass
-        
-        # Train with synthetic data for initial deployment
-        self._train_synthetic()
-    
-    def _train_synthetic(self):
-        """Train model with synthetic benchmark data"""
-        np.random.seed(42)
-        n_samples = 1000
-        
-        # Generate synthetic training data
-        # CPU scores: 5000-50000 (PassMark style)
-        cpu_scores = np.random.uniform(5000, 50000, n_samples)
-        # GPU scores: 3000-30000 (3DMark style)
-        gpu_scores = np.random.uniform(3000, 30000, n_samples)
-        # RAM: 8-64 GB
-        ram_gb = np.random.choice([8, 16, 32, 64], n_samples)
-        # RAM Speed: 2400-6000 MHz
-        ram_speed = np.random.choice([2400, 3200, 3600, 4800, 6000], n_samples)
-        # Storage: 0=HDD, 1=SSD, 2=NVMe
-        storage = np.random.choice([0, 1, 2], n_samples)
-        # Resolution: 0=1080p, 1=1440p, 2=4K
-        resolution = np.random.choice([0, 1, 2], n_samples)
-        
-        # Calculate synthetic FPS based on realistic relationships
-        # GPU is primary driver, CPU matters more at low resolutions
-        resolution_factor = np.array([1.0, 0.65, 0.35])[resolution]
-        cpu_factor = np.array([0.3, 0.2, 0.1])[resolution]  # CPU matters less at higher res
-        
-        base_fps = (
-            (gpu_scores / 300) * resolution_factor +  # GPU primary driver
-            (cpu_scores / 1000) * cpu_factor +  # CPU secondary
-            (ram_gb / 16) * 5 +  # RAM impact
-            (ram_speed / 1000) * 2 +  # RAM speed minor impact
-            storage * 3  # Storage minimal impact on FPS
-        )
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestRegressor
+
+logger = logging.getLogger(__name__)
+
+# "sklearn" calls RandomForestRegressor.predict, "compiled" walks the exported FlatForest,
+# "lattice" interpolates a precomputed FPSLattice and walks the FlatForest for uncovered rows
+ENGINES = ("sklearn", "compiled", "lattice")
+
+MODEL_FILE = "bottleneck_model.joblib"
+FLAT_FOREST_FILE = "bottleneck_forest.joblib"
+
+FEATURE_NAMES = ["cpu_score", "gpu_score", "ram_gb", "ram_speed", "storage", "resolution"]
+STORAGE_CODES = {"hdd": 0, "ssd": 1, "nvme": 2}
+RESOLUTION_CODES = {"1080p": 0, "1440p": 1, "4k": 2}
+# Inputs and encodings a model version was trained against; recorded in the model registry
+FEATURE_SCHEMA = {
+    "features": FEATURE_NAMES,
+    "storage_codes": STORAGE_CODES,
+    "resolution_codes": RESOLUTION_CODES,
+    "target": "fps",
+}
+IDEAL_RATIOS = {"1080p": 0.6, "1440p": 0.5, "4k": 0.4}
+
+# Attribution perturbs each component by one upgrade step and measures the FPS it adds
+ATTRIBUTED_COMPONENTS = ("CPU", "GPU", "RAM")
+ATTRIBUTION_SCORE_STEP = 0.25  # CPU/GPU benchmark score +25%
+RAM_STEPS = np.array([8, 16, 32, 64])  # RAM moves to the next size up
+# Smallest FPS gain that counts as a component holding the build back
+ATTRIBUTION_MIN_GAIN = 1.0
+
+# Per-game FPS profiles for multi-output models: how much the game leans on the GPU and CPU
+# relative to the generic FPS, an overall FPS scale and the engine's frame cap. A model trained
+# with games predicts [fps, *game fps] from one forest (see synthetic_training_data)
+GAME_PROFILES = {
+    "cs2": {"gpu": 0.6, "cpu": 2.5, "scale": 1.8, "max_fps": 500},
+    "valorant": {"gpu": 0.5, "cpu": 2.0, "scale": 2.2, "max_fps": 500},
+    "fortnite": {"gpu": 1.0, "cpu": 1.0, "scale": 1.2, "max_fps": 300},
+    "cyberpunk2077": {"gpu": 1.3, "cpu": 0.5, "scale": 0.55, "max_fps": 144},
+    "rdr2": {"gpu": 1.2, "cpu": 0.6, "scale": 0.65, "max_fps": 144},
+}
+
+# predict() inputs, in FEATURE_NAMES order; predict_grid axes are named after these
+INPUT_NAMES = ["cpu_score", "gpu_score", "ram_gb", "ram_speed", "storage_type", "resolution"]
+
+# (component, severity, recommendation) for each outcome of _analyze_bottleneck
+BOTTLENECK_CASES = [
+    ("RAM", "moderate", "Upgrade to 16GB+ RAM for {resolution} gaming. Current {ram_gb}GB may cause stuttering."),
+    ("RAM", "severe", "8GB RAM minimum required. Upgrade to 16GB for smooth gaming."),
+    ("CPU", "severe", "Your CPU is limiting GPU performance. Consider upgrading CPU or lowering to {resolution}."),
+    ("CPU", "moderate", "Your CPU is limiting GPU performance. Consider upgrading CPU or lowering to {resolution}."),
+    ("GPU", "severe", "Your GPU is the limiting factor. Upgrade GPU for better frame rates."),
+    ("GPU", "moderate", "Your GPU is the limiting factor. Upgrade GPU for better frame rates."),
+    ("none", "none", "Well-balanced build! All components work efficiently together."),
+    ("CPU", "minor", "Minor CPU limitation detected. Performance impact is minimal."),
+    ("GPU", "minor", "Minor GPU limitation detected. Performance impact is minimal."),
+]
+
+
+def resolve_games(names) -> tuple[str, ...]:
+    """GAME_PROFILES names from a list or comma-separated string; "all" selects every profile"""
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(",")]
+    names = [name for name in names if name]
+    if names == ["all"]:
+        return tuple(GAME_PROFILES)
+    unknown = [name for name in names if name not in GAME_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown game profiles {unknown}. Expected some of {list(GAME_PROFILES)}")
+    return tuple(dict.fromkeys(names))
+
+
+def synthetic_training_data(games: tuple[str, ...] = ()) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Synthetic benchmark data (features in FEATURE_NAMES order, FPS target).
+    
+    With games the target has one column per output: the generic FPS, then
+    each game's FPS from its GAME_PROFILES entry. The generic column is the
+    same with or without games.
+    """
+    np.random.seed(42)
+    n_samples = 1000
+    
+    # Generate synthetic training data
+    # CPU scores: 5000-50000 (PassMark style)
+    cpu_scores = np.random.uniform(5000, 50000, n_samples)
+    # GPU scores: 3000-30000 (3DMark style)
+    gpu_scores = np.random.uniform(3000, 30000, n_samples)
+    # RAM: 8-64 GB
+    ram_gb = np.random.choice([8, 16, 32, 64], n_samples)
+    # RAM Speed: 2400-6000 MHz
+    ram_speed = np.random.choice([2400, 3200, 3600, 4800, 6000], n_samples)
+    # Storage: 0=HDD, 1=SSD, 2=NVMe
+    storage = np.random.choice([0, 1, 2], n_samples)
+    # Resolution: 0=1080p, 1=1440p, 2=4K
+    resolution = np.random.choice([0, 1, 2], n_samples)
+    
+    # Calculate synthetic FPS based on realistic relationships
+    # GPU is primary driver, CPU matters more at low resolutions
+    resolution_factor = np.array([1.0, 0.65, 0.35])[resolution]
+    cpu_factor = np.array([0.3, 0.2, 0.1])[resolution]  # CPU matters less at higher res
+    
+    base_fps = (
+        (gpu_scores / 300) * resolution_factor +  # GPU primary driver
+        (cpu_scores / 1000) * cpu_factor +  # CPU secondary
+        (ram_gb / 16) * 5 +  # RAM impact
+        (ram_speed / 1000) * 2 +  # RAM speed minor impact
+        storage * 3  # Storage minimal impact on FPS
+    )
+    
+    # Add noise
+    fps = base_fps + np.random.normal(0, 5, n_samples)
+    fps = np.clip(fps, 15, 240)  # Reasonable FPS range
+    
+    # Create feature matrix
+    X = np.column_stack([cpu_scores, gpu_scores, ram_gb, ram_speed, storage, resolution])
+    y = fps
+    if games:
+        # Drawn after the generic noise so the generic column does not depend on games
+        gpu_term = (gpu_scores / 300) * resolution_factor
+        cpu_term = (cpu_scores / 1000) * cpu_factor
+        columns = [fps]
+        for game in games:
+            profile = GAME_PROFILES[game]
+            game_fps = profile["scale"] * (
+                base_fps + (profile["gpu"] - 1) * gpu_term + (profile["cpu"] - 1) * cpu_term
+            )
+            game_fps = game_fps + np.random.normal(0, 5 * profile["scale"], n_samples)
+            columns.append(np.clip(game_fps, 15, profile["max_fps"]))
+        y = np.column_stack(columns)
+    return X, y
+
+
+def train_synthetic_model(games: tuple[str, ...] = ()) -> "RandomForestRegressor":
+    """Train model with synthetic benchmark data, multi-output with games"""
+    from sklearn.ensemble import RandomForestRegressor
+    
+    X, y = synthetic_training_data(games)
+    
+    # Train model
+    model = RandomForestRegressor(
+        n_estimators=100,
+        max_depth=15,
+        random_state=42,
+        n_jobs=-1
+    )
+    model.fit(X, y)
+    # n_jobs is pickled with the model; serving sets its own (see BottleneckCalculator)
+    model.n_jobs = None
+    if games:
+        model.games_ = tuple(games)
+    return model
+
+
+def export_artifacts(model: "RandomForestRegressor", model_dir: str, lattice_size: int = 0) -> dict:
+    """
+    Write the flat-array export of the forest saved in model_dir, and with a
+    lattice_size the FPSLattice tabulated on a lattice_size x lattice_size grid.
+    
+    The flat export is only written if it reproduces model.predict exactly.
+    Returns a summary of what was written, including the lattice's error report.
+    """
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    model_version = file_fingerprint(model_path)
+    
+    flat_forest = FlatForest.from_sklearn(model)
+    max_error = check_parity(model, flat_forest)
+    if max_error != 0.0:
+        raise RuntimeError(f"Compiled forest differs from sklearn by {max_error:g}")
+    
+    games = list(getattr(model, "games_", ()))
+    flat_path = os.path.join(model_dir, FLAT_FOREST_FILE)
+    dump_artifact({**flat_forest.to_arrays(), "model_version": model_version, "games": games}, flat_path)
+    
+    summary = {
+        "model_version": model_version,
+        "games": games,
+        "n_nodes": len(flat_forest.value),
+        "max_depth": flat_forest.max_depth,
+        "model_bytes": os.path.getsize(model_path),
+        "flat_forest_bytes": os.path.getsize(flat_path),
+    }
+    
+    if lattice_size:
+        lattice = FPSLattice.build(flat_forest, model.predict, lattice_size)
+        report = lattice.error_report(flat_forest)
+        lattice_path = os.path.join(model_dir, LATTICE_FILE)
+        dump_artifact({**lattice.to_arrays(), "model_version": model_version, "error": report}, lattice_path)
+        summary["lattice"] = report
+    return summary
+
+
+def map_strings(values, fn, dtype) -> np.ndarray:
+    """
+    fn applied to every string of an input column. Dictionary-encoded columns
+    (codes plus categories, like serving.columnar.Strings) call it once per
+    distinct value instead of once per row.
+    """
+    if hasattr(values, "categories"):
+        return np.array([fn(v) for v in values.categories], dtype=dtype)[values.codes]
+    return np.array([fn(v) for v in values], dtype=dtype)
+
+
+def _dictionary(values) -> tuple[np.ndarray, list]:
+    """(codes, categories) of a string column"""
+    if hasattr(values, "categories"):
+        return values.codes, values.categories
+    index: dict = {}
+    codes = np.array([index.setdefault(v, len(index)) for v in values], dtype=np.int64)
+    return codes, list(index)
+
+
+class BottleneckCalculator(LazyModel):
+    def __init__(
+        self,
+        engine: str = "sklearn",
+        model_dir: str | None = None,
+        n_jobs: int | None = None,
+        approximate: bool = False,
+        compiled_max_rows: int = 0
+    ):
+        super().__init__()
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}'. Expected one of {ENGINES}")
         
-        # Add noise
-        fps = base_fps + np.random.normal(0, 5, n_samples)
-        fps = np.clip(fps, 15, 240)  # Reasonable FPS range
+        self.model: "RandomForestRegressor | None" = None
+        self.flat_forest: FlatForest | None = None
+        self.lattice: FPSLattice | None = None
+        self.lattice_version: str | None = None
+        self.lattice_error: dict | None = None
+        # Game names of a multi-output model's extra outputs, in output order (empty: FPS only)
+        self.games: tuple[str, ...] = ()
+        self.engine = engine
+        self.model_dir = model_dir or os.path.dirname(__file__)
+        # Threads the sklearn engine's predict may use, overriding whatever the artifact was trained with
+        self.n_jobs = n_jobs
+        # Also map the lattice with other engines, for predict_batch(approximate=True) under overload
+        self.approximate = approximate
+        # Larger forest calls go to the sklearn model: the flat walk costs more per row than
+        # sklearn's C loop and only wins on small batches (0: always use the flat forest)
+        self.compiled_max_rows = compiled_max_rows
+        self._model_lock = threading.Lock()
+    
+    def _load(self):
+        """
+        Load pre-built artifacts (see build_artifacts.py).
         
-        # Create feature matrix
-        X = np.column_stack([cpu_scores, gpu_scores, ram_gb, ram_speed, storage, resolution])
-        y = fps
+        The compiled engine only needs the memory-mapped flat forest, so sklearn
+        is not imported and the pickled trees are never deserialized.
+        """
+        model_path = os.path.join(self.model_dir, MODEL_FILE)
+        flat_path = os.path.join(self.model_dir, FLAT_FOREST_FILE)
         
-        # Train model
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=15,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.model.fit(X, y)
-        self.is_loaded = True
+        if self.engine == "lattice" or self.approximate:
+            self._load_lattice()
+        
+        if self.engine in ("compiled", "lattice") and os.path.exists(flat_path):
+            arrays = load_artifact(flat_path)
+            self.flat_forest = FlatForest.from_arrays(arrays)
+            self.model_version = arrays["model_version"]
+            self.games = tuple(arrays.get("games", ()))
+            self._check_lattice_version()
+            return
+        
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{MODEL_FILE} not found in {self.model_dir}. Run `python build_artifacts.py` first."
+            )
         
-        # Save model
-        try:
-            model_path = os.path.join(os.path.dirname(__file__), "bottleneck_model.joblib")
-            joblib.dump(self.model, model_path)
-        except Exception:
-            pass  # Non-critical if save fails
+        self.model = load_artifact(model_path)
+        self.model.n_jobs = self.n_jobs
+        self.model_version = file_fingerprint(model_path)
+        self.games = tuple(getattr(self.model, "games_", ()))
+        if self.engine in ("compiled", "lattice"):
+            self._compile_model()
+        self._check_lattice_version()
     
+    def _load_lattice(self):
+        """Memory-map the lattice, or fall back to the compiled engine without one"""
+        lattice_path = os.path.join(self.model_dir, LATTICE_FILE)
+        if not os.path.exists(lattice_path):
+            if self.engine == "lattice":
+                logger.warning("%s not found in %s; using the compiled engine", LATTICE_FILE, self.model_dir)
+                self.engine = "compiled"
+            return
+        arrays = load_artifact(lattice_path)
+        self.lattice = FPSLattice.from_arrays(arrays)
+        self.lattice_version = arrays["model_version"]
+        self.lattice_error = arrays["error"]
+    
+    def _check_lattice_version(self):
+        """A lattice tabulated from another model would silently serve stale FPS"""
+        if self.lattice is not None and self.lattice_version != self.model_version:
+            logger.warning(
+                "Lattice was built for model %s, not %s; not using it",
+                self.lattice_version, self.model_version
+            )
+            self.lattice = None
+            if self.engine == "lattice":
+                self.engine = "compiled"
+    
+    def _compile_model(self):
+        """Export the forest into flat arrays, keeping sklearn if the outputs differ"""
+        flat_forest = FlatForest.from_sklearn(self.model)
+        max_error = check_parity(self.model, flat_forest)
+        if max_error != 0.0:
+            logger.warning(
+                "Compiled forest differs from sklearn by %g; using the sklearn engine", max_error
+            )
+            self.engine = "sklearn"
+            return
+        self.flat_forest = flat_forest
+    
+    def _predict_fps(self, features: np.ndarray) -> np.ndarray:
+        """Generic FPS of every row (the first output of a multi-output model)"""
+        return self._split_outputs(self._predict_outputs(features))[0]
+    
+    def _predict_outputs(self, features: np.ndarray) -> np.ndarray:
+        """Run the forest with the selected inference engine; N x (1 + len(games)) with games"""
+        if self.engine == "lattice":
+            return self._lattice_fps(features)
+        if self.engine == "compiled":
+            return self._forest(len(features)).predict(features)
+        return self.model.predict(features)
+    
+    def _forest(self, n_rows: int):
+        """The flat forest, or the sklearn model for calls above compiled_max_rows rows"""
+        if self.flat_forest is None:
+            return self.model
+        if not self.compiled_max_rows or n_rows <= self.compiled_max_rows:
+            return self.flat_forest
+        return self._large_batch_model() or self.flat_forest
+    
+    def _large_batch_model(self) -> "RandomForestRegressor | None":
+        """
+        The sklearn forest the flat one was exported from, loaded on first use.
+        Both give bit-identical predictions (export_artifacts checks it), so the
+        row count only changes the speed.
+        """
+        if self.model is not None:
+            return self.model
+        with self._model_lock:
+            if self.model is None and self.compiled_max_rows:
+                model_path = os.path.join(self.model_dir, MODEL_FILE)
+                if not os.path.exists(model_path) or file_fingerprint(model_path) != self.model_version:
+                    logger.warning(
+                        "%s for model %s not found in %s; large batches stay on the compiled engine",
+                        MODEL_FILE, self.model_version, self.model_dir
+                    )
+                    self.compiled_max_rows = 0
+                    return None
+                model = load_artifact(model_path)
+                model.n_jobs = self.n_jobs
+                self.model = model
+        return self.model
+    
+    def _lattice_fps(self, features: np.ndarray) -> np.ndarray:
+        predicted_fps, covered = self.lattice.lookup(features)
+        if not covered.all():
+            # Out-of-range scores and untabulated RAM sizes/speeds go to the forest
+            uncovered = features[~covered]
+            predicted_fps[~covered] = self._forest(len(uncovered)).predict(uncovered)
+        return predicted_fps
+    
+    def _split_outputs(self, outputs: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        """(generic FPS, N x len(games) game FPS or None) from a forest's output"""
+        if outputs.ndim == 1:
+            return outputs, None
+        return outputs[:, 0], outputs[:, 1:]
+    
+    def encode_features(
+        self,
+        cpu_scores,
+        gpu_scores,
+        ram_gb,
+        ram_speed,
+        storage_types,
+        resolutions
+    ) -> np.ndarray:
+        """Build the N x 6 feature matrix the forest was trained on"""
+        n_rows = len(cpu_scores)
+        features = np.empty((n_rows, len(FEATURE_NAMES)), dtype=np.float64)
+        features[:, 0] = cpu_scores
+        features[:, 1] = gpu_scores
+        features[:, 2] = ram_gb
+        features[:, 3] = ram_speed
+        features[:, 4] = map_strings(storage_types, lambda s: STORAGE_CODES.get(s.lower(), 1), np.float64)
+        features[:, 5] = map_strings(resolutions, lambda r: RESOLUTION_CODES.get(r.lower(), 0), np.float64)
+        return features
+
     def predict(
         self,
         cpu_score: float,
@@ -109,71 +417,313 @@ class BottleneckCalculator:
         Predict FPS and detect bottlenecks.
         
         Returns:
-            dict with predicted_fps, bottleneck_component, bottleneck_severity, recommendation
+            dict with predicted_fps, bottleneck_component, bottleneck_severity, recommendation,
+            fps_headroom (FPS gained by upgrading each component), attributed_bottleneck
+            and, for a multi-output model, game_fps ({game: FPS})
+        """
+        return self.predict_batch(
+            [cpu_score], [gpu_score], [ram_gb], [ram_speed], [storage_type], [resolution]
+        )[0]
+
+    def predict_batch(
+        self,
+        cpu_scores,
+        gpu_scores,
+        ram_gb,
+        ram_speed,
+        storage_types,
+        resolutions,
+        approximate: bool = False
+    ) -> list[dict]:
+        """
+        Predict FPS and detect bottlenecks for N builds with one forest call.
+        
+        The call also scores one perturbed copy of every build per component, so
+        the model-derived attribution costs no extra forest passes.
+        
+        approximate trades accuracy for speed under overload: FPS is interpolated
+        from the lattice when one is loaded (see FPSLattice.error_report for the
+        cost) and the perturbed copies are skipped, so there is no fps_headroom
+        and the bottleneck comes from the score-ratio rules alone.
+        
+        Returns:
+            list of dicts shaped like predict()
         """
-        if not self.is_loaded or self.model is None:
-            raise RuntimeError("Model not loaded")
+        self.ensure_loaded()
         
-        # Encode categorical features
-        storage_encoded = {"hdd": 0, "ssd": 1, "nvme": 2}.get(storage_type.lower(), 1)
-        resolution_encoded = {"1080p": 0, "1440p": 1, "4k": 2}.get(resolution.lower(), 0)
+        if len(cpu_scores) == 0:
+            return []
         
-        # Prepare features
-        features = np.array([[cpu_score, gpu_score, ram_gb, ram_speed, storage_encoded, resolution_encoded]])
+        with self.stage_timer("encode"):
+            features = self.encode_features(
+                cpu_scores, gpu_scores, ram_gb, ram_speed, storage_types, resolutions
+            )
+        predicted_fps, headroom, game_fps = self._predict(features, approximate)
+        with self.stage_timer("bottleneck_analysis"):
+            return self.describe(
+                features, predicted_fps, resolutions, ram_gb, headroom=headroom, game_fps=game_fps
+            )
+    
+    def predict_columns(
+        self,
+        cpu_scores,
+        gpu_scores,
+        ram_gb,
+        ram_speed,
+        storage_types,
+        resolutions
+    ) -> dict:
+        """
+        predict_batch() for columnar callers: the same predictions as one array
+        per field (see describe_columns) instead of a dict per build. String
+        inputs may be dictionary-encoded, see map_strings.
+        """
+        self.ensure_loaded()
+        with self.stage_timer("encode"):
+            features = self.encode_features(
+                cpu_scores, gpu_scores, ram_gb, ram_speed, storage_types, resolutions
+            )
+        predicted_fps, headroom, game_fps = self._predict(features, approximate=False)
+        with self.stage_timer("bottleneck_analysis"):
+            return self.describe_columns(features, predicted_fps, resolutions, headroom, game_fps)
+    
+    def _predict(
+        self, features: np.ndarray, approximate: bool
+    ) -> tuple[np.ndarray, np.ndarray | None, np.ndarray | None]:
+        """
+        FPS of every row, unless approximate each component's upgrade headroom,
+        and for a multi-output model the game FPS (all from the same forest pass)
+        """
+        if approximate:
+            with self.stage_timer("forest_predict"):
+                if self.lattice is not None:
+                    outputs = self._lattice_fps(features)
+                else:
+                    outputs = self._predict_outputs(features)
+            predicted_fps, game_fps = self._split_outputs(outputs)
+            return predicted_fps, None, game_fps
+        # Base rows and their perturbed copies go through the forest together
+        with self.stage_timer("forest_predict"):
+            stacked = self._predict_outputs(self._with_perturbations(features))
+        stacked, game_fps = self._split_outputs(stacked)
+        if game_fps is not None:
+            game_fps = game_fps[:len(features)]
+        # Headroom is measured on the generic FPS only
+        stacked = stacked.reshape(len(ATTRIBUTED_COMPONENTS) + 1, len(features))
+        return stacked[0], stacked[1:] - stacked[0], game_fps
+    
+    def warm_up(self, n_builds: int = 256, rounds: int = 3, seed: int = 0) -> float:
+        """
+        Run synthetic batches through predict_batch so the mapped artifact pages
+        and code paths are hot. Returns the fastest round in seconds.
+        """
+        rng = np.random.default_rng(seed)
+        storage, resolution = list(STORAGE_CODES), list(RESOLUTION_CODES)
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            self.predict_batch(
+                cpu_scores=rng.uniform(5000, 50000, n_builds),
+                gpu_scores=rng.uniform(3000, 30000, n_builds),
+                ram_gb=rng.choice([8, 16, 32, 64], n_builds).tolist(),
+                ram_speed=rng.choice([2400, 3200, 3600, 4800, 6000], n_builds).tolist(),
+                storage_types=[storage[i] for i in rng.integers(0, len(storage), n_builds)],
+                resolutions=[resolution[i] for i in rng.integers(0, len(resolution), n_builds)]
+            )
+            best = min(best, time.perf_counter() - start)
+        return best
+    
+    def _with_perturbations(self, features: np.ndarray) -> np.ndarray:
+        """
+        Stack features with one upgraded copy per ATTRIBUTED_COMPONENTS entry.
         
-        # Predict FPS
-        predicted_fps = float(self.model.predict(features)[0])
+        Returns a (1 + len(ATTRIBUTED_COMPONENTS)) * N matrix: the base rows first,
+        then each perturbed block in ATTRIBUTED_COMPONENTS order.
+        """
+        cpu = features.copy()
+        cpu[:, 0] *= 1 + ATTRIBUTION_SCORE_STEP
+        gpu = features.copy()
+        gpu[:, 1] *= 1 + ATTRIBUTION_SCORE_STEP
+        ram = features.copy()
+        next_step = RAM_STEPS[np.minimum(np.searchsorted(RAM_STEPS, ram[:, 2], side="right"), len(RAM_STEPS) - 1)]
+        ram[:, 2] = np.maximum(ram[:, 2], next_step)
+        return np.vstack([features, cpu, gpu, ram])
+    
+    def predict_fps(self, features: np.ndarray) -> np.ndarray:
+        """Raw FPS for an encoded feature matrix (see encode_features), one forest call"""
+        self.ensure_loaded()
+        return self._predict_fps(features)
+    
+    def describe(
+        self,
+        features: np.ndarray,
+        predicted_fps: np.ndarray,
+        resolutions,
+        ram_gb,
+        headroom: np.ndarray | None = None,
+        game_fps: np.ndarray | None = None
+    ) -> list[dict]:
+        """
+        Bottleneck analysis and formatted results for already-predicted rows.
         
-        # Detect bottleneck by analyzing component balance
-        bottleneck, severity, recommendation = self._analyze_bottleneck(
-            cpu_score, gpu_score, ram_gb, resolution, predicted_fps
+        headroom (len(ATTRIBUTED_COMPONENTS) x N FPS gains from _with_perturbations)
+        adds fps_headroom and attributed_bottleneck to each result, and game_fps
+        (N x len(games)) adds game_fps.
+        """
+        cases = self._analyze_bottleneck(
+            features[:, 0], features[:, 1], features[:, 2], resolutions, predicted_fps
         )
         
-        return {
-            "predicted_fps": round(predicted_fps, 1),
-            "bottleneck_component": bottleneck,
-            "bottleneck_severity": severity,
-            "recommendation": recommendation
-        }
+        if headroom is not None:
+            # The component whose upgrade adds the most FPS, if any adds enough to matter
+            limiting = headroom.argmax(axis=0)
+            limited = headroom.max(axis=0) >= ATTRIBUTION_MIN_GAIN
+        
+        results = []
+        for i, case in enumerate(cases):
+            bottleneck, severity, template = BOTTLENECK_CASES[case]
+            result = {
+                "predicted_fps": round(float(predicted_fps[i]), 1),
+                "bottleneck_component": bottleneck,
+                "bottleneck_severity": severity,
+                "recommendation": template.format(resolution=resolutions[i], ram_gb=ram_gb[i])
+            }
+            if headroom is not None:
+                result["fps_headroom"] = {
+                    component: round(float(headroom[k, i]), 1) for k, component in enumerate(ATTRIBUTED_COMPONENTS)
+                }
+                result["attributed_bottleneck"] = ATTRIBUTED_COMPONENTS[limiting[i]] if limited[i] else "none"
+            if game_fps is not None:
+                result["game_fps"] = {game: round(float(game_fps[i, k]), 1) for k, game in enumerate(self.games)}
+            results.append(result)
+        return results
     
-    def _analyze_bottleneck(
+    def describe_columns(
         self,
-        cpu_score: float,
-        gpu_score: float,
-        ram_gb: int,
-        resolution: str,
-        predicted_fps: float
-    ) -> tuple[str, str, str]:
-        """Analyze component balance to detect bottlenecks"""
+        features: np.ndarray,
+        predicted_fps: np.ndarray,
+        resolutions,
+        headroom: np.ndarray | None = None,
+        game_fps: np.ndarray | None = None
+    ) -> dict:
+        """
+        describe() as columns: predicted_fps, bottleneck_component, bottleneck_severity,
+        recommendation, with headroom fps_headroom ({component: array}) and
+        attributed_bottleneck, and with game_fps game_fps ({game: array}). String
+        fields are NumPy string arrays; each distinct recommendation is formatted once.
+        """
+        cases = self._analyze_bottleneck(
+            features[:, 0], features[:, 1], features[:, 2], resolutions, predicted_fps
+        )
+        components = np.array([case[0] for case in BOTTLENECK_CASES])
+        severities = np.array([case[1] for case in BOTTLENECK_CASES])
         
-        # Expected ratios for balanced systems (GPU:CPU score ratio)
-        # Higher resolution = GPU more important
-        ideal_ratios = {"1080p": 0.6, "1440p": 0.5, "4k": 0.4}
-        ideal_ratio = ideal_ratios.get(resolution.lower(), 0.5)
+        resolution_codes, resolution_names = _dictionary(resolutions)
+        keys = np.stack([cases, resolution_codes, features[:, 2].astype(np.int64)])
+        distinct, inverse = np.unique(keys, axis=1, return_inverse=True)
+        texts = np.array([
+            BOTTLENECK_CASES[case][2].format(resolution=resolution_names[resolution], ram_gb=ram_gb)
+            for case, resolution, ram_gb in distinct.T.tolist()
+        ] or [""])
+        
+        columns = {
+            "predicted_fps": np.round(predicted_fps, 1),
+            "bottleneck_component": components[cases],
+            "bottleneck_severity": severities[cases],
+            "recommendation": texts[inverse.reshape(-1)],
+        }
+        if headroom is not None:
+            columns["fps_headroom"] = {
+                component: np.round(headroom[k], 1) for k, component in enumerate(ATTRIBUTED_COMPONENTS)
+            }
+            limited = headroom.max(axis=0, initial=-np.inf) >= ATTRIBUTION_MIN_GAIN
+            columns["attributed_bottleneck"] = np.where(
+                limited, np.array(ATTRIBUTED_COMPONENTS)[headroom.argmax(axis=0)], "none"
+            )
+        if game_fps is not None:
+            columns["game_fps"] = {game: np.round(game_fps[:, k], 1) for k, game in enumerate(self.games)}
+        return columns
+    
+    def predict_grid(self, base: dict, axes: list[tuple[str, list]]) -> dict:
+        """
+        FPS and bottleneck over every combination of the axis values, with the
+        remaining inputs held at base. The whole grid is one forest call.
+        
+        Args:
+            base: predict() keyword arguments for the fixed inputs
+            axes: (input name, values) pairs, see INPUT_NAMES
         
-        actual_ratio = gpu_score / cpu_score if cpu_score > 0 else 1
+        Returns:
+            dict with predicted_fps, bottleneck_component and bottleneck_severity,
+            each an array shaped like the grid (one dimension per axis), and for a
+            multi-output model game_fps ({game: grid-shaped array})
+        """
+        self.ensure_loaded()
+        for name, _ in axes:
+            if name not in INPUT_NAMES:
+                raise ValueError(f"Cannot sweep '{name}'. Expected one of {INPUT_NAMES}")
         
-        # RAM bottleneck check
-        if ram_gb < 16 and resolution in ["1440p", "4k"]:
-            return "RAM", "moderate", f"Upgrade to 16GB+ RAM for {resolution} gaming. Current {ram_gb}GB may cause stuttering."
+        shape = tuple(len(values) for _, values in axes)
+        cell_index = np.indices(shape).reshape(len(axes), -1)
+        n_cells = cell_index.shape[1]
         
-        if ram_gb < 8:
-            return "RAM", "severe", "8GB RAM minimum required. Upgrade to 16GB for smooth gaming."
+        inputs = {name: [base[name]] * n_cells for name in INPUT_NAMES}
+        for k, (name, values) in enumerate(axes):
+            inputs[name] = np.asarray(values)[cell_index[k]].tolist()
         
-        # CPU vs GPU balance
-        ratio_diff = actual_ratio - ideal_ratio
+        features = self.encode_features(*(inputs[name] for name in INPUT_NAMES))
+        predicted_fps, game_fps = self._split_outputs(self._predict_outputs(features))
+        cases = self._analyze_bottleneck(
+            features[:, 0], features[:, 1], features[:, 2], inputs["resolution"], predicted_fps
+        )
         
-        if ratio_diff > 0.3:  # GPU much stronger than CPU
-            severity = "severe" if ratio_diff > 0.5 else "moderate"
-            return "CPU", severity, f"Your CPU is limiting GPU performance. Consider upgrading CPU or lowering to {resolution}."
+        components = np.array([case[0] for case in BOTTLENECK_CASES])
+        severities = np.array([case[1] for case in BOTTLENECK_CASES])
+        grid = {
+            "predicted_fps": np.round(predicted_fps, 1).reshape(shape),
+            "bottleneck_component": components[cases].reshape(shape),
+            "bottleneck_severity": severities[cases].reshape(shape),
+        }
+        if game_fps is not None:
+            grid["game_fps"] = {
+                game: np.round(game_fps[:, k], 1).reshape(shape) for k, game in enumerate(self.games)
+            }
+        return grid
+    
+    def _analyze_bottleneck(
+        self,
+        cpu_scores: np.ndarray,
+        gpu_scores: np.ndarray,
+        ram_gb: np.ndarray,
+        resolutions,
+        predicted_fps: np.ndarray
+    ) -> np.ndarray:
+        """
+        Analyze component balance to detect bottlenecks.
         
-        if ratio_diff < -0.3:  # CPU much stronger than GPU
-            severity = "severe" if ratio_diff < -0.5 else "moderate"
-            return "GPU", severity, "Your GPU is the limiting factor. Upgrade GPU for better frame rates."
+        Returns an index into BOTTLENECK_CASES for every build.
+        """
+        # Expected ratios for balanced systems (GPU:CPU score ratio)
+        # Higher resolution = GPU more important
+        ideal_ratio = map_strings(resolutions, lambda r: IDEAL_RATIOS.get(r.lower(), 0.5), np.float64)
+        high_res = map_strings(resolutions, lambda r: r in ("1440p", "4k"), bool)
         
-        if abs(ratio_diff) < 0.15:
-            return "none", "none", "Well-balanced build! All components work efficiently together."
+        has_cpu = cpu_scores > 0
+        actual_ratio = np.where(has_cpu, gpu_scores / np.where(has_cpu, cpu_scores, 1.0), 1.0)
+        ratio_diff = actual_ratio - ideal_ratio
         
-        # Minor imbalance
-        bottleneck = "CPU" if ratio_diff > 0 else "GPU"
-        return bottleneck, "minor", f"Minor {bottleneck} limitation detected. Performance impact is minimal."
+        # Conditions are checked in priority order; the first match wins
+        return np.select(
+            [
+                (ram_gb < 16) & high_res,  # RAM bottleneck at high resolutions
+                ram_gb < 8,
+                ratio_diff > 0.5,  # GPU much stronger than CPU
+                ratio_diff > 0.3,
+                ratio_diff < -0.5,  # CPU much stronger than GPU
+                ratio_diff < -0.3,
+                np.abs(ratio_diff) < 0.15,
+                ratio_diff > 0,  # Minor imbalance
+            ],
+            np.arange(8),
+            default=8
+        )
@@ -0,0 +1,154 @@
+"""
+Flat Forest Inference Engine
+Evaluates a fitted RandomForestRegressor from contiguous NumPy node arrays
+"""
+
+import numpy as np
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestRegressor
+
+ARRAY_FIELDS = ("left", "right", "feature", "threshold", "value", "roots")
+
+
+class FlatForest:
+    """
+    All trees of a forest packed into shared node arrays.
+
+    Node ids are global across the forest; roots[t] is the first node of tree t.
+    Leaves point to themselves with an infinite threshold, so every row can take
+    exactly max_depth steps without branching on whether it already hit a leaf.
+
+    A multi-output forest stores one value row per node (value is n_nodes x
+    n_outputs): the traversal is shared and only the leaf gather widens.
+    """
+
+    def __init__(
+        self,
+        left: np.ndarray,
+        right: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int
+    ):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_estimators = len(roots)
+        self.n_outputs = 1 if value.ndim == 1 else value.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, forest: "RandomForestRegressor") -> "FlatForest":
+        """Export the nodes of every fitted tree into contiguous arrays"""
+        trees = [est.tree_ for est in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        n_nodes = int(sizes.sum())
+        n_outputs = forest.n_outputs_
+
+        left = np.empty(n_nodes, dtype=np.intp)
+        right = np.empty(n_nodes, dtype=np.intp)
+        feature = np.empty(n_nodes, dtype=np.intp)
+        threshold = np.empty(n_nodes, dtype=np.float64)
+        value = np.empty((n_nodes, n_outputs) if n_outputs > 1 else n_nodes, dtype=np.float64)
+
+        for tree, offset in zip(trees, offsets):
+            nodes = slice(offset, offset + tree.node_count)
+            own_ids = np.arange(offset, offset + tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            left[nodes] = np.where(is_leaf, own_ids, tree.children_left + offset)
+            right[nodes] = np.where(is_leaf, own_ids, tree.children_right + offset)
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold)
+            value[nodes] = tree.value[:, :, 0] if n_outputs > 1 else tree.value[:, 0, 0]
+
+        return cls(
+            left=left,
+            right=right,
+            feature=feature,
+            threshold=threshold,
+            value=value,
+            roots=offsets.astype(np.intp),
+            max_depth=max(tree.max_depth for tree in trees)
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "FlatForest":
+        """Rebuild from to_arrays() output, e.g. a memory-mapped artifact"""
+        # Plain ndarray views over the memmaps skip np.memmap's Python-level indexing
+        return cls(
+            **{name: np.asarray(arrays[name]) for name in ARRAY_FIELDS},
+            max_depth=arrays["max_depth"]
+        )
+
+    def to_arrays(self) -> dict:
+        return {
+            **{name: getattr(self, name) for name in ARRAY_FIELDS},
+            "max_depth": self.max_depth,
+        }
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Return the (n_samples, n_estimators) matrix of leaf node ids"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_samples) * n_features)[:, None]
+
+        nodes = np.repeat(self.roots[None, :], n_samples, axis=0)
+        for _ in range(self.max_depth):
+            goes_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(goes_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Average the leaf values of all trees, matching RandomForestRegressor.predict:
+        (n_samples,) for one output, (n_samples, n_outputs) for several
+        """
+        leaf_values = np.take(self.value, self.apply(X), axis=0)
+        # cumsum accumulates strictly in estimator order, like sklearn's sequential path
+        return np.cumsum(leaf_values, axis=1, out=leaf_values)[:, -1] / self.n_estimators
+
+
+def check_parity(
+    forest: "RandomForestRegressor",
+    flat: FlatForest,
+    n_samples: int = 512,
+    seed: int = 0
+) -> float:
+    """
+    Compare FlatForest against forest.predict on random inputs.
+
+    Inputs are drawn around the split thresholds of each feature so that every
+    branch gets exercised. Returns the max absolute difference (0.0 means bit-identical).
+    """
+    rng = np.random.default_rng(seed)
+    n_features = forest.n_features_in_
+    X = np.empty((n_samples, n_features))
+    for f in range(n_features):
+        thresholds = flat.threshold[(flat.feature == f) & np.isfinite(flat.threshold)]
+        if len(thresholds) == 0:
+            X[:, f] = rng.normal(size=n_samples)
+            continue
+        low, high = thresholds.min(), thresholds.max()
+        margin = max(high - low, 1.0) * 0.1
+        X[:, f] = rng.uniform(low - margin, high + margin, n_samples)
+
+    # Sequential sklearn path: threaded accumulation can reorder the float sums
+    n_jobs = forest.n_jobs
+    forest.n_jobs = 1
+    try:
+        expected = forest.predict(X)
+    finally:
+        forest.n_jobs = n_jobs
+
+    return float(np.max(np.abs(flat.predict(X) - expected)))
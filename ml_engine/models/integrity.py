@@ -1,11 +1,162 @@
 """
 Build Integrity Calculator
 Uses heuristics to evaluate the balance and reliability of the build.
+The heuristics are a declarative rule table evaluated over whole batches.
 """
 
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable
+
+# Interned strings kept per encoder before its cache is reset
+MAX_INTERNED = 4096
+
+CHIPSET_ENTRY, CHIPSET_MID, CHIPSET_HIGH = 0, 1, 2
+
+
+def _chipset_tier(chipset: str) -> int:
+    # Assuming chipsets: A(Entry), B(Mid), Z/X(High)
+    chipset = chipset.lower()
+    if "z" in chipset or "x" in chipset:
+        return CHIPSET_HIGH
+    if "b" in chipset or "h" in chipset:
+        return CHIPSET_MID
+    return CHIPSET_ENTRY
+
+
+def _premium_efficiency(rating: str) -> int:
+    rating = rating.lower()
+    return int("gold" in rating or "platinum" in rating)
+
+
+class InternedEncoder:
+    """Maps raw strings to a small integer code, classifying each distinct string only once"""
+
+    def __init__(self, classify: Callable[[str], int]):
+        self.classify = classify
+        self.codes: dict[str, int] = {}
+
+    def encode(self, values) -> np.ndarray:
+        if hasattr(values, "categories"):
+            # Dictionary-encoded column: classify its categories, then index by code
+            return self.encode(values.categories)[values.codes]
+        codes = self.codes
+        if len(codes) > MAX_INTERNED:
+            codes.clear()
+        out = np.empty(len(values), dtype=np.int8)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = self.classify(value)
+            out[i] = code
+        return out
+
+
+@dataclass(frozen=True)
+class IntegrityRule:
+    name: str
+    # Boolean mask over the batch, from the derived columns (see IntegrityAnalyzer._columns)
+    when: Callable[[dict], np.ndarray]
+    penalty: int
+    # "warning" or "note"
+    kind: str
+    # Text for build i
+    message: Callable[[dict, int], str]
+    # Only the first matching rule of a group applies to a build
+    group: str | None = None
+
+
+INTEGRITY_RULES = [
+    # 1. Power Supply Analysis
+    IntegrityRule(
+        name="psu_below_load",
+        when=lambda c: c["psu_wattage"] < c["estimated_wattage"],
+        penalty=40,
+        kind="warning",
+        message=lambda c, i: (
+            f"DANGER: PSU {c['psu_wattage_input'][i]}W is below system load ({int(c['estimated_wattage'][i])}W)"
+        ),
+        group="psu_headroom",
+    ),
+    IntegrityRule(
+        name="psu_tight",
+        when=lambda c: c["psu_wattage"] < c["recommended_wattage"],
+        penalty=10,
+        kind="warning",
+        message=lambda c, i: f"PSU headroom is tight. Recommended: {int(c['recommended_wattage'][i])}W+",
+        group="psu_headroom",
+    ),
+    IntegrityRule(
+        name="psu_healthy",
+        when=lambda c: np.ones(c["n_builds"], dtype=bool),
+        penalty=0,
+        kind="note",
+        message=lambda c, i: "Healthy PSU headroom",
+        group="psu_headroom",
+    ),
+    # Minor penalty for non-gold units in high-end builds
+    IntegrityRule(
+        name="psu_efficiency",
+        when=lambda c: (c["psu_premium"] == 0) & (c["estimated_wattage"] > 400),
+        penalty=5,
+        kind="warning",
+        message=lambda c, i: "Consider Gold/Platinum PSU for efficiency at this wattage",
+    ),
+    # 2. Motherboard Tier Analysis
+    IntegrityRule(
+        name="vrm_risk",
+        when=lambda c: c["cpu_high"] & (c["chipset_tier"] == CHIPSET_ENTRY),
+        penalty=15,
+        kind="warning",
+        message=lambda c, i: "High-end CPU on Entry-level Motherboard (VRM throttling risk)",
+        group="motherboard_tier",
+    ),
+    # No stability penalty, but value warning
+    IntegrityRule(
+        name="overkill_motherboard",
+        when=lambda c: c["cpu_entry"] & (c["chipset_tier"] == CHIPSET_HIGH),
+        penalty=0,
+        kind="warning",
+        message=lambda c, i: "Overkill motherboard for this CPU (Value warning)",
+        group="motherboard_tier",
+    ),
+    # 3. Part Compatibility (only known when the build names its catalog parts)
+    IntegrityRule(
+        name="socket_mismatch",
+        when=lambda c: ~c["socket_ok"],
+        penalty=100,
+        kind="warning",
+        message=lambda c, i: "INCOMPATIBLE: CPU does not fit the motherboard socket",
+    ),
+    IntegrityRule(
+        name="memory_mismatch",
+        when=lambda c: ~c["memory_ok"],
+        penalty=100,
+        kind="warning",
+        message=lambda c, i: "INCOMPATIBLE: RAM generation is not supported by the platform",
+    ),
+    IntegrityRule(
+        name="form_factor_mismatch",
+        when=lambda c: ~c["form_factor_ok"],
+        penalty=100,
+        kind="warning",
+        message=lambda c, i: "INCOMPATIBLE: Motherboard does not fit in the case",
+    ),
+]
+
+# Boolean columns callers may supply (see catalog.compatibility.CompatibilityIndex.check)
+COMPATIBILITY_CHECKS = ("socket_ok", "memory_ok", "form_factor_ok")
+
+# (minimum score, status), checked in order; scores below every minimum are "Unstable"
+STATUS_LEVELS = [(90, "Excellent"), (80, "Solid"), (60, "Acceptable")]
+
+
 class IntegrityAnalyzer:
-    def __init__(self):
+    def __init__(self, rules: list[IntegrityRule] | None = None):
         self.is_loaded = True
+        self.rules = list(INTEGRITY_RULES if rules is None else rules)
+        self.chipsets = InternedEncoder(_chipset_tier)
+        self.efficiencies = InternedEncoder(_premium_efficiency)
 
     def analyze(
         self,
@@ -20,57 +171,123 @@ class IntegrityAnalyzer:
         Analyze build integrity.
         Returns score (0-100) and list of warnings.
         """
-        score = 100
-        warnings = []
-        positive_notes = []
-
-        # 1. Power Supply Analysis
-        estimated_wattage = cpu_tdp + gpu_tdp + 50  # +50W for other parts
-        recommended_wattage = estimated_wattage * 1.25 # 25% headroom desirable
-
-        if psu_wattage < estimated_wattage:
-            score -= 40
-            warnings.append(f"DANGER: PSU {psu_wattage}W is below system load ({int(estimated_wattage)}W)")
-        elif psu_wattage < recommended_wattage:
-            score -= 10
-            warnings.append(f"PSU headroom is tight. Recommended: {int(recommended_wattage)}W+")
-        else:
-            positive_notes.append("Healthy PSU headroom")
-
-        # Efficiency penalty
-        if "gold" not in psu_efficiency.lower() and "platinum" not in psu_efficiency.lower():
-             # Minor penalty for non-gold units in high-end builds
-             if estimated_wattage > 400:
-                 score -= 5
-                 warnings.append("Consider Gold/Platinum PSU for efficiency at this wattage")
-
-        # 2. Motherboard Tier Analysis (Simple Heuristic mapping)
-        # Assuming chipsets: A(Entry), B(Mid), Z/X(High)
-        mobo_tier = "entry"
-        if "z" in mobo_chipset.lower() or "x" in mobo_chipset.lower(): mobo_tier = "high"
-        elif "b" in mobo_chipset.lower() or "h" in mobo_chipset.lower(): mobo_tier = "mid"
-        
-        cpu_tier = "mid"
-        if cpu_clock > 4.5 or cpu_tdp > 100: cpu_tier = "high"
-        elif cpu_tdp < 65: cpu_tier = "entry"
-
-        if cpu_tier == "high" and mobo_tier == "entry":
-            score -= 15
-            warnings.append("High-end CPU on Entry-level Motherboard (VRM throttling risk)")
-        elif cpu_tier == "entry" and mobo_tier == "high":
-            # No stability penalty, but value warning
-            warnings.append("Overkill motherboard for this CPU (Value warning)")
-
-        if score < 0: score = 0
-        
-        status = "Solid"
-        if score < 60: status = "Unstable"
-        elif score < 80: status = "Acceptable"
-        elif score >= 90: status = "Excellent"
+        return self.analyze_batch(
+            [cpu_tdp], [gpu_tdp], [psu_wattage], [psu_efficiency], [mobo_chipset], [cpu_clock]
+        )[0]
 
+    def _columns(
+        self,
+        cpu_tdp,
+        gpu_tdp,
+        psu_wattage,
+        psu_efficiency,
+        mobo_chipset,
+        cpu_clock,
+        compatibility=None
+    ) -> dict:
+        """Derived per-build arrays the rules are written against"""
+        tdp = np.asarray(cpu_tdp, dtype=np.float64)
+        compatibility = compatibility or {}
+        clock = np.asarray(cpu_clock, dtype=np.float64)
+        estimated_wattage = tdp + np.asarray(gpu_tdp, dtype=np.float64) + 50  # +50W for other parts
+        cpu_high = (clock > 4.5) | (tdp > 100)
         return {
-            "score": score,
-            "status": status,
-            "warnings": warnings,
-            "notes": positive_notes
+            "n_builds": len(tdp),
+            "psu_wattage": np.asarray(psu_wattage, dtype=np.float64),
+            "psu_wattage_input": psu_wattage,
+            "estimated_wattage": estimated_wattage,
+            "recommended_wattage": estimated_wattage * 1.25,  # 25% headroom desirable
+            "psu_premium": self.efficiencies.encode(psu_efficiency),
+            "chipset_tier": self.chipsets.encode(mobo_chipset),
+            "cpu_high": cpu_high,
+            "cpu_entry": ~cpu_high & (tdp < 65),
+            **{
+                check: np.asarray(compatibility.get(check, np.ones(len(tdp), dtype=bool)), dtype=bool)
+                for check in COMPATIBILITY_CHECKS
+            },
         }
+
+    def evaluate(self, columns: dict) -> tuple[np.ndarray, list[np.ndarray]]:
+        """
+        Apply the rule table to derived columns.
+
+        Returns the 0-100 scores and, per rule, the mask of builds it fired for.
+        """
+        score = np.full(columns["n_builds"], 100)
+        fired = []
+        claimed: dict[str, np.ndarray] = {}
+        for rule in self.rules:
+            mask = rule.when(columns)
+            if rule.group is not None:
+                taken = claimed.get(rule.group, np.zeros(columns["n_builds"], dtype=bool))
+                mask = mask & ~taken
+                claimed[rule.group] = taken | mask
+            score -= rule.penalty * mask
+            fired.append(mask)
+        return np.maximum(score, 0), fired
+
+    def analyze_batch(
+        self,
+        cpu_tdp,
+        gpu_tdp,
+        psu_wattage,
+        psu_efficiency,
+        mobo_chipset,
+        cpu_clock,
+        compatibility: dict | None = None
+    ) -> list[dict]:
+        """
+        Analyze build integrity for N builds at once.
+        Every rule is evaluated as an array operation over the whole batch.
+
+        compatibility optionally maps COMPATIBILITY_CHECKS names to per-build
+        booleans; checks not given pass.
+        """
+        if len(cpu_tdp) == 0:
+            return []
+
+        result = self.analyze_columns(
+            cpu_tdp, gpu_tdp, psu_wattage, psu_efficiency, mobo_chipset, cpu_clock, compatibility
+        )
+        return [
+            {
+                "score": int(result["score"][i]),
+                "status": str(result["status"][i]),
+                "warnings": result["warnings"][i],
+                "notes": result["notes"][i]
+            }
+            for i in range(len(result["score"]))
+        ]
+
+    def analyze_columns(
+        self,
+        cpu_tdp,
+        gpu_tdp,
+        psu_wattage,
+        psu_efficiency,
+        mobo_chipset,
+        cpu_clock,
+        compatibility: dict | None = None
+    ) -> dict:
+        """
+        analyze_batch() as columns: score and status arrays, and per-build
+        warning and note lists. String inputs may be dictionary-encoded.
+        """
+        columns = self._columns(
+            cpu_tdp, gpu_tdp, psu_wattage, psu_efficiency, mobo_chipset, cpu_clock, compatibility
+        )
+        score, fired = self.evaluate(columns)
+        status = np.select(
+            [score >= minimum for minimum, _ in STATUS_LEVELS],
+            [label for _, label in STATUS_LEVELS],
+            default="Unstable"
+        )
+
+        warnings = [[] for _ in range(len(score))]
+        notes = [[] for _ in range(len(score))]
+        for rule, mask in zip(self.rules, fired):
+            messages = warnings if rule.kind == "warning" else notes
+            for i in np.flatnonzero(mask):
+                messages[i].append(rule.message(columns, i))
+
+        return {"score": score, "status": status, "warnings": warnings, "notes": notes}
@@ -0,0 +1,183 @@
+"""
+FPS Lookup Lattice
+The bottleneck forest tabulated offline over a (cpu_score, gpu_score) grid for
+every categorical combination, served by bilinear interpolation
+"""
+
+import itertools
+import numpy as np
+from typing import Callable
+
+from .forest_engine import FlatForest
+
+LATTICE_FILE = "bottleneck_lattice.joblib"
+
+# Feature columns (see bottleneck.FEATURE_NAMES) interpolated over the grid
+CONTINUOUS_FEATURES = (0, 1)
+# Categorical feature columns and the values tabulated for each (the training values)
+LATTICE_CATEGORIES = {
+    2: (8, 16, 32, 64),  # ram_gb
+    3: (2400, 3200, 3600, 4800, 6000),  # ram_speed
+    4: (0, 1, 2),  # storage
+    5: (0, 1, 2),  # resolution
+}
+
+ARRAY_FIELDS = ("grid", "lows", "highs")
+
+
+def _split_thresholds(flat_forest: FlatForest, feature: int) -> np.ndarray:
+    """Sorted distinct thresholds the forest compares a feature against"""
+    splits = (flat_forest.feature == feature) & np.isfinite(flat_forest.threshold)
+    return np.unique(flat_forest.threshold[splits])
+
+
+class FPSLattice:
+    """
+    Forest predictions on a regular grid, one 2-D table per categorical combination.
+
+    A categorical input is mapped to the interval between the forest's split
+    thresholds it falls in; inputs sharing an interval with a tabulated value get
+    exactly that value's table, others are not covered. Continuous inputs are
+    covered between the lowest and highest split threshold and bilinearly
+    interpolated between grid points, where the table matches the forest exactly.
+    A multi-output forest gets a trailing output axis on every table.
+    """
+
+    def __init__(
+        self,
+        grid: np.ndarray,
+        lows: np.ndarray,
+        highs: np.ndarray,
+        thresholds: list[np.ndarray],
+        slots: list[np.ndarray]
+    ):
+        self.grid = grid
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.thresholds = thresholds
+        self.slots = slots
+        self.grid_size = grid.shape[len(LATTICE_CATEGORIES)]
+        self.steps = (self.highs - self.lows) / (self.grid_size - 1)
+
+    @classmethod
+    def build(
+        cls,
+        flat_forest: FlatForest,
+        predict: Callable[[np.ndarray], np.ndarray],
+        grid_size: int,
+        chunk_size: int = 1 << 18
+    ) -> "FPSLattice":
+        """
+        Tabulate predict over the grid. predict is any function returning the
+        forest's output (e.g. the multi-threaded sklearn predict at build time).
+        """
+        thresholds, slots = [], []
+        for feature, values in LATTICE_CATEGORIES.items():
+            feature_thresholds = _split_thresholds(flat_forest, feature)
+            feature_slots = np.full(len(feature_thresholds) + 1, -1, dtype=np.intp)
+            for slot, value in enumerate(values):
+                feature_slots[np.searchsorted(feature_thresholds, np.float32(value), side="left")] = slot
+            thresholds.append(feature_thresholds)
+            slots.append(feature_slots)
+
+        continuous = [_split_thresholds(flat_forest, f) for f in CONTINUOUS_FEATURES]
+        lows = np.array([t.min() for t in continuous])
+        highs = np.array([t.max() for t in continuous])
+        axes = [np.linspace(lo, hi, grid_size) for lo, hi in zip(lows, highs)]
+
+        shape = tuple(len(v) for v in LATTICE_CATEGORIES.values())
+        outputs = flat_forest.value.shape[1:]
+        grid = np.empty(shape + (grid_size, grid_size) + outputs, dtype=np.float32)
+        cpu, gpu = (a.ravel() for a in np.meshgrid(*axes, indexing="ij"))
+
+        # One block of grid_size^2 rows per categorical combination, predicted in chunks
+        combos = list(itertools.product(*(range(n) for n in shape)))
+        per_chunk = max(1, chunk_size // len(cpu))
+        for start in range(0, len(combos), per_chunk):
+            chunk = combos[start:start + per_chunk]
+            X = np.empty((len(chunk) * len(cpu), 6))
+            for k, combo in enumerate(chunk):
+                rows = slice(k * len(cpu), (k + 1) * len(cpu))
+                X[rows, 0] = cpu
+                X[rows, 1] = gpu
+                for (feature, values), index in zip(LATTICE_CATEGORIES.items(), combo):
+                    X[rows, feature] = values[index]
+            fps = predict(X).reshape((len(chunk), grid_size, grid_size) + outputs)
+            for combo, table in zip(chunk, fps):
+                grid[combo] = table
+
+        return cls(grid, lows, highs, thresholds, slots)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "FPSLattice":
+        return cls(
+            np.asarray(arrays["grid"]),
+            arrays["lows"],
+            arrays["highs"],
+            [np.asarray(t) for t in arrays["thresholds"]],
+            [np.asarray(s) for s in arrays["slots"]]
+        )
+
+    def to_arrays(self) -> dict:
+        return {
+            **{name: getattr(self, name) for name in ARRAY_FIELDS},
+            "thresholds": self.thresholds,
+            "slots": self.slots,
+        }
+
+    def lookup(self, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Interpolated FPS for every row (one column per output of a multi-output
+        forest), and a mask of the rows the lattice covers. Values of uncovered
+        rows are meaningless and must come from the forest.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        covered = np.ones(len(X), dtype=bool)
+
+        # Categorical slots, compared the way the forest does (float32 input <= threshold)
+        index = []
+        for feature, thresholds, slots in zip(LATTICE_CATEGORIES, self.thresholds, self.slots):
+            slot = slots[np.searchsorted(thresholds, X[:, feature].astype(np.float32), side="left")]
+            covered &= slot >= 0
+            index.append(np.maximum(slot, 0))
+
+        cells, fractions = [], []
+        for k, feature in enumerate(CONTINUOUS_FEATURES):
+            values = X[:, feature]
+            covered &= (values >= self.lows[k]) & (values <= self.highs[k])
+            position = np.clip((values - self.lows[k]) / self.steps[k], 0, self.grid_size - 1)
+            cell = np.minimum(position.astype(np.intp), self.grid_size - 2)
+            cells.append(cell)
+            fractions.append(position - cell)
+
+        (i, j), (tx, ty) = cells, fractions
+        if self.grid.ndim > len(LATTICE_CATEGORIES) + 2:
+            tx, ty = tx[:, None], ty[:, None]
+        corners = [self.grid[(*index, i + di, j + dj)] for di in (0, 1) for dj in (0, 1)]
+        fps = (
+            corners[0] * (1 - tx) * (1 - ty)
+            + corners[1] * (1 - tx) * ty
+            + corners[2] * tx * (1 - ty)
+            + corners[3] * tx * ty
+        )
+        return fps, covered
+
+    def error_report(self, flat_forest: FlatForest, n_samples: int = 20000, seed: int = 0) -> dict:
+        """Interpolation error against the forest on random covered inputs"""
+        rng = np.random.default_rng(seed)
+        X = np.empty((n_samples, 6))
+        for k, feature in enumerate(CONTINUOUS_FEATURES):
+            X[:, feature] = rng.uniform(self.lows[k], self.highs[k], n_samples)
+        for feature, values in LATTICE_CATEGORIES.items():
+            X[:, feature] = rng.choice(values, n_samples)
+
+        fps, covered = self.lookup(X)
+        error = np.abs(fps - flat_forest.predict(X))
+        return {
+            "grid_size": self.grid_size,
+            "lattice_bytes": int(self.grid.nbytes),
+            "covered": float(covered.mean()),
+            "max_abs_error": round(float(error.max()), 3),
+            "mean_abs_error": round(float(error.mean()), 3),
+            "p99_abs_error": round(float(np.percentile(error, 99)), 3),
+        }
@@ -0,0 +1,92 @@
+"""
+Model Loading Helpers
+Load-state tracking for lazily or background-loaded model artifacts
+"""
+
+import hashlib
+import joblib
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+
+def file_fingerprint(path: str) -> str:
+    """Short content hash used as the model version"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def dump_artifact(obj, path: str):
+    """
+    Write an artifact uncompressed so it can be memory-mapped on load.
+    The file is swapped in atomically, so running servers never see a partial write.
+    """
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path, compress=0)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path: str):
+    """Load an artifact with its NumPy arrays memory-mapped read-only"""
+    return joblib.load(path, mmap_mode="r")
+
+
+class LazyModel:
+    """
+    Base class for models whose artifacts are loaded on demand.
+
+    Subclasses implement _load(). ensure_loaded() is thread-safe, so it can be
+    called from a background loader and from inference threads at the same time;
+    a failed load is retried on the next call.
+
+    stage_timer(stage) returns a context manager wrapped around each inference
+    stage; the server swaps in one that records latency histograms.
+    """
+
+    def __init__(self):
+        self.load_state = "pending"
+        self.load_seconds: float | None = None
+        self.load_error: str | None = None
+        self.model_version: str | None = None
+        self._load_lock = threading.Lock()
+        self.stage_timer = lambda stage: nullcontext()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.load_state == "ready"
+
+    def _load(self):
+        raise NotImplementedError
+
+    def ensure_loaded(self):
+        if self.load_state == "ready":
+            return
+
+        with self._load_lock:
+            if self.load_state == "ready":
+                return
+
+            self.load_state = "loading"
+            start = time.perf_counter()
+            try:
+                self._load()
+            except Exception as e:
+                self.load_state = "failed"
+                self.load_error = str(e)
+                raise RuntimeError(f"Model not loaded: {e}") from e
+
+            self.load_seconds = time.perf_counter() - start
+            self.load_error = None
+            self.load_state = "ready"
+
+    def status(self) -> dict:
+        return {
+            "state": self.load_state,
+            "load_seconds": round(self.load_seconds, 4) if self.load_seconds is not None else None,
+            "version": self.model_version,
+            "error": self.load_error,
+        }
@@ -0,0 +1,173 @@
+"""
+Model Registry
+Versioned model artifacts on disk, with metadata and an active-version pointer
+
+Layout under the registry root:
+
+    <model>/<version>/        artifact files of that version, as build_artifacts.py writes them
+    <model>/<version>/metadata.json
+    <model>/active.json       {"version": ..., "history": [previously active versions]}
+
+Version directories are written under a temporary name and renamed into place,
+and active.json is replaced atomically, so readers never see partial state.
+Optional files added to a published version later (see add_files) are staged
+next to their final name and renamed into place too.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from .loading import file_fingerprint
+
+METADATA_FILE = "metadata.json"
+ACTIVE_FILE = "active.json"
+
+# Previously active versions remembered for rollback
+MAX_HISTORY = 10
+
+
+def data_hash(*arrays: np.ndarray) -> str:
+    """Content hash of training arrays, recorded as the version's training data hash"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype.str, array.shape)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:12]
+
+
+def _write_json(path: str, payload: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, model: str, version: str) -> str:
+        return os.path.join(self.root, model, version)
+
+    def publish(self, model: str, version: str, source_dir: str, files: list[str], metadata: dict) -> dict:
+        """
+        Store files from source_dir as a new version. Publishing a version that
+        already exists leaves it untouched and returns its metadata.
+
+        Files are hard-linked when possible; build_artifacts.py replaces artifacts
+        by renaming, so later builds never modify a published version.
+        """
+        target = self.path(model, version)
+        if os.path.exists(os.path.join(target, METADATA_FILE)):
+            return self.metadata(model, version)
+
+        staging = f"{target}.{os.getpid()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in files:
+            source = os.path.join(source_dir, name)
+            try:
+                os.link(source, os.path.join(staging, name))
+            except OSError:
+                shutil.copy2(source, os.path.join(staging, name))
+
+        metadata = {
+            **metadata,
+            "model": model,
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "files": {name: os.path.getsize(os.path.join(staging, name)) for name in files},
+        }
+        _write_json(os.path.join(staging, METADATA_FILE), metadata)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Published concurrently by another builder
+            shutil.rmtree(staging, ignore_errors=True)
+        return self.metadata(model, version)
+
+    def add_files(self, model: str, version: str, source_dir: str, files: list[str], benchmark: dict) -> dict:
+        """
+        Add or replace optional files of a published version, such as an FPS
+        lattice tabulated after the version was first published, and merge
+        benchmark into its metadata. Files whose content is unchanged are kept.
+        """
+        target = self.path(model, version)
+        metadata = self.metadata(model, version)
+        changed = False
+        for name in files:
+            source, published = os.path.join(source_dir, name), os.path.join(target, name)
+            if os.path.exists(published) and (
+                os.path.samefile(source, published) or file_fingerprint(source) == file_fingerprint(published)
+            ):
+                continue
+            staging = f"{published}.{os.getpid()}.tmp"
+            try:
+                os.link(source, staging)
+            except OSError:
+                shutil.copy2(source, staging)
+            os.replace(staging, published)
+            metadata["files"][name] = os.path.getsize(published)
+            changed = True
+
+        if changed or any(metadata.get("benchmark", {}).get(key) != value for key, value in benchmark.items()):
+            metadata["benchmark"] = {**metadata.get("benchmark", {}), **benchmark}
+            _write_json(os.path.join(target, METADATA_FILE), metadata)
+        return metadata
+
+    def metadata(self, model: str, version: str) -> dict:
+        path = os.path.join(self.path(model, version), METADATA_FILE)
+        if not os.path.exists(path):
+            raise KeyError(f"No version '{version}' of model '{model}' in the registry")
+        with open(path) as f:
+            return json.load(f)
+
+    def versions(self, model: str) -> list[dict]:
+        """Metadata of every published version, oldest first"""
+        model_dir = os.path.join(self.root, model)
+        if not os.path.isdir(model_dir):
+            return []
+        found = [
+            self.metadata(model, name) for name in os.listdir(model_dir)
+            if os.path.exists(os.path.join(model_dir, name, METADATA_FILE))
+        ]
+        return sorted(found, key=lambda m: (m["created_at"], m["version"]))
+
+    def active(self, model: str) -> dict:
+        """{"version": active version or None, "history": previously active versions, oldest first}"""
+        path = os.path.join(self.root, model, ACTIVE_FILE)
+        if not os.path.exists(path):
+            return {"version": None, "history": []}
+        with open(path) as f:
+            return json.load(f)
+
+    def active_path(self, model: str, default: str) -> str:
+        """Directory of the model's active version, or default when nothing has been published"""
+        version = self.active(model)["version"]
+        return default if version is None else self.path(model, version)
+
+    def activate(self, model: str, version: str) -> dict:
+        """Point the model at version, remembering the previous one for rollback"""
+        self.metadata(model, version)
+        state = self.active(model)
+        if state["version"] == version:
+            return state
+        history = (state["history"] + [state["version"]] if state["version"] else state["history"])[-MAX_HISTORY:]
+        state = {"version": version, "history": history, "activated_at": time.time()}
+        _write_json(os.path.join(self.root, model, ACTIVE_FILE), state)
+        return state
+
+    def rollback(self, model: str) -> dict:
+        """Re-activate the previously active version"""
+        state = self.active(model)
+        if not state["history"]:
+            raise KeyError(f"Model '{model}' has no previous version to roll back to")
+        state = {"version": state["history"][-1], "history": state["history"][:-1], "activated_at": time.time()}
+        _write_json(os.path.join(self.root, model, ACTIVE_FILE), state)
+        return state
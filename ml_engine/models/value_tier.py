@@ -4,18 +4,180 @@ Uses K-Means to cluster parts into value tiers for smart recommendations
 """
 
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
+import time
+from typing import TYPE_CHECKING
 
+from .loading import LazyModel, dump_artifact, file_fingerprint, load_artifact
 
-class ValueTierClusterer:
-    def __init__(self):
-        self.model: KMeans | None = None
-        self.scaler = StandardScaler()
-        self.is_loaded = False
-        self.tier_labels = ["budget", "midrange", "highend", "enthusiast"]
+if TYPE_CHECKING:
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+MODEL_FILE = "value_tier_model.joblib"
+ARRAYS_FILE = "value_tier_arrays.joblib"
+
+TIER_LABELS = ["budget", "midrange", "highend", "enthusiast"]
+# Inputs a model version was trained against; recorded in the model registry
+FEATURE_SCHEMA = {"features": ["price", "benchmark", "value"], "tier_labels": TIER_LABELS}
+
+# Sample parts database for similarity matching
+SAMPLE_PARTS_DB = {
+    "cpu": [
+        {"name": "Intel Core i3-12100F", "price": 109, "benchmark": 9500, "tier": "budget"},
+        {"name": "AMD Ryzen 5 5600", "price": 149, "benchmark": 15000, "tier": "budget"},
+        {"name": "Intel Core i5-12400F", "price": 179, "benchmark": 17500, "tier": "midrange"},
+        {"name": "AMD Ryzen 5 7600X", "price": 249, "benchmark": 22000, "tier": "midrange"},
+        {"name": "Intel Core i7-13700K", "price": 409, "benchmark": 35000, "tier": "highend"},
+        {"name": "AMD Ryzen 7 7800X3D", "price": 449, "benchmark": 34000, "tier": "highend"},
+        {"name": "Intel Core i9-14900K", "price": 589, "benchmark": 45000, "tier": "enthusiast"},
+        {"name": "AMD Ryzen 9 7950X3D", "price": 699, "benchmark": 48000, "tier": "enthusiast"},
+    ],
+    "gpu": [
+        {"name": "Intel Arc A580", "price": 179, "benchmark": 8500, "tier": "budget"},
+        {"name": "AMD RX 6650 XT", "price": 239, "benchmark": 11000, "tier": "budget"},
+        {"name": "NVIDIA RTX 4060", "price": 299, "benchmark": 13000, "tier": "midrange"},
+        {"name": "AMD RX 7700 XT", "price": 449, "benchmark": 18000, "tier": "midrange"},
+        {"name": "NVIDIA RTX 4070 Super", "price": 599, "benchmark": 22000, "tier": "highend"},
+        {"name": "AMD RX 7900 XT", "price": 699, "benchmark": 24000, "tier": "highend"},
+        {"name": "NVIDIA RTX 4080 Super", "price": 999, "benchmark": 28000, "tier": "enthusiast"},
+        {"name": "NVIDIA RTX 4090", "price": 1599, "benchmark": 36000, "tier": "enthusiast"},
+    ],
+    "ram": [
+        {"name": "Corsair Vengeance 16GB DDR4-3200", "price": 45, "benchmark": 3200, "tier": "budget"},
+        {"name": "G.Skill Ripjaws 32GB DDR4-3600", "price": 79, "benchmark": 3600, "tier": "midrange"},
+        {"name": "Kingston Fury 32GB DDR5-5600", "price": 119, "benchmark": 5600, "tier": "highend"},
+        {"name": "G.Skill Trident Z5 64GB DDR5-6400", "price": 249, "benchmark": 6400, "tier": "enthusiast"},
+    ],
+}
+
+
+def synthetic_training_data() -> np.ndarray:
+    """Synthetic parts across 4 tiers (columns in FEATURE_SCHEMA order)"""
+    np.random.seed(42)
+    
+    # Generate parts across 4 tiers
+    parts_data = []
+    
+    # Budget tier: Low price, decent performance
+    for _ in range(100):
+        price = np.random.uniform(50, 200)
+        benchmark = np.random.uniform(3000, 8000)
+        parts_data.append([price, benchmark, benchmark / price])
+    
+    # Midrange tier: Moderate price, good performance
+    for _ in range(100):
+        price = np.random.uniform(200, 400)
+        benchmark = np.random.uniform(8000, 18000)
+        parts_data.append([price, benchmark, benchmark / price])
+    
+    # High-end tier: High price, great performance
+    for _ in range(100):
+        price = np.random.uniform(400, 800)
+        benchmark = np.random.uniform(18000, 30000)
+        parts_data.append([price, benchmark, benchmark / price])
+    
+    # Enthusiast tier: Premium price, top performance
+    for _ in range(100):
+        price = np.random.uniform(800, 2000)
+        benchmark = np.random.uniform(28000, 50000)
+        parts_data.append([price, benchmark, benchmark / price])
+    
+    return np.array(parts_data)
+
+
+def train_synthetic_model() -> dict:
+    """Train with synthetic value tier data"""
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+    
+    X = synthetic_training_data()
+    
+    # Fit scaler
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    
+    # Train K-Means with 4 clusters
+    model = KMeans(n_clusters=4, random_state=42, n_init=10)
+    model.fit(X_scaled)
+    
+    return {
+        "model": model,
+        "scaler": scaler,
+        "parts_db": SAMPLE_PARTS_DB
+    }
+
+
+class CentroidClassifier:
+    """
+    StandardScaler + KMeans inference from plain arrays.
+    
+    Lets every worker memory-map the same scaler statistics and cluster centers
+    instead of unpickling its own copy of the sklearn estimators.
+    """
+    
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, centers: np.ndarray):
+        self.mean = np.asarray(mean)
+        self.scale = np.asarray(scale)
+        self.centers = np.asarray(centers)
+    
+    @classmethod
+    def from_sklearn(cls, model: "KMeans", scaler: "StandardScaler") -> "CentroidClassifier":
+        return cls(scaler.mean_, scaler.scale_, model.cluster_centers_)
+    
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean) / self.scale
+    
+    def inverse_transform(self, X_scaled: np.ndarray) -> np.ndarray:
+        return X_scaled * self.scale + self.mean
+    
+    def predict(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Index of the nearest cluster center, as KMeans.predict"""
+        distances = ((X_scaled[:, None, :] - self.centers[None, :, :]) ** 2).sum(axis=2)
+        return distances.argmin(axis=1)
+
+
+def export_arrays(data: dict, model_dir: str) -> dict:
+    """
+    Write the scaler/cluster arrays next to the sklearn artifact.
+    
+    Only written if the array path assigns the same clusters as sklearn.
+    """
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    classifier = CentroidClassifier.from_sklearn(data["model"], data["scaler"])
+    
+    rng = np.random.default_rng(0)
+    price = rng.uniform(10, 3000, 2048)
+    benchmark = rng.uniform(500, 60000, 2048)
+    X = np.column_stack([price, benchmark, benchmark / price])
+    expected = data["model"].predict(data["scaler"].transform(X))
+    mismatches = int(np.sum(classifier.predict(classifier.transform(X)) != expected))
+    if mismatches:
+        raise RuntimeError(f"Array clusterer disagrees with sklearn on {mismatches} parts")
+    
+    arrays_path = os.path.join(model_dir, ARRAYS_FILE)
+    dump_artifact({
+        "mean": classifier.mean,
+        "scale": classifier.scale,
+        "centers": classifier.centers,
+        "parts_db": data.get("parts_db", {}),
+        "model_version": file_fingerprint(model_path),
+    }, arrays_path)
+    return {"arrays_bytes": os.path.getsize(arrays_path)}
+
+
+class ValueTierClusterer(LazyModel):
+    def __init__(self, model_dir: str | None = None):
+        super().__init__()
+        self.model: "KMeans | None" = None
+        self.scaler: "StandardScaler | None" = None
+        self.classifier: CentroidClassifier | None = None
+        # Tier index of each cluster, fixed per model version and computed once on load
+        self.tier_of_cluster: np.ndarray | None = None
+        self.tier_labels = list(TIER_LABELS)
+        self.model_dir = model_dir or os.path.dirname(__file__)
+        # Optional PartsCatalog; when loaded it replaces parts_db for tier averages and similar parts
+        self.catalog = None
         
         # Sample parts database for similarity matching
         self.parts_db: dict[str, list[dict]] = {
@@ -27,113 +189,42 @@ class ValueTierClusterer:
             "psu": [],
             "case": []
         }
-        
-        self._initialize_model()
-    
-    def _initialize_model(self):
-        """Initialize or load the clustering model"""
-        model_path = os.path.join(os.path.dirname(__file__), "value_tier_model.joblib")
-        
-        if os.path.exists(model_path):
-            try:
-                data = joblib.load(model_path)
-                self.model = data["model"]
-                self.scaler = data["scaler"]
-                self.parts_db = data.get("parts_db", self.parts_db)
-                self.is_loaded = True
-                return
-            except Exception:
-                pass
-        
-        # Initialize with synthetic data
-        self._train_synthetic()
     
-    def _train_synthetic(self):
-        """Train with synthetic value tier data"""
-        np.random.seed(42)
-        
-        # Generate parts across 4 tiers
-        parts_data = []
-        
-        # Budget tier: Low price, decent performance
-        for _ in range(100):
-            price = np.random.uniform(50, 200)
-            benchmark = np.random.uniform(3000, 8000)
-            parts_data.append([price, benchmark, benchmark / price])
-        
-        # Midrange tier: Moderate price, good performance
-        for _ in range(100):
-            price = np.random.uniform(200, 400)
-            benchmark = np.random.uniform(8000, 18000)
-            parts_data.append([price, benchmark, benchmark / price])
-        
-        # High-end tier: High price, great performance
-        for _ in range(100):
-            price = np.random.uniform(400, 800)
-            benchmark = np.random.uniform(18000, 30000)
-            parts_data.append([price, benchmark, benchmark / price])
-        
-        # Enthusiast tier: Premium price, top performance
-        for _ in range(100):
-            price = np.random.uniform(800, 2000)
-            benchmark = np.random.uniform(28000, 50000)
-            parts_data.append([price, benchmark, benchmark / price])
-        
-        X = np.array(parts_data)
-        
-        # Fit scaler
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Train K-Means with 4 clusters
-        self.model = KMeans(n_clusters=4, random_state=42, n_init=10)
-        self.model.fit(X_scaled)
+    def _load(self):
+        """
+        Load the clustering model (see build_artifacts.py).
         
-        # Populate sample parts database
-        self._populate_sample_parts()
+        Prefers the memory-mapped array export, which needs no sklearn import.
+        """
+        arrays_path = os.path.join(self.model_dir, ARRAYS_FILE)
+        if os.path.exists(arrays_path):
+            arrays = load_artifact(arrays_path)
+            self.classifier = CentroidClassifier(arrays["mean"], arrays["scale"], arrays["centers"])
+            self.parts_db = arrays["parts_db"] or self.parts_db
+            self.model_version = arrays["model_version"]
+            self._order_tiers()
+            return
         
-        self.is_loaded = True
+        model_path = os.path.join(self.model_dir, MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{MODEL_FILE} not found in {self.model_dir}. Run `python build_artifacts.py` first."
+            )
         
-        # Save model
-        try:
-            model_path = os.path.join(os.path.dirname(__file__), "value_tier_model.joblib")
-            joblib.dump({
-                "model": self.model,
-                "scaler": self.scaler,
-                "parts_db": self.parts_db
-            }, model_path)
-        except Exception:
-            pass
-    
-    def _populate_sample_parts(self):
-        """Populate sample parts for similarity matching"""
-        self.parts_db = {
-            "cpu": [
-                {"name": "Intel Core i3-12100F", "price": 109, "benchmark": 9500, "tier": "budget"},
-                {"name": "AMD Ryzen 5 5600", "price": 149, "benchmark": 15000, "tier": "budget"},
-                {"name": "Intel Core i5-12400F", "price": 179, "benchmark": 17500, "tier": "midrange"},
-                {"name": "AMD Ryzen 5 7600X", "price": 249, "benchmark": 22000, "tier": "midrange"},
-                {"name": "Intel Core i7-13700K", "price": 409, "benchmark": 35000, "tier": "highend"},
-                {"name": "AMD Ryzen 7 7800X3D", "price": 449, "benchmark": 34000, "tier": "highend"},
-                {"name": "Intel Core i9-14900K", "price": 589, "benchmark": 45000, "tier": "enthusiast"},
-                {"name": "AMD Ryzen 9 7950X3D", "price": 699, "benchmark": 48000, "tier": "enthusiast"},
-            ],
-            "gpu": [
-                {"name": "Intel Arc A580", "price": 179, "benchmark": 8500, "tier": "budget"},
-                {"name": "AMD RX 6650 XT", "price": 239, "benchmark": 11000, "tier": "budget"},
-                {"name": "NVIDIA RTX 4060", "price": 299, "benchmark": 13000, "tier": "midrange"},
-                {"name": "AMD RX 7700 XT", "price": 449, "benchmark": 18000, "tier": "midrange"},
-                {"name": "NVIDIA RTX 4070 Super", "price": 599, "benchmark": 22000, "tier": "highend"},
-                {"name": "AMD RX 7900 XT", "price": 699, "benchmark": 24000, "tier": "highend"},
-                {"name": "NVIDIA RTX 4080 Super", "price": 999, "benchmark": 28000, "tier": "enthusiast"},
-                {"name": "NVIDIA RTX 4090", "price": 1599, "benchmark": 36000, "tier": "enthusiast"},
-            ],
-            "ram": [
-                {"name": "Corsair Vengeance 16GB DDR4-3200", "price": 45, "benchmark": 3200, "tier": "budget"},
-                {"name": "G.Skill Ripjaws 32GB DDR4-3600", "price": 79, "benchmark": 3600, "tier": "midrange"},
-                {"name": "Kingston Fury 32GB DDR5-5600", "price": 119, "benchmark": 5600, "tier": "highend"},
-                {"name": "G.Skill Trident Z5 64GB DDR5-6400", "price": 249, "benchmark": 6400, "tier": "enthusiast"},
-            ],
-        }
+        data = load_artifact(model_path)
+        self.model = data["model"]
+        self.scaler = data["scaler"]
+        self.parts_db = data.get("parts_db", self.parts_db)
+        self.classifier = CentroidClassifier.from_sklearn(self.model, self.scaler)
+        self.model_version = file_fingerprint(model_path)
+        self._order_tiers()
+    
+    def _order_tiers(self):
+        """Clusters are ordered by their centroid benchmark score, so tier 0 is budget"""
+        centroids = self.classifier.inverse_transform(self.classifier.centers)
+        tier_order = np.argsort(centroids[:, 1])
+        self.tier_of_cluster = np.empty_like(tier_order)
+        self.tier_of_cluster[tier_order] = np.arange(len(tier_order))
     
     def analyze(
         self,
@@ -146,42 +237,147 @@ class ValueTierClusterer:
         Analyze a part's value tier and find similar alternatives.
         
         Returns:
-            dict with tier, value_score, similar_parts
+            dict with tier, value_score, similar_parts (and cheaper_alternative,
+            faster_alternative when the parts catalog is loaded)
         """
-        if not self.is_loaded or self.model is None:
-            raise RuntimeError("Model not loaded")
+        return self.analyze_batch([name], [price], [benchmark], [category])[0]
+    
+    def analyze_batch(
+        self,
+        names,
+        prices,
+        benchmarks,
+        categories
+    ) -> list[dict]:
+        """
+        Analyze N parts with a single scaler transform and cluster prediction.
         
-        # Calculate value (performance per dollar)
-        value = benchmark / price if price > 0 else 0
+        Returns:
+            list of dicts shaped like analyze()
+        """
+        self.ensure_loaded()
         
-        # Prepare features
-        features = np.array([[price, benchmark, value]])
-        features_scaled = self.scaler.transform(features)
+        if len(names) == 0:
+            return []
         
-        # Predict cluster
-        cluster = int(self.model.predict(features_scaled)[0])
+        price = np.asarray(prices, dtype=np.float64)
+        benchmark = np.asarray(benchmarks, dtype=np.float64)
+        with self.stage_timer("cluster"):
+            tier_idx, value_score = self.score_batch(price, benchmark, categories)
+        tiers = [self.tier_labels[t] for t in tier_idx]
         
-        # Map cluster to tier (sorted by centroid benchmark score)
-        centroids = self.scaler.inverse_transform(self.model.cluster_centers_)
-        tier_order = np.argsort(centroids[:, 1])  # Sort by benchmark
-        tier_index = np.where(tier_order == cluster)[0][0]
-        tier = self.tier_labels[tier_index]
+        results = []
+        with self.stage_timer("similar_parts"):
+            for i, (name, category, tier) in enumerate(zip(names, categories, tiers)):
+                result = {"tier": tier, "value_score": round(float(value_score[i]), 1)}
+                index = self._catalog_index(category)
+                if index is None:
+                    result["similar_parts"] = self._similar_parts(name, category, tier)
+                else:
+                    # Nearest parts in price/performance rather than the first ones in the same tier
+                    rows, _ = index.similar(price[i], benchmark[i], k=5, exclude_name=name)
+                    cheaper, faster = index.cheaper(price[i], benchmark[i]), index.faster(price[i], benchmark[i])
+                    result["similar_parts"] = [str(n) for n in index.table.names[rows]]
+                    result["cheaper_alternative"] = None if cheaper is None else str(index.table.names[cheaper])
+                    result["faster_alternative"] = None if faster is None else str(index.table.names[faster])
+                results.append(result)
+        return results
+    
+    def score_batch(self, prices, benchmarks, categories) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Tier index and 0-100 value score of each part, without the similar-part
+        lookups; what re-tiering a whole catalog needs.
+        """
+        self.ensure_loaded()
+        price = np.asarray(prices, dtype=np.float64)
+        benchmark = np.asarray(benchmarks, dtype=np.float64)
+        value = self._value(price, benchmark)
+        tier_idx = self.assign_tiers(price, benchmark)
         
-        # Calculate value score (0-100)
         # Based on performance per dollar relative to tier average
-        tier_parts = self.parts_db.get(category.lower(), [])
-        tier_avg_value = np.mean([p["benchmark"] / p["price"] for p in tier_parts if p["tier"] == tier]) if tier_parts else value
+        # None marks a category with no known parts: the part is compared against itself
+        tier_avg_values = {}
+        for category, t in set(zip(categories, tier_idx.tolist())):
+            table = self._catalog_table(category)
+            if table is not None:
+                # Precomputed per-tier aggregate; NaN for an empty tier
+                tier_avg_values[category, t] = float(table.tier_avg_value[t])
+                continue
+            tier_parts = self.parts_db.get(category.lower(), [])
+            tier_values = [p["benchmark"] / p["price"] for p in tier_parts if p["tier"] == self.tier_labels[t]]
+            # An empty tier averages to NaN, which falls through to the neutral score below
+            tier_avg_values[category, t] = np.mean(tier_values) if tier_values else (np.nan if tier_parts else None)
         
-        value_score = min(100, max(0, (value / tier_avg_value) * 50 + 50)) if tier_avg_value > 0 else 50
+        tier_avg_value = np.array([
+            value[i] if tier_avg_values[category, t] is None else tier_avg_values[category, t]
+            for i, (category, t) in enumerate(zip(categories, tier_idx.tolist()))
+        ], dtype=np.float64)
         
-        # Find similar parts in the same tier
-        similar_parts = [
-            p["name"] for p in tier_parts
+        # Calculate value score (0-100)
+        has_avg = tier_avg_value > 0
+        value_score = np.where(
+            has_avg,
+            np.clip(value / np.where(has_avg, tier_avg_value, 1.0) * 50 + 50, 0, 100),
+            50
+        )
+        return tier_idx, value_score
+    
+    def warm_up(self, n_parts: int = 256, rounds: int = 3, seed: int = 0) -> float:
+        """
+        Run synthetic parts through analyze_batch so the mapped arrays and code
+        paths are hot. Returns the fastest round in seconds.
+        """
+        rng = np.random.default_rng(seed)
+        categories = list(self.parts_db) or ["cpu"]
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            self.analyze_batch(
+                names=[f"warm-up part {i}" for i in range(n_parts)],
+                prices=rng.uniform(50, 2000, n_parts),
+                benchmarks=rng.uniform(3000, 50000, n_parts),
+                categories=[categories[i] for i in rng.integers(0, len(categories), n_parts)]
+            )
+            best = min(best, time.perf_counter() - start)
+        return best
+    
+    @staticmethod
+    def _value(price: np.ndarray, benchmark: np.ndarray) -> np.ndarray:
+        """Performance per dollar, 0 for unpriced parts"""
+        has_price = price > 0
+        return np.where(has_price, benchmark / np.where(has_price, price, 1.0), 0.0)
+    
+    def assign_tiers(self, prices, benchmarks) -> np.ndarray:
+        """
+        Tier index (into tier_labels) for each part, through the cluster -> tier
+        mapping computed on load.
+        """
+        self.ensure_loaded()
+        price = np.asarray(prices, dtype=np.float64)
+        benchmark = np.asarray(benchmarks, dtype=np.float64)
+        if len(price) == 0:
+            return np.zeros(0, dtype=np.intp)
+        
+        features = np.column_stack([price, benchmark, self._value(price, benchmark)])
+        clusters = self.classifier.predict(self.classifier.transform(features))
+        return self.tier_of_cluster[clusters]
+    
+    def _catalog_table(self, category: str):
+        """The catalog table for a category, if the catalog is loaded and has priced parts in it"""
+        if self.catalog is None or not self.catalog.is_loaded:
+            return None
+        table = self.catalog.table(category.lower())
+        return table if table is not None and len(table) else None
+    
+    def _catalog_index(self, category: str):
+        """The catalog neighbor index for a category, under the same conditions as _catalog_table"""
+        if self._catalog_table(category) is None:
+            return None
+        return self.catalog.index(category.lower())
+    
+    def _similar_parts(self, name: str, category: str, tier: str) -> list[str]:
+        """First sample parts of the same category and tier, excluding the part itself"""
+        return [
+            p["name"] for p in self.parts_db.get(category.lower(), [])
             if p["tier"] == tier and p["name"].lower() != name.lower()
         ][:5]
-        
-        return {
-            "tier": tier,
-            "value_score": round(value_score, 1),
-            "similar_parts": similar_parts
-        }
@@ -0,0 +1,64 @@
+"""
+SiliconSage Multi-Worker Launcher
+Runs several uvicorn workers that share one copy of the model memory.
+
+Every worker memory-maps the same read-only artifact files written by
+build_artifacts.py (flat forest arrays, scaler stats and cluster centers),
+so the OS page cache holds a single copy no matter how many workers run:
+
+    python serve.py --workers 4
+
+Check GET /health/memory on a few workers to confirm the artifact mappings are shared.
+
+Each worker's native thread pools are capped at --threads (default 1), so
+workers x inference threads stays within the node's cores; --affinity spread
+also pins every worker to its own CPU.
+"""
+
+import argparse
+import os
+
+import uvicorn
+
+import config
+from models import bottleneck, value_tier
+from models.registry import ModelRegistry
+from serving.threads import thread_env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ML Engine with shared model memory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--engine", choices=("compiled", "lattice"), default="compiled")
+    parser.add_argument("--threads", type=int, default=config.INFERENCE_THREADS, help="BLAS/OpenMP/n_jobs threads per worker")
+    parser.add_argument(
+        "--affinity", default=config.CPU_AFFINITY,
+        help='"spread" pins each worker to its own CPU; a CPU list like "0-3" restricts all workers to those CPUs'
+    )
+    args = parser.parse_args()
+
+    # Workers load each model's active registry version (MODEL_DIR when nothing is published)
+    registry = ModelRegistry(config.MODEL_REGISTRY_DIR)
+    shared_artifacts = {"bottleneck": [bottleneck.FLAT_FOREST_FILE], "value_tier": [value_tier.ARRAYS_FILE]}
+    if args.engine == "lattice":
+        shared_artifacts["bottleneck"].append(bottleneck.LATTICE_FILE)
+    for name, files in shared_artifacts.items():
+        model_dir = registry.active_path(name, config.MODEL_DIR)
+        missing = [file for file in files if not os.path.exists(os.path.join(model_dir, file))]
+        if missing:
+            hint = " --lattice" if bottleneck.LATTICE_FILE in missing else ""
+            raise SystemExit(f"Missing artifacts {missing} in {model_dir}. Run `python build_artifacts.py{hint}` first.")
+
+    # Only the array engines serve from the mapped files; sklearn would unpickle a private copy per worker
+    os.environ["SILICONSAGE_INFERENCE_ENGINE"] = args.engine
+    # Workers are fresh processes, so their native pools start at this size instead of one thread per core
+    os.environ.update(thread_env(args.threads))
+    os.environ["SILICONSAGE_INFERENCE_THREADS"] = str(args.threads)
+    os.environ["SILICONSAGE_CPU_AFFINITY"] = args.affinity
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
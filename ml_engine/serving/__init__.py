@@ -0,0 +1 @@
+# SiliconSage Serving Runtime
@@ -0,0 +1,250 @@
+"""
+Admission Control
+Per-endpoint in-flight limits, bounded queues, request deadlines and load
+shedding, so overload turns into fast 503s instead of an unbounded backlog
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+
+# Weight of the newest request in each endpoint's moving average service time
+SERVICE_TIME_ALPHA = 0.2
+
+
+class DeadlineExceeded(HTTPException):
+    """The request's deadline passed before its work reached the model"""
+
+    def __init__(self):
+        super().__init__(status_code=504, detail="Request deadline exceeded")
+
+
+@dataclass
+class EndpointLimit:
+    max_in_flight: int
+    max_queue: int
+    # Queue depth from which further requests skip the queue to be served degraded (0: never)
+    degrade_at: int = 0
+
+
+@dataclass
+class Ticket:
+    """An admitted request: its endpoint, monotonic deadline and whether it is served degraded"""
+    endpoint: str
+    deadline: float | None
+    degraded: bool = False
+    admitted_at: float = field(default_factory=time.monotonic)
+    controller: "AdmissionController | None" = None
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def deadline_exceeded(self) -> DeadlineExceeded:
+        """Count this request as shed for its deadline and return the error to fail it with"""
+        if self.controller is not None:
+            self.controller.count_shed(self.endpoint, "deadline")
+        return DeadlineExceeded()
+
+    def check(self):
+        """Raise DeadlineExceeded once the deadline has passed"""
+        if self.expired():
+            raise self.deadline_exceeded()
+
+
+# The ticket of the request being handled; read by the scheduler before running model work
+_current_ticket: ContextVar[Ticket | None] = ContextVar("admission_ticket", default=None)
+
+
+def current_ticket() -> Ticket | None:
+    return _current_ticket.get()
+
+
+def parse_limits(spec: str) -> dict[str, tuple[int, int]]:
+    """"/predict/fps=256:1024,/optimize/build=4:8" -> {path: (max_in_flight, max_queue)}"""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        path, _, values = entry.partition("=")
+        in_flight, _, queue = values.partition(":")
+        limits[path.strip()] = (int(in_flight), int(queue or 0))
+    return limits
+
+
+class _EndpointState:
+    def __init__(self, limit: EndpointLimit):
+        self.limit = limit
+        self.in_flight = 0
+        self.degraded_in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.service_seconds = 0.0
+        self.shed = {"queue_full": 0, "deadline": 0}
+        self.degraded = 0
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int | None = None):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admits requests per endpoint: up to max_in_flight run at once and up to
+    max_queue wait in FIFO order; anything beyond is rejected immediately with
+    a Retry-After estimated from the queue length and recent service times.
+    Queued requests whose deadline passes are dropped before they run, and
+    past an endpoint's degrade_at queue depth new requests are admitted at
+    once as degraded tickets, which the endpoint answers more cheaply.
+    """
+
+    def __init__(self, limits: dict[str, EndpointLimit]):
+        self.endpoints = {path: _EndpointState(limit) for path, limit in limits.items()}
+
+    def count_shed(self, endpoint: str, reason: str):
+        self.endpoints[endpoint].shed[reason] += 1
+
+    def _retry_after(self, state: _EndpointState) -> int:
+        backlog = (len(state.waiters) + 1) * (state.service_seconds or 1.0) / state.limit.max_in_flight
+        return max(1, math.ceil(backlog))
+
+    async def acquire(self, endpoint: str, deadline: float | None) -> Ticket:
+        state = self.endpoints[endpoint]
+        ticket = Ticket(endpoint, deadline, controller=self)
+        if ticket.expired():
+            self.count_shed(endpoint, "deadline")
+            raise Rejected(504, "Request deadline exceeded")
+
+        if state.in_flight < state.limit.max_in_flight and not state.waiters:
+            state.in_flight += 1
+            return ticket
+
+        limit = state.limit
+        # Degraded requests are cheap but not free, so at most max_queue run at once
+        if 0 < limit.degrade_at <= len(state.waiters) and state.degraded_in_flight < max(limit.max_queue, 1):
+            state.degraded_in_flight += 1
+            state.degraded += 1
+            ticket.degraded = True
+            return ticket
+
+        if len(state.waiters) >= limit.max_queue:
+            self.count_shed(endpoint, "queue_full")
+            raise Rejected(503, "Server overloaded", self._retry_after(state))
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # The client went away while queued; give back a slot granted in the meantime
+            if waiter.done():
+                self._release_slot(state)
+            else:
+                waiter.cancel()
+                state.waiters.remove(waiter)
+            raise
+
+        # A slot granted right as the deadline passed is kept; the scheduler checks the deadline again
+        if not waiter.done():
+            waiter.cancel()
+            state.waiters.remove(waiter)
+            self.count_shed(endpoint, "deadline")
+            raise Rejected(504, "Request deadline exceeded")
+        ticket.admitted_at = time.monotonic()
+        return ticket
+
+    def release(self, ticket: Ticket):
+        state = self.endpoints[ticket.endpoint]
+        if ticket.degraded:
+            state.degraded_in_flight -= 1
+            return
+        elapsed = time.monotonic() - ticket.admitted_at
+        state.service_seconds += SERVICE_TIME_ALPHA * (elapsed - state.service_seconds)
+        self._release_slot(state)
+
+    def _release_slot(self, state: _EndpointState):
+        # The slot passes straight to the oldest waiter, so in_flight only drops when nobody waits
+        while state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        state.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            path: {
+                "in_flight": state.in_flight,
+                "queue_depth": len(state.waiters),
+                "degraded_in_flight": state.degraded_in_flight,
+                "max_in_flight": state.limit.max_in_flight,
+                "max_queue": state.limit.max_queue,
+                "shed": dict(state.shed),
+                "degraded": state.degraded,
+                "service_seconds": round(state.service_seconds, 6),
+            }
+            for path, state in self.endpoints.items()
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to the request paths it
+    knows, before the request body is read or validated.
+
+    The deadline comes from deadline_header as a budget in milliseconds
+    relative to arrival (no clock sync needed between client and server).
+    """
+
+    def __init__(self, app, controller: AdmissionController, deadline_header: str, default_deadline_ms: float = 0):
+        self.app = app
+        self.controller = controller
+        self.deadline_header = deadline_header.lower().encode()
+        self.default_deadline_ms = default_deadline_ms
+
+    def _deadline(self, scope) -> float | None:
+        budget_ms = self.default_deadline_ms
+        for name, value in scope["headers"]:
+            if name == self.deadline_header:
+                try:
+                    budget_ms = float(value)
+                except ValueError:
+                    pass
+                break
+        return time.monotonic() + budget_ms / 1000 if budget_ms > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.controller.endpoints:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            ticket = await self.controller.acquire(scope["path"], self._deadline(scope))
+        except Rejected as e:
+            await self._reject(send, e)
+            return
+
+        token = _current_ticket.set(ticket)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_ticket.reset(token)
+            self.controller.release(ticket)
+
+    @staticmethod
+    async def _reject(send, rejection: Rejected):
+        body = json.dumps({"detail": rejection.reason}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if rejection.retry_after is not None:
+            headers.append((b"retry-after", str(rejection.retry_after).encode()))
+        await send({"type": "http.response.start", "status": rejection.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,135 @@
+"""
+Prediction Cache
+In-process LRU/TTL cache for model results with in-flight request deduplication
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class PredictionCache:
+    """
+    Size-bounded LRU cache whose entries also expire after ttl_seconds.
+
+    Entries are tagged with the model version that produced them; when the
+    served version changes the whole cache is dropped. Concurrent misses for
+    the same key and version share a single computation.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.model_version: str | None = None
+
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, model_version: str | None = None):
+        """Drop every entry and start tagging new ones with model_version"""
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self.model_version = model_version
+
+    def get(self, key: Hashable, model_version: str) -> tuple[bool, Any]:
+        """Return (found, value) without computing anything on a miss"""
+        if model_version != self.model_version:
+            self.invalidate(model_version)
+            return False, None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def put(self, key: Hashable, value: Any, model_version: str):
+        # A result computed by a model that has since been replaced is stale
+        if model_version != self.model_version or self.max_entries <= 0:
+            return
+
+        self._entries[key] = (self.clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        model_version: str,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        found, value = self.get(key, model_version)
+        if found:
+            self.hits += 1
+            return value
+
+        # A computation started on another version must not answer this request
+        inflight_key = (model_version, key)
+        inflight = self._inflight.get(inflight_key)
+        if inflight is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+        try:
+            value = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so asyncio does not warn when nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(value)
+            self.put(key, value, model_version)
+            return value
+        finally:
+            self._inflight.pop(inflight_key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.deduplicated
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "model_version": self.model_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+            "hit_rate": round((self.hits + self.deduplicated) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,184 @@
+"""
+Columnar Wire Format
+Compact binary tables of equal-length columns for batch traffic, decoded
+straight into NumPy arrays without building a Python object per row
+"""
+
+import json
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+MEDIA_TYPE = "application/vnd.siliconsage.columns"
+
+# "SSC" + format version, then the header length as a little-endian uint32
+MAGIC = b"SSC1"
+PREAMBLE = struct.Struct("<4sI")
+# Every buffer starts on an 8-byte boundary so it can be viewed in place as any dtype
+ALIGNMENT = 8
+
+# Little-endian numeric dtypes a column may use; string columns carry int32 codes
+NUMERIC_DTYPES = ("<f8", "<f4", "<i8", "<i4", "<i2", "|i1", "<u4", "<u2", "|u1", "|b1")
+CODE_DTYPE = "<i4"
+
+
+class ColumnarError(ValueError):
+    pass
+
+
+class Strings(NamedTuple):
+    """
+    A dictionary-encoded string column: row i is categories[codes[i]], and
+    code -1 is a null. Functions that map strings can work on the categories
+    once and index the result with codes instead of visiting every row.
+    """
+    codes: np.ndarray
+    categories: list[str]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str | None:
+        code = self.codes[i]
+        return None if code < 0 else self.categories[code]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.codes)))
+
+    @classmethod
+    def encode(cls, values) -> "Strings":
+        """Dictionary-encode a sequence of strings (None becomes a null)"""
+        if isinstance(values, Strings):
+            return values
+        if isinstance(values, np.ndarray) and values.dtype.kind == "U":
+            categories, codes = np.unique(values, return_inverse=True)
+            return cls(codes.reshape(-1).astype(np.int32), categories.tolist())
+        index: dict = {}
+        codes = np.fromiter(
+            (-1 if v is None else index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=len(values)
+        )
+        return cls(codes, list(index))
+
+
+class StringLists(NamedTuple):
+    """A column of string lists: row i is values[offsets[i]:offsets[i + 1]]"""
+    offsets: np.ndarray
+    values: Strings
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> list[str]:
+        return [self.values[k] for k in range(self.offsets[i], self.offsets[i + 1])]
+
+    @classmethod
+    def encode(cls, lists: list[list[str]]) -> "StringLists":
+        offsets = np.zeros(len(lists) + 1, dtype=np.int32)
+        np.cumsum([len(items) for items in lists], out=offsets[1:])
+        return cls(offsets, Strings.encode([item for items in lists for item in items]))
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % ALIGNMENT)
+
+
+def encode(columns: dict, metadata: dict | None = None) -> bytes:
+    """
+    Serialize equal-length columns: NumPy arrays (written as little-endian
+    buffers), Strings / lists of str (dictionary-encoded) or StringLists.
+    """
+    n_rows = None
+    specs, buffers = [], []
+    position = 0
+
+    def add_buffer(array: np.ndarray) -> dict:
+        nonlocal position
+        data = array.tobytes()
+        buffers.append(data + _padding(len(data)))
+        spec = {"offset": position, "nbytes": len(data)}
+        position += len(buffers[-1])
+        return spec
+
+    for name, column in columns.items():
+        spec = {"name": name}
+        rows = len(column)
+        if isinstance(column, StringLists):
+            spec["lists"] = add_buffer(column.offsets.astype(CODE_DTYPE))
+            column = column.values
+        elif not isinstance(column, Strings) and (not isinstance(column, np.ndarray) or column.dtype.kind in "OU"):
+            column = Strings.encode(column)
+
+        if isinstance(column, Strings):
+            spec.update(dtype=CODE_DTYPE, categories=list(column.categories), **add_buffer(column.codes.astype(CODE_DTYPE)))
+        else:
+            dtype = column.dtype.newbyteorder("<") if column.dtype.byteorder == ">" else column.dtype
+            if dtype.str not in NUMERIC_DTYPES:
+                raise ColumnarError(f"Column '{name}' has unsupported dtype {column.dtype}")
+            spec.update(dtype=dtype.str, **add_buffer(column.astype(dtype, copy=False)))
+
+        if n_rows is not None and rows != n_rows:
+            raise ColumnarError(f"Column '{name}' has {rows} rows, expected {n_rows}")
+        n_rows = rows
+        specs.append(spec)
+
+    header = json.dumps({"rows": n_rows or 0, "columns": specs, "metadata": metadata or {}}).encode()
+    header += b" " * (-(PREAMBLE.size + len(header)) % ALIGNMENT)
+    return b"".join([PREAMBLE.pack(MAGIC, len(header)), header, *buffers])
+
+
+def decode(body: bytes) -> tuple[dict, dict]:
+    """
+    Parse a table into ({name: array | Strings | StringLists}, metadata).
+    Numeric columns are read-only views of body, not copies.
+    """
+    if len(body) < PREAMBLE.size:
+        raise ColumnarError("Body is too short for a columnar table")
+    magic, header_length = PREAMBLE.unpack_from(body)
+    if magic != MAGIC:
+        raise ColumnarError(f"Not a columnar table (expected magic {MAGIC!r})")
+    start = PREAMBLE.size + header_length
+    try:
+        header = json.loads(body[PREAMBLE.size:start])
+        n_rows = int(header["rows"])
+        specs = header["columns"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ColumnarError(f"Invalid columnar header: {e}")
+
+    def view(spec: dict, dtype: str, name: str) -> np.ndarray:
+        if dtype not in NUMERIC_DTYPES:
+            raise ColumnarError(f"Column '{name}' has unsupported dtype {dtype}")
+        offset, nbytes = start + int(spec["offset"]), int(spec["nbytes"])
+        itemsize = np.dtype(dtype).itemsize
+        if offset < start or nbytes % itemsize or offset + nbytes > len(body):
+            raise ColumnarError(f"Column '{name}' lies outside the body")
+        return np.frombuffer(body, dtype=dtype, count=nbytes // itemsize, offset=offset)
+
+    columns = {}
+    for spec in specs:
+        name = spec.get("name")
+        try:
+            array = view(spec, spec["dtype"], name)
+            if "categories" in spec:
+                categories = [str(c) for c in spec["categories"]]
+                if len(array) and (array.min() < -1 or array.max() >= len(categories)):
+                    raise ColumnarError(f"Column '{name}' has codes outside its categories")
+                column = Strings(array, categories)
+                if "lists" in spec:
+                    offsets = view(spec["lists"], CODE_DTYPE, name)
+                    if len(offsets) != n_rows + 1 or offsets[0] != 0 or offsets[-1] != len(array) or np.any(np.diff(offsets) < 0):
+                        raise ColumnarError(f"Column '{name}' has invalid list offsets")
+                    column = StringLists(offsets, column)
+            else:
+                column = array
+        except (KeyError, TypeError) as e:
+            raise ColumnarError(f"Invalid spec for column '{name}': {e}")
+        if len(column) != n_rows:
+            raise ColumnarError(f"Column '{name}' has {len(column)} rows, expected {n_rows}")
+        columns[name] = column
+    return columns, header.get("metadata", {})
+
+
+def accepts(accept_header: str | None) -> bool:
+    """Whether an Accept header asks for the columnar format"""
+    return bool(accept_header) and MEDIA_TYPE in accept_header
@@ -0,0 +1,303 @@
+"""
+Model Hot-Swap
+Loads registry versions in the background, warms them up and swaps them in
+without pausing requests; keeps the previous instance for instant rollback
+"""
+
+import fcntl
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from models.registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSlot:
+    """
+    The served instance of one model.
+
+    Attribute reads go to the current instance, and swap() replaces it with a
+    single assignment: calls already running finish on the instance they
+    started with, new calls see the new one. Code that makes several calls
+    which must agree (e.g. predict and then report the version) should take
+    slot.current once and use that.
+    """
+
+    def __init__(self, model):
+        self.current = model
+        self.previous = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.current, name)
+
+    def swap(self, model):
+        self.previous, self.current = self.current, model
+        return self.previous
+
+
+@dataclass
+class ManagedModel:
+    slot: ModelSlot
+    # New unloaded instance reading the artifacts in the given directory
+    factory: Callable[[str], object]
+    # Feature schema this server encodes inputs with; versions must match it
+    feature_schema: dict
+    # Wires a loaded instance into the app (catalog, stage timers) before it is swapped in
+    prepare: Callable[[object], None] = lambda model: None
+    # Companion (slot, instance) pairs built for a new instance and swapped together with it
+    companions: Callable[[object], list[tuple[ModelSlot, object]]] = lambda model: []
+    # Slots the last deploy swapped companions into; rolled back together with the model
+    companion_slots: list[ModelSlot] = field(default_factory=list)
+    job: dict = field(default_factory=lambda: {"state": "idle"})
+    swaps: dict = field(default_factory=lambda: {"deploy": 0, "rollback": 0})
+
+
+class ModelManager:
+    """
+    Deploys registry versions into model slots.
+
+    deploy() loads a version on a background thread, warms it up with synthetic
+    traffic, and only then swaps it in and marks it active in the registry.
+    rollback() swaps the previous instance straight back when it is still in
+    memory. With several workers, each one polls the registry's active pointer
+    and follows changes made through any other worker.
+    """
+
+    def __init__(self, registry: ModelRegistry, poll_seconds: float = 0.0):
+        self.registry = registry
+        self.poll_seconds = poll_seconds
+        self.models: dict[str, ManagedModel] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller: threading.Thread | None = None
+
+    def register(self, name: str, managed: ManagedModel):
+        self.models[name] = managed
+
+    def _managed(self, name: str) -> ManagedModel:
+        if name not in self.models:
+            raise KeyError(f"Unknown model '{name}'. Expected one of {tuple(self.models)}")
+        return self.models[name]
+
+    def deploy(self, name: str, version: str, activate: bool = True) -> dict:
+        """Start loading version in the background; returns the job status"""
+        managed = self._managed(name)
+        self._check_schema(name, managed, version)
+        with self._lock:
+            return self._start_deploy(name, managed, version, activate)
+
+    def _check_schema(self, name: str, managed: ManagedModel, version: str):
+        metadata = self.registry.metadata(name, version)
+        if metadata.get("feature_schema") != managed.feature_schema:
+            raise ValueError(f"Version '{version}' of '{name}' was trained on a different feature schema")
+
+    def _start_deploy(self, name: str, managed: ManagedModel, version: str, activate: bool) -> dict:
+        """Mark the job loading and start the deploy thread; the caller holds self._lock"""
+        if managed.job["state"] in ("loading", "warming"):
+            raise RuntimeError(f"A deploy of '{name}' ({managed.job['version']}) is already running")
+        managed.job = {"state": "loading", "version": version, "started_at": time.time()}
+
+        threading.Thread(
+            target=self._deploy, args=(name, managed, version, activate), name=f"deploy-{name}", daemon=True
+        ).start()
+        return dict(managed.job)
+
+    def _deploy(self, name: str, managed: ManagedModel, version: str, activate: bool):
+        job = managed.job
+        try:
+            model = managed.factory(self.registry.path(name, version))
+            model.ensure_loaded()
+            if model.model_version != version:
+                raise RuntimeError(f"Artifacts of '{version}' load as version '{model.model_version}'")
+
+            job["state"] = "warming"
+            job["warm_up_seconds"] = round(model.warm_up(), 4)
+            managed.prepare(model)
+            companions = managed.companions(model)
+            for _, companion in companions:
+                companion.ensure_loaded()
+
+            for slot, companion in companions:
+                slot.swap(companion)
+            previous = managed.slot.swap(model)
+            managed.companion_slots = [slot for slot, _ in companions]
+            if activate:
+                self.registry.activate(name, version)
+            managed.swaps["deploy"] += 1
+            job.update(state="swapped", previous_version=previous.model_version, finished_at=time.time())
+            logger.info("Swapped %s %s -> %s", name, previous.model_version, version)
+        except Exception as e:
+            job.update(state="failed", error=str(e), finished_at=time.time())
+            logger.exception("Deploy of %s %s failed", name, version)
+
+    def rollback(self, name: str) -> dict:
+        """
+        Go back to the previously active version: instantly when the previous
+        instance is still loaded, otherwise through a background deploy.
+        """
+        managed = self._managed(name)
+        with self._lock:
+            if managed.job["state"] in ("loading", "warming"):
+                raise RuntimeError(f"A deploy of '{name}' is running; roll back once it finishes")
+            history = self.registry.active(name)["history"]
+            if not history:
+                raise KeyError(f"Model '{name}' has no previous version to roll back to")
+            target = history[-1]
+            previous = managed.slot.previous
+            in_memory = previous is not None and previous.model_version == target
+            # Check the target before the active pointer moves, so a version this
+            # server cannot load is never made active for the other workers
+            if not in_memory:
+                self._check_schema(name, managed, target)
+            self.registry.rollback(name)
+            if not in_memory:
+                return self._start_deploy(name, managed, target, activate=False)
+
+            self._swap_back(managed)
+            return dict(managed.job)
+
+    @staticmethod
+    def _swap_back(managed: ManagedModel):
+        """Swap the previous instance (and its companions) back in"""
+        for slot in managed.companion_slots:
+            slot.swap(slot.previous)
+        replaced = managed.slot.swap(managed.slot.previous)
+        managed.swaps["rollback"] += 1
+        managed.job = {
+            "state": "swapped", "version": managed.slot.current.model_version,
+            "previous_version": replaced.model_version, "rollback": True, "finished_at": time.time()
+        }
+
+    def status(self) -> dict:
+        return {
+            name: {
+                "served_version": managed.slot.current.model_version,
+                "previous_version": None if managed.slot.previous is None else managed.slot.previous.model_version,
+                "active": self.registry.active(name),
+                "versions": self.registry.versions(name),
+                "job": dict(managed.job),
+                "swaps": dict(managed.swaps),
+            }
+            for name, managed in self.models.items()
+        }
+
+    def start_polling(self):
+        """Follow active-version changes made by other workers (no-op when poll_seconds is 0)"""
+        if self.poll_seconds <= 0 or self._poller is not None:
+            return
+        self._poller = threading.Thread(target=self._poll, name="registry-poller", daemon=True)
+        self._poller.start()
+
+    def stop_polling(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_seconds):
+            for name, managed in self.models.items():
+                try:
+                    version = self.registry.active(name)["version"]
+                    if version is None or version == managed.slot.current.model_version:
+                        continue
+                    if managed.job["state"] in ("loading", "warming"):
+                        continue
+                    # Do not retry a version that failed to load until it is activated again
+                    if managed.job["state"] == "failed" and managed.job["version"] == version:
+                        continue
+                    previous = managed.slot.previous
+                    if previous is not None and previous.model_version == version:
+                        self._swap_back(managed)
+                        continue
+                    self.deploy(name, version, activate=False)
+                except Exception:
+                    logger.exception("Following the active version of %s failed", name)
+
+
+class CatalogUpdater:
+    """
+    Applies catalog deltas to the served PartsCatalog.
+
+    apply() builds the updated catalog beside the served one, writes its
+    snapshot (an atomic file replace) and swaps it in. Writers in different
+    workers take turns through a lock file and first catch up with the
+    snapshot on disk; every worker polls that file and follows new versions,
+    replaying a delta that is one step ahead instead of reloading.
+    """
+
+    def __init__(self, slot: ModelSlot, poll_seconds: float = 0.0, prepare: Callable[[object], None] = lambda catalog: None):
+        self.slot = slot
+        self.poll_seconds = poll_seconds
+        # Wires a new catalog into the app (stage timers) before it is swapped in
+        self.prepare = prepare
+        self.updates = {"applied": 0, "followed": 0}
+        self.last: dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller: threading.Thread | None = None
+
+    def _follow(self) -> bool:
+        previous = self.slot.current
+        catalog = previous.follow()
+        if catalog is None:
+            return False
+        self.prepare(catalog)
+        self.slot.swap(catalog)
+        self.updates["followed"] += 1
+        logger.info("Followed catalog %s -> %s", previous.model_version, catalog.model_version)
+        return True
+
+    def apply(self, delta: dict) -> dict:
+        """Apply a parsed delta (see catalog.delta), publish the new snapshot and swap it in"""
+        with self._lock, open(f"{self.slot.current.snapshot_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.slot.current.ensure_loaded()
+            self._follow()
+            current = self.slot.current
+            catalog = current.with_delta(delta)
+            start = time.perf_counter()
+            catalog.publish()
+            publish_seconds = time.perf_counter() - start
+            self.prepare(catalog)
+            self.slot.swap(catalog)
+
+            self.updates["applied"] += 1
+            self.last = {
+                "version": catalog.model_version,
+                "previous_version": current.model_version,
+                "tables": {
+                    name: {"updated": change.updated, "inserted": change.inserted, "deleted": change.deleted}
+                    for name, change in catalog.changes.items()
+                },
+                "apply_seconds": round(catalog.load_seconds, 6),
+                "publish_seconds": round(publish_seconds, 6),
+                "finished_at": time.time(),
+            }
+            logger.info("Applied catalog delta %s -> %s", current.model_version, catalog.model_version)
+            return dict(self.last)
+
+    def status(self) -> dict:
+        return {"served_version": self.slot.current.model_version, "updates": dict(self.updates), "last": dict(self.last)}
+
+    def start_polling(self):
+        """Follow catalog snapshots published by other workers (no-op when poll_seconds is 0)"""
+        if self.poll_seconds <= 0 or self._poller is not None:
+            return
+        self._poller = threading.Thread(target=self._poll, name="catalog-poller", daemon=True)
+        self._poller.start()
+
+    def stop_polling(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_seconds):
+            # A catalog still loading will read the latest snapshot anyway
+            if not self.slot.current.is_loaded:
+                continue
+            try:
+                with self._lock:
+                    self._follow()
+            except Exception:
+                logger.exception("Following the catalog snapshot failed")
@@ -0,0 +1,79 @@
+"""
+Worker Memory Report
+Splits this process's resident memory into shared and private pages,
+and shows how much of each model artifact mapping is shared with other workers
+"""
+
+import os
+
+SMAPS_PATH = "/proc/self/smaps"
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def _read_smaps() -> list[tuple[str, dict[str, int]]]:
+    """Return (mapped path, field sizes in bytes) for every mapping of this process"""
+    mappings = []
+    with open(SMAPS_PATH) as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if not parts[0].endswith(":"):
+                # Mapping header: address perms offset dev inode [path]
+                path = parts[5] if len(parts) > 5 else ""
+                mappings.append((path, dict.fromkeys(FIELDS, 0)))
+            elif parts[0][:-1] in FIELDS and mappings:
+                mappings[-1][1][parts[0][:-1]] += int(parts[1]) * 1024
+    return mappings
+
+
+def _summarize(sizes: dict[str, int]) -> dict[str, int]:
+    return {
+        "rss_bytes": sizes["Rss"],
+        "pss_bytes": sizes["Pss"],
+        "shared_bytes": sizes["Shared_Clean"] + sizes["Shared_Dirty"],
+        "private_bytes": sizes["Private_Clean"] + sizes["Private_Dirty"],
+    }
+
+
+def _artifact_name(path: str, roots: list[str]) -> str | None:
+    """A mapped path relative to the innermost artifact root containing it, or None"""
+    for root in roots:
+        if path.startswith(root + os.sep):
+            return os.path.relpath(path, root)
+    return None
+
+
+def memory_report(*artifact_dirs: str) -> dict:
+    """
+    Memory usage of this worker.
+
+    Pages are "shared" when at least one other process maps them too, so with
+    several workers the artifact mappings should show up almost entirely as
+    shared, and PSS (RSS divided among sharers) shrinks as workers are added.
+    Artifacts are keyed by their path relative to the innermost of
+    artifact_dirs, so registry versions with the same file names (both mapped
+    during a hot swap) are reported separately, as model/version/file.
+    """
+    if not os.path.exists(SMAPS_PATH):
+        return {"pid": os.getpid(), "available": False}
+
+    roots = sorted({os.path.realpath(d) for d in artifact_dirs}, key=len, reverse=True)
+    totals = dict.fromkeys(FIELDS, 0)
+    artifacts: dict[str, dict[str, int]] = {}
+
+    for path, sizes in _read_smaps():
+        for field in FIELDS:
+            totals[field] += sizes[field]
+        name = _artifact_name(path, roots)
+        if name is not None:
+            per_file = artifacts.setdefault(name, dict.fromkeys(FIELDS, 0))
+            for field in FIELDS:
+                per_file[field] += sizes[field]
+
+    return {
+        "pid": os.getpid(),
+        "available": True,
+        **_summarize(totals),
+        "artifacts": {name: _summarize(sizes) for name, sizes in sorted(artifacts.items())},
+    }
@@ -0,0 +1,267 @@
+"""
+Serving Metrics
+Counters and latency histograms rendered in the Prometheus text format,
+plus a route class that times every request by stage
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+# Upper bounds (seconds) of the latency histogram buckets, sub-millisecond to multi-second
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}_total{_format_labels(self.label_names, k)} {v:g}" for k, v in sorted(values.items())]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label combination.
+
+    observe() is a binary search plus two additions under a lock, so it is
+    cheap enough for every request and every batch call.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = {k: (list(counts), total) for k, (counts, total) in self._series.items()}
+        lines = []
+        for label_values, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.label_names, label_values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total:.9g}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus collectors evaluated at scrape time.
+
+    A collector returns (name, kind, documentation, sample lines) for values that
+    are cheaper to read on demand than to keep updated (model versions, cache stats).
+    """
+
+    def __init__(self):
+        self.metrics: list[Counter | Histogram] = []
+        self.collectors: list[Callable[[], list[tuple[str, str, str, list[str]]]]] = []
+
+    def counter(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, label_names)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, label_names, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], list[tuple[str, str, str, list[str]]]]):
+        self.collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in self.metrics]
+        for collect in self.collectors:
+            families.extend(collect())
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def gauge_samples(name: str, label_names: tuple[str, ...], rows: list[tuple[tuple, float]]) -> list[str]:
+    """Sample lines for a gauge family built by a collector"""
+    return [f"{name}{_format_labels(label_names, labels)} {value:g}" for labels, value in rows]
+
+
+class ModelStageTimer:
+    """
+    Times a model's inference stages into a histogram labelled with the model
+    name and the version being served at the time.
+    Assign an instance to LazyModel.stage_timer.
+    """
+
+    def __init__(self, histogram: Histogram, name: str, model):
+        self.histogram = histogram
+        self.name = name
+        self.model = model
+
+    def __call__(self, stage: str):
+        return self.histogram.time(self.name, self.model.model_version or "", stage)
+
+
+# Per-request timestamps shared between the route handler and the wrapped endpoint
+_request_marks: ContextVar[dict | None] = ContextVar("request_marks", default=None)
+
+
+class RequestMetrics:
+    """Metrics every instrumented route reports into, and the optional profiler"""
+
+    def __init__(self, registry: MetricsRegistry, profiler=None):
+        self.requests = registry.counter(
+            "siliconsage_requests", "Requests handled, by endpoint and status code", ("method", "endpoint", "status")
+        )
+        self.errors = registry.counter(
+            "siliconsage_request_errors", "Requests that failed with a server error", ("method", "endpoint")
+        )
+        self.duration = registry.histogram(
+            "siliconsage_request_duration_seconds", "Time spent in the route, validation to serialization",
+            ("method", "endpoint")
+        )
+        self.stages = registry.histogram(
+            "siliconsage_request_stage_seconds",
+            "Route time by stage: validation (parsing and pydantic), handler, serialization",
+            ("method", "endpoint", "stage")
+        )
+        self.profiler = profiler
+
+    def route_class(self) -> type[APIRoute]:
+        """An APIRoute subclass reporting into these metrics; set it as app.router.route_class"""
+        request_metrics = self
+
+        class InstrumentedRoute(APIRoute):
+            def __init__(self, path: str, endpoint: Callable, **kwargs):
+                # FastAPI inspects the wrapper's signature, which functools.wraps points at the endpoint
+                if inspect.iscoroutinefunction(endpoint):
+                    @functools.wraps(endpoint)
+                    async def timed_endpoint(*args, **kw):
+                        marks = _request_marks.get()
+                        if marks is not None:
+                            marks["handler_start"] = time.perf_counter()
+                        try:
+                            return await endpoint(*args, **kw)
+                        finally:
+                            if marks is not None:
+                                marks["handler_end"] = time.perf_counter()
+                    super().__init__(path, timed_endpoint, **kwargs)
+                else:
+                    super().__init__(path, endpoint, **kwargs)
+
+            def get_route_handler(self) -> Callable:
+                handler = super().get_route_handler()
+                method = next(iter(self.methods), "GET") if self.methods else "GET"
+                return functools.partial(request_metrics.handle, handler, method, self.path)
+
+        return InstrumentedRoute
+
+    async def handle(self, handler: Callable, method: str, endpoint: str, request):
+        marks = {"start": time.perf_counter()}
+        token = _request_marks.set(marks)
+        profile = self.profiler.begin(request) if self.profiler is not None else None
+        status, response = 500, None
+        try:
+            response = await handler(request)
+            status = response.status_code
+            return response
+        except HTTPException as e:
+            status = e.status_code
+            raise
+        except RequestValidationError:
+            status = 422
+            raise
+        finally:
+            end = time.perf_counter()
+            _request_marks.reset(token)
+            self.requests.inc(method, endpoint, str(status))
+            if status >= 500:
+                self.errors.inc(method, endpoint)
+            self.duration.observe(end - marks["start"], method, endpoint)
+            if "handler_start" in marks and "handler_end" in marks:
+                self.stages.observe(marks["handler_start"] - marks["start"], method, endpoint, "validation")
+                self.stages.observe(marks["handler_end"] - marks["handler_start"], method, endpoint, "handler")
+                self.stages.observe(end - marks["handler_end"], method, endpoint, "serialization")
+            if profile is not None:
+                path = self.profiler.finish(profile, endpoint, end - marks["start"])
+                if path is not None and response is not None:
+                    response.headers["X-Profile-File"] = path
@@ -0,0 +1,70 @@
+"""
+NDJSON Streaming
+Incremental line reading and chunking for newline-delimited JSON request and
+response bodies, so streams of any length are processed in constant memory
+"""
+
+import json
+from typing import AsyncIterable, AsyncIterator
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+MEDIA_TYPE = "application/x-ndjson"
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+async def read_lines(body: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[tuple[int, bytes]]:
+    """(line number, line) for every non-blank line of a streamed body, as the bytes arrive"""
+    buffer = b""
+    line_no = 0
+    async for data in body:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLong(f"Line {line_no + 1} is longer than {max_line_bytes} bytes")
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+async def chunked(items: AsyncIterable, size: int) -> AsyncIterator[list]:
+    """Consecutive lists of up to size items"""
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode(records: list[dict]) -> bytes:
+    return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    A streaming response whose body iterator is still reading the request body.
+
+    StreamingResponse normally listens on receive() for a disconnect while it
+    streams, which would swallow the request body messages; here the body
+    iterator is the only reader, and a disconnect surfaces there as ClientDisconnect.
+    """
+
+    media_type = MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
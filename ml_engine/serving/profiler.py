@@ -0,0 +1,108 @@
+"""
+Request Sampling Profiler
+Opt-in stack sampling of individual requests, written as folded stacks
+(the input format of flamegraph.pl, speedscope and inferno)
+"""
+
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Innermost frames of threads that are merely waiting for work; not worth a sample
+IDLE_FRAMES = {("selectors.py", "select"), ("threading.py", "wait"), ("thread.py", "_worker")}
+
+
+class _Sampler(threading.Thread):
+    """Samples every other thread's Python stack at a fixed interval until stopped"""
+
+    def __init__(self, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._done.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class RequestProfile:
+    def __init__(self, forced: bool, interval: float):
+        self.forced = forced
+        self.sampler = _Sampler(interval)
+        self.sampler.start()
+
+
+class SamplingProfiler:
+    """
+    Profiles a random sample of requests, and any request carrying the trigger
+    header when one is configured.
+
+    Sampled requests are only written out when slower than slow_ms; requests
+    that asked for a profile always are. Samples cover every thread, since a
+    request's model work runs in a shared, batched executor thread: concurrent
+    requests show up in each other's profiles.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        header: str,
+        slow_ms: float,
+        interval_ms: float,
+        output_dir: str
+    ):
+        self.sample_rate = sample_rate
+        self.header = header.lower()
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or bool(self.header)
+
+    def begin(self, request) -> RequestProfile | None:
+        """Start sampling this request if it was asked for or drawn; None otherwise"""
+        forced = bool(self.header) and request.headers.get(self.header, "0") not in ("", "0")
+        if not forced and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        return RequestProfile(forced, self.interval)
+
+    def finish(self, profile: RequestProfile, endpoint: str, seconds: float) -> str | None:
+        """Stop sampling; write the folded stacks if worth keeping and return the file path"""
+        profile.sampler.stop()
+        if not profile.forced and seconds * 1000 < self.slow_ms:
+            return None
+        if not profile.sampler.stacks:
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", endpoint).strip("_") or "root"
+        path = os.path.join(self.output_dir, f"{int(time.time() * 1000)}-{os.getpid()}-{slug}-{seconds * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            for stack, count in profile.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
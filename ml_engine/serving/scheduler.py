@@ -0,0 +1,125 @@
+"""
+Inference Scheduler
+Runs CPU-bound model calls on a bounded thread pool and coalesces
+concurrent requests into micro-batches
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .admission import current_ticket
+
+
+class MicroBatcher:
+    """
+    Groups items submitted within a short window into one batch call.
+
+    batch_fn receives a list of items and must return a list of results in the
+    same order. Each caller awaits its own future and gets back only its result.
+    A batch is dispatched when max_batch_size items are pending or max_wait_ms
+    has elapsed since the first item arrived, whichever comes first. Items
+    whose request deadline (see serving.admission) has passed by the time the
+    batch runs are left out of it and fail with DeadlineExceeded.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list], list],
+        executor: ThreadPoolExecutor,
+        max_batch_size: int = 256,
+        max_wait_ms: float = 2.0
+    ):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[tuple[Any, asyncio.Future, Any]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, current_ticket()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _call(self, batch: list[tuple[Any, asyncio.Future, Any]]) -> tuple[list, list, list]:
+        """Split off expired items on the executor thread, right before the model runs"""
+        live, expired = [], []
+        for entry in batch:
+            ticket = entry[2]
+            (expired if ticket is not None and ticket.expired() else live).append(entry)
+        results = self.batch_fn([item for item, _, _ in live]) if live else []
+        return live, results, expired
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future, Any]]):
+        loop = asyncio.get_running_loop()
+        try:
+            live, results, expired = await loop.run_in_executor(self.executor, self._call, batch)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for _, future, ticket in expired:
+            if not future.done():
+                future.set_exception(ticket.deadline_exceeded())
+        for (_, future, _), result in zip(live, results):
+            # The caller may have gone away (client disconnect) while we computed
+            if not future.done():
+                future.set_result(result)
+
+
+class InferenceScheduler:
+    """Owns the bounded executor shared by every model call in the app"""
+
+    def __init__(self, max_workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+
+    def batcher(
+        self,
+        batch_fn: Callable[[list], list],
+        max_batch_size: int = 256,
+        max_wait_ms: float = 2.0
+    ) -> MicroBatcher:
+        return MicroBatcher(batch_fn, self.executor, max_batch_size, max_wait_ms)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run a single call off the event loop. The request's deadline is checked
+        again once a worker thread picks the call up, so work that expired while
+        waiting for a thread never reaches the model.
+        """
+        ticket = current_ticket()
+        if ticket is None:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+        def call():
+            ticket.check()
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
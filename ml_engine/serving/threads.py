@@ -0,0 +1,72 @@
+"""
+Inference Threading Policy
+Caps the native thread pools (BLAS, OpenMP, estimator n_jobs) each worker may use
+and optionally pins workers to CPUs, so several workers on one node do not each
+fan out to every core
+"""
+
+import fcntl
+import os
+import tempfile
+
+from threadpoolctl import threadpool_info, threadpool_limits
+
+# Read by the native libraries when they first start their pools
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"
+)
+
+
+def thread_env(threads: int) -> dict[str, str]:
+    """Environment that starts every native pool at the given size in processes launched with it"""
+    return {name: str(threads) for name in THREAD_ENV_VARS}
+
+
+def parse_cpus(spec: str) -> list[int]:
+    """CPU list like "0-3,6" -> [0, 1, 2, 3, 6]"""
+    cpus = []
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def _claim_slot() -> int:
+    """
+    Next round-robin slot among the workers of one server. Workers started by
+    the same uvicorn supervisor share its pid, which keys the counter file.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"siliconsage-affinity-{os.getppid()}")
+    with open(path, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        slot = int(f.read() or 0)
+        f.seek(0)
+        f.truncate()
+        f.write(str(slot + 1))
+    return slot
+
+
+def apply_policy(threads: int, affinity: str = "") -> dict:
+    """
+    Limit this process's BLAS/OpenMP pools to threads and apply the CPU affinity:
+    "" leaves it alone, "spread" pins each worker to its own CPU (round-robin
+    over the CPUs the process may use), and a CPU list like "0-3" restricts the
+    worker to those CPUs.
+    """
+    threadpool_limits(limits=threads)
+    if affinity == "spread":
+        allowed = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {allowed[_claim_slot() % len(allowed)]})
+    elif affinity:
+        os.sched_setaffinity(0, parse_cpus(affinity))
+    return policy_status()
+
+
+def policy_status() -> dict:
+    """Native pool sizes and CPU affinity currently in effect"""
+    pools: dict[str, int] = {}
+    for pool in threadpool_info():
+        pools[pool["user_api"]] = max(pools.get(pool["user_api"], 0), pool["num_threads"])
+    return {"pools": pools, "cpus": sorted(os.sched_getaffinity(0))}
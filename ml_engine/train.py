@@ -0,0 +1,310 @@
+"""
+SiliconSage Training Pipeline
+Trains both models from local data files and writes serving-ready artifacts.
+
+    python train.py                                   # synthetic FPS data, catalog parts for the value tiers
+    python train.py --fps-data runs.csv               # measured benchmark results
+    python train.py --search --workers 4              # forest hyperparameter search on a process pool
+    python train.py --full                            # refit the value tiers instead of updating them
+    python train.py --games all                       # synthetic per-game FPS outputs as well
+
+FPS data is a CSV with the columns in bottleneck.FEATURE_NAMES plus fps; storage
+and resolution may be given as names (nvme, 1440p) or codes. Further fps_<game>
+columns (fps_cs2, ...) train a multi-output forest that also predicts each game's FPS.
+
+The value tier clusterer is a MiniBatchKMeans over the priced catalog parts. Later
+runs only feed it the parts that were added to the catalog since (partial_fit);
+the scaler stays fixed so existing cluster centers keep their meaning.
+
+Artifacts are written in the memory-mappable form the server loads (flat forest
+arrays, centroid arrays), published to the model registry, and a report of
+time and peak memory per phase is printed.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+
+import config
+from build_artifacts import publish, publish_bottleneck, publish_value_tier
+from catalog.store import load_snapshot
+from models import bottleneck, value_tier
+from models.loading import dump_artifact
+from models.registry import ModelRegistry, data_hash
+
+# Parameters of the forest build_artifacts.py trains, used when not searching
+DEFAULT_FOREST = {"n_estimators": 100, "max_depth": 15, "min_samples_leaf": 1, "max_features": 1.0}
+SEARCH_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [10, 15, None],
+    "min_samples_leaf": [1, 4],
+    "max_features": [1.0, 0.5],
+}
+CV_FOLDS = 3
+
+# Catalog categories whose benchmark scores are on the scale the tiers were defined on
+TIER_CATEGORIES = ("cpu", "gpu")
+N_TIERS = len(value_tier.TIER_LABELS)
+MINIBATCH_SIZE = 1024
+
+
+class PhaseReport:
+    """Wall time and peak RSS (this process and finished pool workers) per training phase"""
+
+    def __init__(self):
+        self.phases: dict[str, dict] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        yield
+        # ru_maxrss is in KiB on Linux; peaks are cumulative, so they only grow phase to phase
+        self.phases[name] = {
+            "seconds": round(time.perf_counter() - start, 3),
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            "peak_worker_rss_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024,
+        }
+
+
+def load_fps_data(path: str) -> tuple[np.ndarray, np.ndarray, tuple[str, ...]]:
+    """
+    Benchmark results CSV -> (features in FEATURE_NAMES order, fps, games).
+    With fps_<game> columns, fps has one column per output: fps, then each game.
+    """
+    codes = {"storage": bottleneck.STORAGE_CODES, "resolution": bottleneck.RESOLUTION_CODES}
+    rows, fps = [], []
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = set(bottleneck.FEATURE_NAMES + ["fps"]) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"{path} is missing columns {sorted(missing)}")
+        targets = ["fps"] + [name for name in reader.fieldnames if name.startswith("fps_")]
+        for line, record in enumerate(reader, start=2):
+            row = []
+            for name in bottleneck.FEATURE_NAMES:
+                value = record[name].strip()
+                if name in codes and value.lower() in codes[name]:
+                    value = codes[name][value.lower()]
+                try:
+                    row.append(float(value))
+                except ValueError:
+                    raise ValueError(f"{path}:{line}: bad {name} value '{record[name]}'")
+            rows.append(row)
+            try:
+                fps.append([float(record[name]) for name in targets])
+            except ValueError:
+                raise ValueError(f"{path}:{line}: bad FPS value")
+    if not rows:
+        raise ValueError(f"{path} has no rows")
+    y = np.array(fps)
+    return np.array(rows), y if len(targets) > 1 else y[:, 0], tuple(name[4:] for name in targets[1:])
+
+
+# Per-process training data for the search workers, sent once through the pool initializer
+_search_data: dict = {}
+
+
+def _init_search_worker(X: np.ndarray, y: np.ndarray, folds: list):
+    _search_data.update(X=X, y=y, folds=folds)
+
+
+def _evaluate(params: dict) -> dict:
+    """Cross-validated MAE and size of one forest configuration"""
+    from sklearn.ensemble import RandomForestRegressor
+
+    X, y = _search_data["X"], _search_data["y"]
+    errors, nodes = [], []
+    start = time.perf_counter()
+    for train_rows, val_rows in _search_data["folds"]:
+        model = RandomForestRegressor(**params, random_state=42, n_jobs=1).fit(X[train_rows], y[train_rows])
+        errors.append(float(np.abs(model.predict(X[val_rows]) - y[val_rows]).mean()))
+        nodes.append(sum(tree.tree_.node_count for tree in model.estimators_))
+    return {
+        "params": params,
+        "mae": round(float(np.mean(errors)), 4),
+        "n_nodes": int(np.mean(nodes)),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def search_forest(X: np.ndarray, y: np.ndarray, workers: int, tolerance: float) -> tuple[dict, list[dict]]:
+    """
+    Grid search over SEARCH_GRID, one configuration per pool task.
+
+    Returns the smallest forest (by node count, which sets serving latency)
+    whose MAE is within tolerance of the best, and all results by MAE.
+    """
+    from sklearn.model_selection import KFold
+
+    folds = list(KFold(CV_FOLDS, shuffle=True, random_state=42).split(X))
+    grid = [dict(zip(SEARCH_GRID, values)) for values in itertools.product(*SEARCH_GRID.values())]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker, initargs=(X, y, folds)) as pool:
+        results = sorted(pool.map(_evaluate, grid), key=lambda r: r["mae"])
+
+    best_mae = results[0]["mae"]
+    chosen = min((r for r in results if r["mae"] <= best_mae * (1 + tolerance)), key=lambda r: r["n_nodes"])
+    return chosen, results
+
+
+def train_bottleneck(args, report: PhaseReport) -> dict:
+    from sklearn.ensemble import RandomForestRegressor
+
+    with report.phase("bottleneck_data"):
+        if args.fps_data:
+            X, y, games = load_fps_data(args.fps_data)
+        else:
+            games = bottleneck.resolve_games(args.games)
+            X, y = bottleneck.synthetic_training_data(games)
+
+    params, results = dict(DEFAULT_FOREST), []
+    if args.search:
+        with report.phase("bottleneck_search"):
+            chosen, results = search_forest(X, y, args.workers, args.tolerance)
+        params = chosen["params"]
+        for result in results[:5]:
+            print("  search:", result)
+        print("  chosen:", chosen)
+
+    with report.phase("bottleneck_fit"):
+        model = RandomForestRegressor(**params, random_state=42, n_jobs=args.workers).fit(X, y)
+        model.n_jobs = None
+        if games:
+            model.games_ = games
+        dump_artifact(model, os.path.join(args.model_dir, bottleneck.MODEL_FILE))
+
+    with report.phase("bottleneck_export"):
+        summary = bottleneck.export_artifacts(model, args.model_dir, args.lattice_size if args.lattice else 0)
+
+    training = {
+        "training_data_hash": data_hash(X, y),
+        "training_rows": len(y),
+        "training_source": os.path.basename(args.fps_data) if args.fps_data else "synthetic",
+        "hyperparameters": params,
+    }
+    if results:
+        training["search"] = {"configurations": len(results), "folds": CV_FOLDS, "best": results[0], "chosen": chosen}
+    return publish_bottleneck(args.registry, args.model_dir, summary, training)
+
+
+def catalog_parts(snapshot_path: str, categories: tuple[str, ...]) -> tuple[np.ndarray, np.ndarray]:
+    """(category/id keys, [price, benchmark, value] rows) of the priced, benchmarked catalog parts"""
+    snapshot = load_snapshot(snapshot_path)
+    keys, rows = [], []
+    for category in categories:
+        table = snapshot.table(category)
+        if table is None:
+            continue
+        usable = (table.price > 0) & (table.benchmark > 0)
+        keys.append(np.char.add(f"{category}/", table.ids[usable].astype(str)))
+        rows.append(np.column_stack([table.price[usable], table.benchmark[usable], table.value[usable]]))
+    if not keys:
+        raise ValueError(f"{snapshot_path} has none of the categories {categories}")
+    return np.concatenate(keys), np.concatenate(rows)
+
+
+def train_value_tier(args, report: PhaseReport) -> dict | None:
+    """Fit or update the clusterer; None when there is nothing new to learn from"""
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.preprocessing import StandardScaler
+
+    model_path = os.path.join(args.model_dir, value_tier.MODEL_FILE)
+    with report.phase("value_tier_data"):
+        keys, X = catalog_parts(args.catalog_snapshot, tuple(args.tier_categories))
+        # Loaded into memory (not mapped), since partial_fit updates the centers in place
+        previous = joblib.load(model_path) if os.path.exists(model_path) else None
+
+    incremental = (
+        not args.full and previous is not None
+        and isinstance(previous["model"], MiniBatchKMeans) and "trained_parts" in previous
+    )
+    with report.phase("value_tier_fit"):
+        if incremental:
+            new = ~np.isin(keys, previous["trained_parts"])
+            print(f"  value_tier: {int(new.sum())} new of {len(keys)} catalog parts")
+            if not new.any():
+                return None
+            scaler, model = previous["scaler"], previous["model"]
+            X_new = scaler.transform(X[new])
+            for start in range(0, len(X_new), MINIBATCH_SIZE):
+                model.partial_fit(X_new[start:start + MINIBATCH_SIZE])
+            trained_parts = np.union1d(previous["trained_parts"], keys[new])
+        else:
+            scaler = StandardScaler().fit(X)
+            model = MiniBatchKMeans(
+                n_clusters=N_TIERS, batch_size=MINIBATCH_SIZE, n_init=10, random_state=42
+            ).fit(scaler.transform(X))
+            trained_parts = np.unique(keys)
+
+        data = {
+            "model": model,
+            "scaler": scaler,
+            "parts_db": value_tier.SAMPLE_PARTS_DB,
+            "trained_parts": trained_parts,
+        }
+        dump_artifact(data, model_path)
+
+    with report.phase("value_tier_export"):
+        value_tier.export_arrays(data, args.model_dir)
+
+    return publish_value_tier(args.registry, args.model_dir, {
+        "training_data_hash": data_hash(X),
+        "training_rows": len(trained_parts),
+        "training_source": os.path.basename(args.catalog_snapshot),
+        "incremental": incremental,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train SiliconSage ML Engine models")
+    parser.add_argument("--model-dir", default=config.MODEL_DIR, help="Where artifacts are written")
+    parser.add_argument("--registry-dir", default=config.MODEL_REGISTRY_DIR, help="Model registry to publish into")
+    parser.add_argument("--activate", action="store_true", help="Make the trained versions active")
+    parser.add_argument("--models", nargs="+", choices=("bottleneck", "value_tier"), default=["bottleneck", "value_tier"])
+    parser.add_argument("--fps-data", help="Benchmark results CSV (default: synthetic data)")
+    parser.add_argument("--games", default=config.FPS_GAMES, help="Synthetic per-game FPS outputs (see build_artifacts.py)")
+    parser.add_argument("--search", action="store_true", help="Search forest hyperparameters")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Search processes and fit threads")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.01,
+        help="Pick the smallest forest whose MAE is within this fraction of the best"
+    )
+    parser.add_argument("--lattice", action="store_true", default=config.INFERENCE_ENGINE == "lattice")
+    parser.add_argument("--lattice-size", type=int, default=config.LATTICE_GRID_SIZE)
+    parser.add_argument("--catalog-snapshot", default=config.CATALOG_SNAPSHOT, help="Catalog snapshot with the parts to tier")
+    parser.add_argument("--tier-categories", nargs="+", default=list(TIER_CATEGORIES))
+    parser.add_argument("--full", action="store_true", help="Refit the value tiers from scratch")
+    parser.add_argument("--report", help="Also write the timing/memory report to this JSON file")
+    args = parser.parse_args()
+    args.registry = ModelRegistry(args.registry_dir)
+    os.makedirs(args.model_dir, exist_ok=True)
+
+    report = PhaseReport()
+    published = {}
+    if "bottleneck" in args.models:
+        published["bottleneck"] = train_bottleneck(args, report)
+    if "value_tier" in args.models:
+        metadata = train_value_tier(args, report)
+        if metadata is not None:
+            published["value_tier"] = metadata
+    publish(args.registry, published, args.activate)
+
+    for name, phase in report.phases.items():
+        print(f"{name:20s} {phase['seconds']:8.3f}s  peak rss {phase['peak_rss_bytes'] / 2**20:7.1f} MiB"
+              f"  workers {phase['peak_worker_rss_bytes'] / 2**20:7.1f} MiB")
+    print(f"{'total':20s} {sum(p['seconds'] for p in report.phases.values()):8.3f}s")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"phases": report.phases, "published": {n: m["version"] for n, m in published.items()}}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()